@@ -0,0 +1,4 @@
+"""
+Benchmarks for the FunPass data layer. Run each one from the project root,
+e.g. python -m benchmarks.load_employees
+"""
@@ -0,0 +1,118 @@
+"""
+Cold start: how long `python login.py` takes to put the login window up.
+
+Every run is a fresh interpreter, so nothing is warm but the OS file cache.
+Each run reports:
+- the interpreter's own start (`python -c pass`);
+- `import login`;
+- create_database() on a new database (first launch) and on an existing
+  one (every launch after);
+- show_login() up to the first drawn frame, with mainloop() swapped for one
+  update(); needs a display and is skipped without one;
+- the wall time from spawning the process to its exit.
+
+It also lists the heavy modules that were imported before any window existed.
+None of them should be there: the dashboards, PIL and tkcalendar load on
+first use.
+
+    python -m benchmarks.cold_start --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 5
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# modules a login window does not need
+HEAVY_MODULES = ('main', 'for_employees', 'PIL', 'tkcalendar', 'matplotlib', 'pandas', 'numpy')
+
+# runs in the child; prints one line of JSON
+PROBE = '''
+import json, os, sys, time
+start = time.perf_counter()
+import login
+imported = time.perf_counter()
+loaded = sorted(name for name in %(heavy)r if name in sys.modules)
+login.create_database()
+migrated = time.perf_counter()
+window = None
+if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+    import tkinter as tk
+    def first_frame(root, n=0):
+        root.update()
+        root.destroy()
+    tk.Tk.mainloop = first_frame
+    login.show_login()
+    window = time.perf_counter() - migrated
+print(json.dumps({'import': imported - start, 'create_database': migrated - imported,
+                  'window': window, 'loaded': loaded}))
+'''
+
+
+def spawn(args, env):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, cwd=ROOT, env=env, capture_output=True,
+                            text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def probe(path):
+    env = dict(os.environ, FUNPASS_DB=path)
+    wall, stdout = spawn(['-c', PROBE % {'heavy': HEAVY_MODULES}], env)
+    return dict(json.loads(stdout.strip().splitlines()[-1]), wall=wall)
+
+
+def summary_ms(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    return {'best_ms': round(min(values) * 1000, 1), 'median_ms': round(statistics.median(values) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=RUNS)
+    parser.add_argument('--json', help='also write the results here as JSON')
+    args = parser.parse_args()
+
+    interpreter, first, warm = [], [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for run in range(args.runs):
+            interpreter.append(spawn(['-c', 'pass'], dict(os.environ))[0])
+            # a new file for the first launch, then the same file again
+            path = os.path.join(tmp, f'funpass_{run}.db')
+            first.append(probe(path))
+            warm.append(probe(path))
+
+    results = {
+        'interpreter': summary_ms(interpreter),
+        'import login': summary_ms(run['import'] for run in warm),
+        'create_database (first launch)': summary_ms(run['create_database'] for run in first),
+        'create_database': summary_ms(run['create_database'] for run in warm),
+        'login window': summary_ms(run['window'] for run in warm),
+        'process total': summary_ms(run['wall'] for run in warm),
+    }
+    loaded = sorted({name for run in first + warm for name in run['loaded']})
+
+    print(f"{args.runs} runs, python {sys.version.split()[0]}")
+    print(f"{'phase':>32} {'best ms':>9} {'median ms':>10}")
+    for phase, timing in results.items():
+        if timing is None:
+            print(f"{phase:>32} {'skipped (no display)':>20}")
+        else:
+            print(f"{phase:>32} {timing['best_ms']:>9} {timing['median_ms']:>10}")
+    print(f"heavy modules loaded before the window: {', '.join(loaded) or 'none'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'runs': args.runs, 'phases': results, 'loaded': loaded}, f, indent=2)
+    return 1 if loaded else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
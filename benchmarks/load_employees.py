@@ -0,0 +1,159 @@
+"""
+Employee Management load time as the number of employees grows.
+
+Times the old per-employee (N+1) queries against the grouped
+database.employees_with_monthly_sales() on a throwaway database with a fixed
+sales volume. Fails if the grouped load:
+- runs more statements as employees are added;
+- takes longer per sales_daily row it reads as employees are added (the
+  rollup rows for this month grow with the employee count, so the raw time
+  cannot stay flat);
+- is not clearly faster than the per-employee queries at the largest scale.
+
+    python -m benchmarks.load_employees
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+
+import database as db
+import migrations
+import query_stats
+
+EMPLOYEE_COUNTS = (10, 100, 400, 1000)
+CUSTOMER_ROWS = 20000
+CANCELLATION_ROWS = 2000
+REPEAT = 3
+# to fail when the grouped load's time per rollup row read grows this much
+MAX_GROWTH = 3.0
+# to fail when the grouped load at the largest scale is not this many times faster
+MIN_SPEEDUP = 5.0
+
+PASS_TYPES = ['Express Pass', 'Junior Pass', 'Regular Pass', 'Student Pass',
+              'Senior Citizen Pass', 'PWD Pass']
+
+
+def populate(employee_count, rng):
+    today = date.today()
+    this_month = today.strftime('%Y-%m')
+    employee_ids = [f"E{i:05d}" for i in range(employee_count)]
+    migrations.migrate()
+    with db.transaction() as cursor:
+        cursor.executemany(
+            'INSERT INTO employees (employee_id, name, username, password) VALUES (?, ?, ?, ?)',
+            [(emp_id, f"Employee {emp_id}", emp_id.lower(), 'secret') for emp_id in employee_ids])
+        customers = []
+        for i in range(CUSTOMER_ROWS):
+            day = f"{this_month}-{rng.randint(1, 28):02d}" if rng.random() < 0.5 else '2024-01-15'
+            quantity = rng.randint(1, 4)
+            customers.append((f"T{i:07d}", 'Guest', 'guest@example.com', quantity, quantity * 900.0,
+                              day, day, rng.choice(PASS_TYPES), rng.choice(employee_ids)))
+        cursor.executemany('''
+            INSERT INTO customers (ticket_id, name, email, quantity, amount, booked_date,
+                                   purchased_date, pass_type, employee_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', customers)
+        cancellations = []
+        for ticket in rng.sample(customers, CANCELLATION_ROWS):
+            cancellations.append((ticket[0], ticket[1], ticket[2], ticket[7], 'health', ticket[3],
+                                  ticket[4], ticket[5], ticket[6],
+                                  rng.choice(['Pending', 'Approved', 'Rejected'])))
+        cursor.executemany('''
+            INSERT INTO cancellations (ticket_id, name, email, pass_type, reasons, quantity,
+                                       amount, booked_date, purchased_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', cancellations)
+
+
+def load_employees_per_employee():
+    """The previous load_employees: two extra queries for every employee."""
+    rows = []
+    for emp in db.query('SELECT * FROM employees'):
+        monthly_sales = db.query_value('''
+            SELECT COALESCE(SUM(amount), 0)
+            FROM customers
+            WHERE employee_id = ?
+            AND strftime('%Y-%m', purchased_date) = strftime('%Y-%m', 'now')
+        ''', (emp[0],), default=0)
+        refunds = db.query_value('''
+            SELECT COALESCE(SUM(amount), 0)
+            FROM cancellations
+            WHERE ticket_id IN (SELECT ticket_id FROM customers WHERE employee_id = ?)
+            AND status = 'Approved'
+            AND strftime('%Y-%m', purchased_date) = strftime('%Y-%m', 'now')
+        ''', (emp[0],), default=0)
+        rows.append(emp + (monthly_sales - refunds,))
+    return rows
+
+
+def rollup_rows():
+    """Return how many sales_daily rows the grouped load reads."""
+    return db.query_value(f'SELECT COUNT(*) FROM sales_daily WHERE {db.THIS_MONTH}', default=0)
+
+
+def statements(func):
+    """Return how many statements one call of func runs."""
+    query_stats.reset()
+    func()
+    return sum(stats.calls for _, _, stats in query_stats.snapshot())
+
+
+def best_of(func):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rng = random.Random(42)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for employee_count in EMPLOYEE_COUNTS:
+            db.set_database(os.path.join(tmp, f"employees_{employee_count}.db"))
+            populate(employee_count, rng)
+            old_time, old_rows = best_of(load_employees_per_employee)
+            new_time, new_rows = best_of(db.employees_with_monthly_sales)
+            old_sales = {row[0]: round(row[-1], 2) for row in old_rows}
+            new_sales = {row[0]: round(row[-1], 2) for row in new_rows}
+            if old_sales != new_sales:
+                print(f"Mismatch between old and grouped results at {employee_count} employees")
+                return 1
+            results.append((employee_count, old_time, new_time, rollup_rows(),
+                            statements(db.employees_with_monthly_sales)))
+        db.close_all()
+
+    print(f"{'employees':>10} {'per-employee (ms)':>18} {'grouped (ms)':>13} {'rollup rows':>12} "
+          f"{'statements':>11}")
+    for employee_count, old_time, new_time, rows, count in results:
+        print(f"{employee_count:>10} {old_time * 1000:>18.1f} {new_time * 1000:>13.1f} {rows:>12} {count:>11}")
+
+    failed = False
+    if results[-1][4] > results[0][4]:
+        print(f"FAIL: grouped load ran {results[0][4]} statements at {EMPLOYEE_COUNTS[0]} employees "
+              f"but {results[-1][4]} at {EMPLOYEE_COUNTS[-1]}")
+        failed = True
+
+    growth = (results[-1][2] / results[-1][3]) / (results[0][2] / results[0][3])
+    print(f"grouped load growth per rollup row from {EMPLOYEE_COUNTS[0]} to {EMPLOYEE_COUNTS[-1]} "
+          f"employees: {growth:.2f}x")
+    if growth > MAX_GROWTH:
+        print(f"FAIL: grouped load per rollup row grew more than {MAX_GROWTH}x")
+        failed = True
+
+    speedup = results[-1][1] / results[-1][2]
+    print(f"grouped load speedup at {EMPLOYEE_COUNTS[-1]} employees: {speedup:.2f}x")
+    if speedup < MIN_SPEEDUP:
+        print(f"FAIL: grouped load is less than {MIN_SPEEDUP}x faster")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+Many employee terminals working one funpass.db at once.
+
+Each worker process plays one terminal: it sells, edits its own sales, files
+cancellation requests and searches, through the same funpass.core services
+and paged search queries the employee dashboard uses. Terminals are paired
+up on employees, so they contend for the same allocations.
+
+While the workers run, the parent checks the allocation invariants in one
+read transaction every CHECK_SECONDS: no employee has sold more
+of a pass type than allocated. Afterwards it also checks that every sold counter matches the customers
+rows, and that the rows match what the workers say they sold.
+
+Reports throughput, p50/p99 latency per operation, busy retries
+('database is locked' after busy_timeout) and invariant violations. Exits 1
+on any violation, and when no allocation ever ran out: the default
+allocation is sized so that it runs out partway through a 10 second run, so
+lower --allocation on a slower machine.
+
+    python -m benchmarks.load_sim --workers 8 --duration 10
+    python -m benchmarks.load_sim --workers 16 --json results.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import database as db
+import migrations
+from benchmarks import synthetic_data
+from for_employees import EmployeeDashboard
+from funpass.core import CancellationService, InventoryService, SalesService
+
+# to weigh how often a terminal does each operation
+OPERATION_WEIGHTS = {'sale': 60, 'edit': 15, 'cancellation': 10, 'search': 15}
+MAX_QUANTITY = 5
+# to retry an operation this many times after 'database is locked'
+MAX_RETRIES = 3
+CHECK_SECONDS = 0.5
+# the dashboard's customer search, newest first like a cashier looking up a guest
+SEARCH_SORT = EmployeeDashboard.CUSTOMER_SORTS["Date (Newest)"]
+
+
+def populate(employees, allocation):
+    """Create the employees, each with `allocation` tickets of every priced pass type."""
+    migrations.migrate()
+    inventory = InventoryService()
+    pass_types = list(db.prices())
+    employee_ids = []
+    for i in range(employees):
+        employee_ids.append(inventory.save_employee(
+            None, f"Terminal Seller {i}", f"seller{i}", 'secret',
+            {pass_type: allocation for pass_type in pass_types}))
+    return employee_ids
+
+
+def is_busy(error):
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+class Terminal:
+    """One simulated employee terminal."""
+
+    def __init__(self, employee_id, seed):
+        self.rng = random.Random(seed)
+        self.sales = SalesService(employee_id)
+        self.cancellations = CancellationService()
+        self.pass_types = list(self.sales.pricing.prices())
+        # ticket_id -> Sale, for the sales this terminal may edit or cancel
+        self.own_sales = {}
+        self.sold = {pass_type: 0 for pass_type in self.pass_types}
+
+    def sale(self):
+        rng = self.rng
+        name = f"{rng.choice(synthetic_data.FIRST_NAMES)} {rng.choice(synthetic_data.LAST_NAMES)}"
+        booked = (date.today() + timedelta(days=rng.randint(0, 30))).isoformat()
+        sale = self.sales.sell(name, f"{name.replace(' ', '.').lower()}@example.com",
+                               rng.choice(self.pass_types), rng.randint(1, MAX_QUANTITY), booked)
+        self.own_sales[sale.ticket_id] = sale
+        self.sold[sale.pass_type] += sale.quantity
+
+    def edit(self):
+        if not self.own_sales:
+            return self.sale()
+        sale = self.own_sales[self.rng.choice(list(self.own_sales))]
+        quantity = self.rng.randint(1, MAX_QUANTITY)
+        amount = self.sales.pricing.quote(sale.pass_type, quantity)
+        self.sales.update(sale.ticket_id, sale.name, sale.email, quantity, amount, sale.booked_date,
+                          sale.purchased_date, sale.pass_type)
+        self.own_sales[sale.ticket_id] = sale._replace(quantity=quantity, amount=amount)
+        self.sold[sale.pass_type] += quantity - sale.quantity
+
+    def cancellation(self):
+        if not self.own_sales:
+            return self.sale()
+        sale = self.own_sales.pop(self.rng.choice(list(self.own_sales)))
+        self.cancellations.request(sale.ticket_id, sale.name, sale.email, 'Schedule conflict',
+                                   sale.quantity, sale.amount, sale.booked_date, sale.purchased_date,
+                                   sale.pass_type)
+
+    def search(self):
+        text = self.rng.choice(synthetic_data.FIRST_NAMES)[:3]
+        return db.customer_pages(EmployeeDashboard.CUSTOMER_COLUMNS, SEARCH_SORT, text,
+                                 self.sales.employee_id)()
+
+
+def run_terminal(args):
+    path, employee_id, seed, start_at, stop_at = args
+    db.set_database(path)
+    terminal = Terminal(employee_id, seed)
+    operations = list(OPERATION_WEIGHTS)
+    weights = list(OPERATION_WEIGHTS.values())
+    latencies = {operation: [] for operation in operations}
+    outcomes = {operation: {'ok': 0, 'rejected': 0, 'failed': 0, 'busy_retries': 0}
+                for operation in operations}
+
+    time.sleep(max(start_at - time.time(), 0))
+    while time.time() < stop_at:
+        operation = terminal.rng.choices(operations, weights)[0]
+        start = time.perf_counter()
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                getattr(terminal, operation)()
+                outcome = 'ok'
+            except db.NotEnoughTickets:
+                outcome = 'rejected'
+            except sqlite3.OperationalError as e:
+                if is_busy(e) and attempt < MAX_RETRIES:
+                    outcomes[operation]['busy_retries'] += 1
+                    continue
+                outcome = 'failed'
+            break
+        outcomes[operation][outcome] += 1
+        if outcome == 'ok':
+            latencies[operation].append(time.perf_counter() - start)
+    return {'latencies': latencies, 'outcomes': outcomes, 'sold': terminal.sold}
+
+
+def invariant_violations():
+    """Return a description of every allocation invariant broken right now."""
+    violations = []
+    with db.transaction() as cursor:
+        cursor.execute('SELECT employee_id, pass_type, allocation, sold FROM employee_allocations '
+                       'WHERE sold > allocation')
+        violations += [f"{employee_id} sold {sold} {pass_type} of {allocation} allocated"
+                       for employee_id, pass_type, allocation, sold in cursor.fetchall()]
+    return violations
+
+
+def final_violations(results):
+    violations = invariant_violations()
+    drifted = db.query('''
+        SELECT a.employee_id, a.pass_type, a.sold, IFNULL(SUM(c.quantity), 0)
+        FROM employee_allocations a
+        LEFT JOIN customers c ON c.employee_id = a.employee_id AND c.pass_type = a.pass_type
+        GROUP BY a.employee_id, a.pass_type
+        HAVING a.sold != IFNULL(SUM(c.quantity), 0)
+    ''')
+    violations += [f"{employee_id} {pass_type} counter {sold} but rows hold {rows}"
+                   for employee_id, pass_type, sold, rows in drifted]
+    for pass_type, rows in db.query('SELECT pass_type, SUM(quantity) FROM customers GROUP BY pass_type'):
+        tallied = sum(result['sold'].get(pass_type, 0) for result in results)
+        if rows != tallied:
+            violations.append(f"{pass_type} rows hold {rows} but terminals sold {tallied}")
+    return violations
+
+
+def sold_out_allocations():
+    """Return the allocations that cannot take even the largest order any more."""
+    return [f"{employee_id} {pass_type}" for employee_id, pass_type in db.query(
+        'SELECT employee_id, pass_type FROM employee_allocations WHERE allocation - sold < ? '
+        'ORDER BY employee_id, pass_type', (MAX_QUANTITY,))]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def summarize(results, elapsed):
+    summary = {}
+    for operation in OPERATION_WEIGHTS:
+        latencies = sorted(latency for result in results for latency in result['latencies'][operation])
+        outcomes = {outcome: sum(result['outcomes'][operation][outcome] for result in results)
+                    for outcome in ('ok', 'rejected', 'failed', 'busy_retries')}
+        summary[operation] = dict(outcomes, per_second=round(outcomes['ok'] / elapsed, 1),
+                                  p50_ms=latencies and round(percentile(latencies, 0.50) * 1000, 3),
+                                  p99_ms=latencies and round(percentile(latencies, 0.99) * 1000, 3))
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8, help='terminal processes')
+    parser.add_argument('--terminals-per-employee', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--allocation', type=int, default=1000,
+                        help='tickets of each pass type allocated to every employee')
+    parser.add_argument('--seed', type=int, default=synthetic_data.SEED)
+    parser.add_argument('--json', help='also write the results here as JSON')
+    args = parser.parse_args()
+
+    employees = math.ceil(args.workers / args.terminals_per_employee)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'load.db')
+        db.set_database(path)
+        employee_ids = populate(employees, args.allocation)
+
+        start_at = time.time() + 1.0
+        stop_at = start_at + args.duration
+        jobs = [(path, employee_ids[i % employees], args.seed + i, start_at, stop_at)
+                for i in range(args.workers)]
+        violations = []
+        with multiprocessing.Pool(args.workers) as pool:
+            pending = pool.map_async(run_terminal, jobs)
+            # to catch a broken invariant while the terminals are still writing
+            while not pending.ready():
+                violations += invariant_violations()
+                pending.wait(CHECK_SECONDS)
+            results = pending.get()
+        elapsed = args.duration
+        violations += final_violations(results)
+        sold_out = sold_out_allocations()
+        db.close_all()
+
+    summary = summarize(results, elapsed)
+    busy_retries = sum(row['busy_retries'] for row in summary.values())
+    writes = sum(summary[operation]['ok'] for operation in ('sale', 'edit', 'cancellation'))
+    print(f"{args.workers} terminals on {employees} employees for {elapsed:.0f} s, "
+          f"{args.allocation} of each pass type allocated to each")
+    print(f"{'operation':>12} {'ok':>7} {'rejected':>9} {'failed':>7} {'retries':>8} {'per s':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+    for operation, row in summary.items():
+        print(f"{operation:>12} {row['ok']:>7} {row['rejected']:>9} {row['failed']:>7} {row['busy_retries']:>8} "
+              f"{row['per_second']:>8} {row['p50_ms'] or '-':>8} {row['p99_ms'] or '-':>8}")
+    print(f"{writes / elapsed:.0f} committed writes/s, {busy_retries} busy retries, "
+          f"{len(violations)} invariant violations")
+    print(f"{len(sold_out)} allocations sold out: {', '.join(sold_out) or 'none'}")
+    for violation in violations:
+        print(f"FAIL: {violation}")
+    # to make sure the allocation checks were exercised, not just the happy path
+    allocation_reached = bool(sold_out) and summary['sale']['rejected'] > 0
+    if not allocation_reached:
+        print("FAIL: no sale was turned away at an employee's allocation; lower --allocation")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'workers': args.workers, 'employees': employees, 'duration': elapsed,
+                       'allocation': args.allocation,
+                       'operations': summary, 'writes_per_second': round(writes / elapsed, 1),
+                       'busy_retries': busy_retries, 'violations': violations,
+                       'sold_out': sold_out}, f, indent=2)
+    return 1 if violations or not allocation_reached else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
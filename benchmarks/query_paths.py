@@ -0,0 +1,197 @@
+"""
+Times every query path the dashboards use at several data scales.
+
+Each scale is generated with benchmarks.synthetic_data, then every path runs
+REPEAT times. The paths are built from the dashboards' own sort maps and
+columns and the same database and service calls, so a change to a dashboard
+query shows up here. The results go out as JSON (best and median milliseconds and
+rows returned per path, plus the commit and SQLite version), so runs on
+different commits can be diffed.
+
+    python -m benchmarks.query_paths --output results.json
+    python -m benchmarks.query_paths --tickets 10000 100000 --data-dir .bench-data
+
+With --data-dir the generated databases are kept and reused by later runs
+with the same scale, seed, end date and schema version. --query-stats
+prints the per-statement report from query_stats to stderr after each scale,
+with each path's statements charged to the path's name.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+import database as db
+import migrations
+import query_stats
+from benchmarks import synthetic_data
+from for_employees import EmployeeDashboard
+from funpass.core import InventoryService
+from main import AdminDashboard
+
+REPEAT = 5
+# the employee whose dashboard is timed: the first one, a heavy seller at every scale
+EMPLOYEE_ID = 'E00000'
+# a common first name prefix and a rare full name, both from synthetic_data
+SEARCHES = ('mar', 'kristine andrada')
+# matches the employee IDs E00000 to E00009, which every scale generates
+EMPLOYEE_SEARCH = 'e0000'
+
+
+def paged(fetch_page, pages=1):
+    """Read `pages` pages from fetch_page the way PagedTreeview scrolls through them."""
+    def fetch():
+        rows, after = [], None
+        for _ in range(pages):
+            page = fetch_page(after)
+            rows.extend(page)
+            if not page:
+                break
+            after = page[-1][1]
+        return rows
+    return fetch
+
+
+def overview():
+    db.expire_overview()
+    return db.overview()
+
+
+def employee_rows(search_text=''):
+    """Admin Employee Management table, in its default order."""
+    order_by = AdminDashboard.EMPLOYEE_SORTS["Name (A-Z)"]
+    return lambda: InventoryService().employee_rows(order_by, db.pass_types(), search_text)
+
+
+def prices():
+    db.expire_prices()
+    return db.prices()
+
+
+def query_paths():
+    """Return {name: callable} for every dashboard query path."""
+    paths = {
+        'admin.overview': overview,
+        'admin.employees': employee_rows(),
+        'admin.employees.search': employee_rows(EMPLOYEE_SEARCH),
+        'employee.pass_sales': lambda: db.employee_pass_sales(EMPLOYEE_ID),
+        'employee.availability': lambda: db.availability(EMPLOYEE_ID),
+        'employee.recent_sales': lambda: db.recent_sales(EMPLOYEE_ID),
+        'prices': prices,
+    }
+    admin, employee = AdminDashboard, EmployeeDashboard
+    for text in ('',) + SEARCHES:
+        search = f'.search[{text}]' if text else ''
+        for sort_name, sort in admin.CUSTOMER_SORTS.items():
+            customers = db.customer_pages(admin.CUSTOMER_COLUMNS, sort, text, tables=admin.CUSTOMER_TABLES)
+            paths[f'admin.customers{search}[{sort_name}]'] = paged(customers)
+            if not text:
+                paths[f'admin.customers[{sort_name}].5_pages'] = paged(customers, pages=5)
+        for sort_name, sort in employee.CUSTOMER_SORTS.items():
+            paths[f'employee.customers{search}[{sort_name}]'] = paged(
+                db.customer_pages(employee.CUSTOMER_COLUMNS, sort, text, EMPLOYEE_ID))
+        for sort_name, sort in admin.CANCELLATION_SORTS.items():
+            paths[f'admin.cancellations{search}[{sort_name}]'] = paged(
+                db.cancellation_pages(admin.CANCELLATION_COLUMNS, sort, text))
+        for sort_name, sort in employee.CANCELLATION_SORTS.items():
+            paths[f'employee.cancellations{search}[{sort_name}]'] = paged(
+                db.cancellation_pages(employee.CANCELLATION_COLUMNS, sort, text))
+    return paths
+
+
+def time_path(func):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return {'best_ms': round(min(timings) * 1000, 3),
+            'median_ms': round(statistics.median(timings) * 1000, 3),
+            'rows': len(result)}
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(scale, data_dir, seed, end_date, show_stats=False):
+    version = len(migrations.MIGRATIONS)
+    path = os.path.join(data_dir, f"funpass_{scale.tickets}_{scale.employees}_{scale.years}"
+                                  f"_{seed}_{end_date.isoformat()}_v{version}.db")
+    db.set_database(path)
+    populate_seconds = None
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        synthetic_data.populate(scale.tickets, scale.employees, scale.years, seed, end_date)
+        populate_seconds = round(time.perf_counter() - start, 2)
+    query_stats.reset()
+    results = {}
+    for name, func in query_paths().items():
+        query_stats.set_screen(name)
+        results[name] = time_path(func)
+    query_stats.set_screen(None)
+    if show_stats:
+        print(query_stats.report(limit=100), file=sys.stderr)
+    db.close_all()
+    return {'tickets': scale.tickets, 'employees': scale.employees, 'years': scale.years,
+            'populate_seconds': populate_seconds, 'paths': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickets', type=int, nargs='+',
+                        help='ticket counts to run at (default: every synthetic_data.SCALES entry)')
+    parser.add_argument('--seed', type=int, default=synthetic_data.SEED)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=date.today(),
+                        help='last sales day, YYYY-MM-DD (default today)')
+    parser.add_argument('--data-dir', help='keep generated databases here and reuse them')
+    parser.add_argument('--output', help='write the JSON here instead of stdout')
+    parser.add_argument('--query-stats', action='store_true',
+                        help='print per-statement timings to stderr')
+    args = parser.parse_args()
+
+    scales = synthetic_data.SCALES
+    if args.tickets:
+        # to scale employees and years along with the nearest default scale
+        scales = [min(synthetic_data.SCALES, key=lambda scale: abs(scale.tickets - tickets))._replace(
+                      tickets=tickets) for tickets in args.tickets]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        report = {
+            'commit': commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'seed': args.seed,
+            'end_date': args.end_date.isoformat(),
+            'repeat': REPEAT,
+            'scales': [],
+        }
+        for scale in scales:
+            print(f"{scale.tickets} tickets ...", file=sys.stderr)
+            report['scales'].append(run_scale(scale, data_dir, args.seed, args.end_date,
+                                               args.query_stats))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Customer table row formatting over 100k rows.
+
+Times the previous fetch, which selected ISO dates and re-parsed and
+reformatted each one in Python with an f-string peso amount per row, against
+formatting the dates in the query (formatting.display_date) and the amounts
+through the cached formatting.peso. Fails if the rows differ or the new path
+is not clearly faster.
+
+    python -m benchmarks.row_formatting
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import database as db
+import migrations
+from formatting import display_date, peso
+
+ROWS = 100000
+REPEAT = 3
+# to fail when the new formatting is not this many times faster
+MIN_SPEEDUP = 2.0
+
+PRICES = {'Express Pass': 2300.0, 'Junior Pass': 900.0, 'Regular Pass': 1300.0,
+          'Student Pass': 1000.0, 'Senior Citizen Pass': 1000.0, 'PWD Pass': 900.0}
+
+
+def populate(rng):
+    migrations.migrate()
+    first_day = date(2022, 1, 1)
+    customers = []
+    for i in range(ROWS):
+        pass_type = rng.choice(list(PRICES))
+        quantity = rng.randint(1, 6)
+        purchased = first_day + timedelta(days=rng.randint(0, 3 * 365))
+        booked = purchased + timedelta(days=rng.randint(0, 60))
+        customers.append((f"T{i:07d}", 'Guest', 'guest@example.com', quantity,
+                          quantity * PRICES[pass_type], booked.isoformat(), purchased.isoformat(),
+                          pass_type, 'E00001'))
+    with db.transaction() as cursor:
+        cursor.execute("INSERT INTO employees (employee_id, name, username, password) "
+                       "VALUES ('E00001', 'Employee', 'employee', 'secret')")
+        cursor.executemany('''
+            INSERT INTO customers (ticket_id, name, email, quantity, amount, booked_date,
+                                   purchased_date, pass_type, employee_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', customers)
+
+
+def rows_per_row_parsing():
+    """The previous fetch: ISO dates out of SQL, reformatted row by row."""
+    rows = []
+    for data in db.query('''SELECT ticket_id, name, email, quantity, amount,
+                                   strftime('%Y-%m-%d', booked_date), strftime('%Y-%m-%d', purchased_date),
+                                   pass_type
+                            FROM customers ORDER BY ticket_id'''):
+        data = list(data)
+        try:
+            if data[5]:
+                data[5] = datetime.strptime(data[5], '%Y-%m-%d').strftime('%m/%d/%Y')
+            if data[6]:
+                data[6] = datetime.strptime(data[6], '%Y-%m-%d').strftime('%m/%d/%Y')
+        except ValueError:
+            pass
+        data[4] = f"₱{data[4]:,.2f}"
+        rows.append(data)
+    return rows
+
+
+def rows_formatted_once():
+    """Dates formatted by the query, amounts through the cached formatter."""
+    return [[ticket_id, name, email, quantity, peso(amount), booked, purchased, pass_type]
+            for ticket_id, name, email, quantity, amount, booked, purchased, pass_type in db.query(f'''
+                SELECT ticket_id, name, email, quantity, amount,
+                       {display_date('booked_date')}, {display_date('purchased_date')}, pass_type
+                FROM customers ORDER BY ticket_id''')]
+
+
+def rows_unformatted():
+    """The bare query, as a floor for the two above."""
+    return db.query('''SELECT ticket_id, name, email, quantity, amount, booked_date,
+                              purchased_date, pass_type
+                       FROM customers ORDER BY ticket_id''')
+
+
+def best_of(func):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db.set_database(os.path.join(tmp, 'row_formatting.db'))
+        populate(random.Random(42))
+        bare_time, _ = best_of(rows_unformatted)
+        old_time, old_rows = best_of(rows_per_row_parsing)
+        new_time, new_rows = best_of(rows_formatted_once)
+        db.close_all()
+
+    if old_rows != new_rows:
+        print("Mismatch between per-row and formatted-once rows")
+        return 1
+
+    print(f"{'path':>16} {'ms':>8} {'us/row':>7}")
+    for name, elapsed in (('query only', bare_time), ('per-row parsing', old_time),
+                          ('formatted once', new_time)):
+        print(f"{name:>16} {elapsed * 1000:>8.1f} {elapsed / ROWS * 1e6:>7.2f}")
+
+    speedup = old_time / new_time
+    print(f"formatted-once speedup over {ROWS} rows: {speedup:.2f}x")
+    if speedup < MIN_SPEEDUP:
+        print(f"FAIL: formatting once is less than {MIN_SPEEDUP}x faster")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
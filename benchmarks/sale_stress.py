@@ -0,0 +1,107 @@
+"""
+Concurrent sales against one allocation, from many processes at once.
+
+Every process sells random quantities through database.commit_sale() until
+the allocation is gone, all on the same throwaway database. Fails if more
+tickets were sold than allocated, if selling stopped short of the
+allocation (so something other than it turned sales away), if the processes' own tallies disagree
+with the customers table, or if the sold counter drifted from the rows.
+
+    python -m benchmarks.sale_stress
+"""
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+import database as db
+import ids
+import migrations
+
+PROCESSES = 12
+EMPLOYEE_ID = 'E00001'
+# to give every process a share of allocations that run out mid-test
+ALLOCATIONS = {'Regular Pass': 1500, 'Express Pass': 400}
+MAX_QUANTITY = 5
+
+
+def populate():
+    migrations.migrate()
+    with db.transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO employees (employee_id, name, username, password)
+            VALUES (?, 'Stress Seller', 'stress', 'secret')
+        ''', (EMPLOYEE_ID,))
+        db.save_allocations(cursor, EMPLOYEE_ID, ALLOCATIONS)
+
+
+def sell(args):
+    path, seed = args
+    db.set_database(path)
+    rng = random.Random(seed)
+    sold = {pass_type: 0 for pass_type in ALLOCATIONS}
+    open_passes = list(ALLOCATIONS)
+    busy = 0
+    today = time.strftime('%Y-%m-%d')
+    while open_passes:
+        pass_type = rng.choice(open_passes)
+        quantity = rng.randint(1, MAX_QUANTITY)
+        try:
+            db.commit_sale(ids.next_ticket_id(), 'Guest', 'guest@example.com', quantity,
+                           quantity * 900.0, today, today, pass_type, EMPLOYEE_ID)
+            sold[pass_type] += quantity
+        except db.NotEnoughTickets as e:
+            if e.available == 0:
+                open_passes.remove(pass_type)
+        except sqlite3.OperationalError:
+            # to count lock waits that outlasted busy_timeout; the sale did not happen
+            busy += 1
+    return sold, busy
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'stress.db')
+        db.set_database(path)
+        populate()
+        db.close_all()
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(PROCESSES) as pool:
+            results = pool.map(sell, [(path, seed) for seed in range(PROCESSES)])
+        elapsed = time.perf_counter() - start
+
+        db.set_database(path)
+        failures = []
+        for pass_type, allocation in ALLOCATIONS.items():
+            in_rows = db.query_value('SELECT SUM(quantity) FROM customers WHERE pass_type = ?',
+                                     (pass_type,), default=0)
+            counted = db.query_value('SELECT sold FROM employee_allocations WHERE employee_id = ? AND pass_type = ?',
+                                     (EMPLOYEE_ID, pass_type), default=0)
+            tallied = sum(sold[pass_type] for sold, _ in results)
+            print(f"{pass_type:>14}: allocated {allocation}, sold {in_rows}, "
+                  f"counter {counted}, tallied by processes {tallied}")
+            if in_rows > allocation:
+                failures.append(f"{pass_type} oversold by {in_rows - allocation}")
+            elif in_rows < allocation:
+                failures.append(f"{pass_type} stopped {allocation - in_rows} short of its allocation")
+            if in_rows != tallied:
+                failures.append(f"{pass_type} rows disagree with process tallies")
+            if counted != in_rows:
+                failures.append(f"{pass_type} sold counter drifted from rows")
+        sales = db.query_value('SELECT COUNT(*) FROM customers', default=0)
+        db.close_all()
+
+    busy = sum(busy for _, busy in results)
+    print(f"{PROCESSES} processes, {sales} sales in {elapsed:.2f} s "
+          f"({sales / elapsed:.0f} sales/s), {busy} busy timeouts")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
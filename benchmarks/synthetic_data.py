@@ -0,0 +1,146 @@
+"""
+Deterministic synthetic FunPass data at production scale.
+
+populate() fills the current database (see database.set_database) with
+employees, several years of ticket sales ending at end_date, and
+cancellations in every status. The same arguments always give the same rows,
+so timings taken on different commits compare like for like.
+
+    python -m benchmarks.synthetic_data funpass_1m.db --tickets 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+import database as db
+import migrations
+
+SEED = 42
+# to give every employee and pass type room to keep selling
+ALLOCATION_HEADROOM = 50
+
+Scale = namedtuple('Scale', 'tickets employees years')
+
+# the data sizes the query benchmark runs at by default
+SCALES = (
+    Scale(10000, 20, 1),
+    Scale(100000, 100, 2),
+    Scale(1000000, 400, 3),
+)
+
+FIRST_NAMES = ['Maria', 'Jose', 'Juan', 'Ana', 'Mark', 'Angel', 'John', 'Kristine', 'Michael',
+               'Jennifer', 'Paolo', 'Andrea', 'Carlo', 'Patricia', 'Miguel', 'Camille', 'Rafael',
+               'Nicole', 'Gabriel', 'Bea', 'Joshua', 'Erika', 'Daniel', 'Rose']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Garcia', 'Mendoza', 'Torres',
+              'Tomas', 'Andrada', 'Castillo', 'Flores', 'Villanueva', 'Ramos', 'Castro', 'Rivera',
+              'Aquino', 'Navarro', 'Salazar', 'Mercado']
+REASONS = ['Medical emergency', 'Bad weather', 'Schedule conflict', 'Booked the wrong date',
+           'Family emergency', 'Travel cancelled']
+# most requests are settled; a few wait for review
+STATUS_WEIGHTS = {'Pending': 15, 'Approved': 60, 'Rejected': 25}
+# share of tickets that get a cancellation request
+CANCELLATION_RATE = 0.05
+
+
+def _people(rng, count):
+    for _ in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield f"{first} {last}", f"{first}.{last}{rng.randint(1, 999)}@example.com".lower()
+
+
+def populate(tickets, employees, years, seed=SEED, end_date=None):
+    """Fill the current database and return (employees, customers, cancellations) counts.
+
+    Sales spread over `years` years up to end_date (default today), with a
+    weekend peak and a few employees selling much more than the rest.
+    """
+    rng = random.Random(seed)
+    end_date = end_date or date.today()
+    first_day = end_date - timedelta(days=365 * years - 1)
+    days = [first_day + timedelta(days=offset) for offset in range((end_date - first_day).days + 1)]
+    day_weights = [3 if day.weekday() >= 5 else 1 for day in days]
+    days = [day.isoformat() for day in days]
+
+    migrations.migrate()
+    prices = db.prices()
+    pass_types = list(prices)
+    pass_weights = [rng.randint(1, 10) for _ in pass_types]
+
+    employee_ids = [f"E{i:05d}" for i in range(employees)]
+    employee_weights = [rng.paretovariate(1.5) for _ in employee_ids]
+    names = [name for name, _ in _people(rng, employees)]
+
+    cancellations = []
+
+    def customers():
+        people = _people(rng, tickets)
+        sale_days = rng.choices(days, day_weights, k=tickets)
+        sellers = rng.choices(employee_ids, employee_weights, k=tickets)
+        passes = rng.choices(pass_types, pass_weights, k=tickets)
+        for i, ((name, email), purchased, seller, pass_type) in enumerate(
+                zip(people, sale_days, sellers, passes)):
+            quantity = rng.choice((1, 1, 1, 2, 2, 3, 4, 5))
+            amount = quantity * prices[pass_type]
+            booked = (date.fromisoformat(purchased) + timedelta(days=rng.randint(0, 30))).isoformat()
+            ticket = (f"T{i:07d}", name, email, quantity, amount, booked, purchased, pass_type, seller)
+            if rng.random() < CANCELLATION_RATE:
+                status = rng.choices(list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values()))[0]
+                cancellations.append(ticket[:3] + (pass_type, rng.choice(REASONS), quantity, amount,
+                                                   booked, purchased, status))
+            yield ticket
+
+    with db.transaction() as cursor:
+        cursor.executemany('INSERT INTO employees (employee_id, name, username, password) '
+                           'VALUES (?, ?, ?, ?)',
+                           [(employee_id, name, employee_id.lower(), 'secret')
+                            for employee_id, name in zip(employee_ids, names)])
+        cursor.executemany('''
+            INSERT INTO customers (ticket_id, name, email, quantity, amount, booked_date,
+                                   purchased_date, pass_type, employee_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', customers())
+        cursor.executemany('''
+            INSERT INTO cancellations (ticket_id, name, email, pass_type, reasons, quantity,
+                                       amount, booked_date, purchased_date, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', cancellations)
+        # every employee gets every pass type, with room above what they sold
+        cursor.executemany('INSERT OR IGNORE INTO employee_allocations (employee_id, pass_type) '
+                           'VALUES (?, ?)',
+                           [(employee_id, pass_type) for employee_id in employee_ids
+                            for pass_type in pass_types])
+        cursor.execute('UPDATE employee_allocations SET allocation = sold + ?', (ALLOCATION_HEADROOM,))
+    db.execute('ANALYZE')
+    return employees, tickets, len(cancellations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='database file to create')
+    parser.add_argument('--tickets', type=int, default=SCALES[-1].tickets)
+    parser.add_argument('--employees', type=int, default=SCALES[-1].employees)
+    parser.add_argument('--years', type=int, default=SCALES[-1].years)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--end-date', type=date.fromisoformat, default=None,
+                        help='last sales day, YYYY-MM-DD (default today)')
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        print(f"{args.path} already exists")
+        return 1
+
+    db.set_database(args.path)
+    start = time.perf_counter()
+    employees, customers, cancellations = populate(args.tickets, args.employees, args.years,
+                                                   args.seed, args.end_date)
+    db.close_all()
+    print(f"{employees} employees, {customers} tickets, {cancellations} cancellations "
+          f"in {time.perf_counter() - start:.1f} s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,587 @@
+"""
+This module owns the connections to funpass.db shared by the dashboards.
+
+Each thread gets one long-lived connection (sqlite3 connections cannot be
+shared across threads), configured once with the pragmas below and with a
+large prepared-statement cache, so running a query on a hot path costs no
+connect/close. Every statement is timed into query_stats.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+import query_stats
+from formatting import display_date
+
+DB_PATH = os.environ.get('FUNPASS_DB', 'funpass.db')
+
+# to size the per-connection prepared statement cache
+STATEMENT_CACHE_SIZE = 256
+
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',
+    'PRAGMA busy_timeout=5000',
+)
+
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+# to let this process notice its own commits, which PRAGMA data_version skips
+_commits = 0
+# (first, last) change_log ids of recent commits made by this process, once
+# track_own_changes() is on
+_own_changes = deque(maxlen=100)
+
+
+def _connect():
+    # isolation_level=None leaves transaction control to transaction()
+    conn = sqlite3.connect(DB_PATH, timeout=5, isolation_level=None,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def get_connection():
+    """Return the calling thread's connection, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _connect()
+        _local.conn = conn
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+def set_database(path):
+    """Point the data layer at another database file (closes open connections)."""
+    global DB_PATH
+    close_all()
+    DB_PATH = path
+    expire_prices()
+
+
+def close_all():
+    with _connections_lock:
+        for conn in _connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # to ignore connections owned by threads that already exited
+                pass
+        _connections.clear()
+    _local.__dict__.pop('conn', None)
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """Cursor for transaction(), reporting each statement to query_stats."""
+
+    _sql = ''
+
+    def execute(self, sql, params=()):
+        start = time.perf_counter()
+        super().execute(sql, params)
+        query_stats.record(self.connection, sql, params, time.perf_counter() - start, self.rowcount)
+        self._sql = sql
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_params)
+        query_stats.record(self.connection, sql, (), time.perf_counter() - start, self.rowcount)
+        return self
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            query_stats.add_rows(self._sql, 1)
+        return row
+
+    def fetchall(self):
+        rows = super().fetchall()
+        query_stats.add_rows(self._sql, len(rows))
+        return rows
+
+
+def query(sql, params=()):
+    start = time.perf_counter()
+    conn = get_connection()
+    rows = conn.execute(sql, params).fetchall()
+    query_stats.record(conn, sql, params, time.perf_counter() - start, len(rows))
+    return rows
+
+
+def query_one(sql, params=()):
+    start = time.perf_counter()
+    conn = get_connection()
+    row = conn.execute(sql, params).fetchone()
+    query_stats.record(conn, sql, params, time.perf_counter() - start, 0 if row is None else 1)
+    return row
+
+
+def query_value(sql, params=(), default=None):
+    row = query_one(sql, params)
+    if row is None or row[0] is None:
+        return default
+    return row[0]
+
+
+@contextmanager
+def transaction(immediate=False):
+    """Run the enclosed statements in one transaction and yield a cursor.
+
+    Commits on success and rolls back on any exception. Nested use joins the
+    outer transaction. immediate=True takes the write lock up front
+    (BEGIN IMMEDIATE) for read-check-write sequences.
+    """
+    global _commits
+    conn = get_connection()
+    cursor = conn.cursor(_TimedCursor)
+    if conn.in_transaction:
+        yield cursor
+        return
+    cursor.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+    try:
+        yield cursor
+    except BaseException:
+        conn.rollback()
+        _local.own_changes = None
+        raise
+    else:
+        conn.commit()
+        _commits += 1
+        if getattr(_local, 'own_changes', None) is not None:
+            _own_changes.append(tuple(_local.own_changes))
+            _local.own_changes = None
+
+
+def execute(sql, params=()):
+    """Run a single write statement in its own transaction and return its cursor.
+
+    The write lock is taken up front: a deferred transaction whose statement
+    reads before it writes fails at once with 'database is locked' when
+    another terminal commits in between, without waiting for busy_timeout.
+    """
+    with transaction(immediate=True) as cursor:
+        cursor.execute(sql, params)
+        return cursor
+
+
+def executemany(sql, seq_of_params):
+    with transaction(immediate=True) as cursor:
+        cursor.executemany(sql, seq_of_params)
+        return cursor
+
+
+# Change Log
+
+def change_marker():
+    """Return a value that differs after any commit to the database.
+
+    PRAGMA data_version moves when another connection commits, and the
+    commit counter when this process does, so polling it costs no table read.
+    """
+    return query_value('PRAGMA data_version'), _commits
+
+
+def last_change_id():
+    return query_value('SELECT MAX(id) FROM change_log', default=0)
+
+
+def changes_since(change_id):
+    """Return (id, topic, key) for every change_log row after change_id, oldest first."""
+    return query('SELECT id, topic, key FROM change_log WHERE id > ? ORDER BY id', (change_id,))
+
+
+def _note_own_change(change_id):
+    # ids written in one transaction are consecutive: it holds the write lock
+    if getattr(_local, 'own_changes', None) is None:
+        _local.own_changes = [change_id, change_id]
+    else:
+        _local.own_changes[1] = change_id
+
+
+def track_own_changes():
+    """Remember which change_log rows this thread's commits write (see is_own_change).
+
+    A TEMP trigger only fires for the connection that created it, so rows
+    written by other processes are never counted as this one's.
+    """
+    conn = get_connection()
+    conn.create_function('funpass_own_change', 1, _note_own_change)
+    conn.execute('CREATE TEMP TRIGGER IF NOT EXISTS own_change AFTER INSERT ON main.change_log '
+                 'BEGIN SELECT funpass_own_change(NEW.id); END')
+
+
+def is_own_change(change_id):
+    """Return True if change_id was committed by this process after track_own_changes()."""
+    return any(first <= change_id <= last for first, last in _own_changes)
+
+
+# Paging
+
+# to size one page of a paged table
+PAGE_SIZE = 100
+
+
+def page(columns, tables, sort, conditions=(), params=(), after=None, backwards=False,
+         limit=PAGE_SIZE):
+    """Return one page of (values, key) pairs by keyset pagination.
+
+    sort is (key expressions, 'ASC' or 'DESC') from a fixed sort map; its
+    expressions are pasted into the SQL. The page starts right after the row
+    whose key is `after`, or at the top when it is None. backwards reads the
+    rows before `after` instead, nearest first.
+    """
+    keys, direction = sort
+    descending = (direction == 'DESC') != backwards
+    conditions = list(conditions)
+    params = list(params)
+    if after is not None:
+        # to seek with a row-value comparison the sort index can serve; SQLite
+        # only seeks when any COLLATE sits on the parameter side
+        key_columns, values = [], []
+        for key in keys:
+            column, _, collation = key.partition(' COLLATE ')
+            key_columns.append(column)
+            values.append(f'? COLLATE {collation}' if collation else '?')
+        conditions.append(f"({', '.join(key_columns)}) {'<' if descending else '>'} ({', '.join(values)})")
+        params.extend(after)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    order = ', '.join(f"{key} {'DESC' if descending else 'ASC'}" for key in keys)
+    rows = query(f"SELECT {columns}, {', '.join(keys)} FROM {tables}{where} "
+                 f'ORDER BY {order} LIMIT ?', params + [limit])
+    return [(row[:-len(keys)], row[-len(keys):]) for row in rows]
+
+
+# Search
+
+def fts_query(text):
+    """Turn typed search text into an FTS5 query matching every word as a prefix.
+
+    Returns '' when the text has nothing to search for.
+    """
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+# to match words by prefix through the full-text indexes
+CUSTOMER_MATCH = 'c.ticket_id IN (SELECT ticket_id FROM customers_fts WHERE customers_fts MATCH ?)'
+CANCELLATION_MATCH = 'x.id IN (SELECT rowid FROM cancellations_fts WHERE cancellations_fts MATCH ?)'
+
+
+def _pages(columns, tables, sort, conditions, params):
+    def fetch_page(after=None, backwards=False):
+        return page(columns, tables, sort, conditions, params, after, backwards)
+    return fetch_page
+
+
+def customer_pages(columns, sort, search_text='', employee_id=None, tables='customers c'):
+    """Return a PagedTreeview fetch_page for the customers (alias c) matching search_text.
+
+    employee_id limits them to one employee's sales. columns, sort and tables
+    come from the dashboards' fixed maps and are pasted into the SQL.
+    """
+    conditions, params = [], []
+    if employee_id is not None:
+        conditions.append('c.employee_id=?')
+        params.append(employee_id)
+    match = fts_query(search_text)
+    if match:
+        conditions.append(CUSTOMER_MATCH)
+        params.append(match)
+    return _pages(columns, tables, sort, conditions, params)
+
+
+def cancellation_pages(columns, sort, search_text=''):
+    """Return a PagedTreeview fetch_page for the cancellations (alias x) matching search_text."""
+    match = fts_query(search_text)
+    if match:
+        return _pages(columns, 'cancellations x', sort, [CANCELLATION_MATCH], [match])
+    return _pages(columns, 'cancellations x', sort, [], [])
+
+
+# Sales
+
+# every pass type with its display order: the priced ones first, then any
+# added only as a ride
+PASS_TYPE_ORDER_SQL = '''
+    SELECT pass_type, 0 AS source, rowid AS position FROM pricing
+    UNION ALL
+    SELECT pass_type, 1, MIN(ride_id) FROM rides
+    WHERE pass_type NOT IN (SELECT pass_type FROM pricing)
+    GROUP BY pass_type
+'''
+
+
+def pass_types():
+    """Return every pass type that can be allocated and sold."""
+    rows = query(f'SELECT pass_type FROM ({PASS_TYPE_ORDER_SQL}) ORDER BY source, position')
+    return [row[0] for row in rows]
+
+
+class NotEnoughTickets(Exception):
+    """Raised by commit_sale when the seller has fewer tickets left than asked for."""
+
+    def __init__(self, pass_type, available):
+        super().__init__(f"Only {available} {pass_type} tickets left")
+        self.pass_type = pass_type
+        self.available = available
+
+
+def commit_sale(ticket_id, name, email, quantity, amount, booked_date, purchased_date,
+                pass_type, employee_id):
+    """Record a sale if the employee's allocation covers it and return what is left.
+
+    The check and the insert run in one BEGIN IMMEDIATE transaction, so
+    terminals selling from the same allocation are serialized and can never
+    oversell it. Raises NotEnoughTickets when it does not fit.
+    """
+    with transaction(immediate=True) as cursor:
+        cursor.execute(REMAINING_SQL, (employee_id, pass_type))
+        available = cursor.fetchone()[0]
+        if quantity > available:
+            raise NotEnoughTickets(pass_type, max(available, 0))
+        cursor.execute('''
+            INSERT INTO customers (ticket_id, name, email, quantity, amount, booked_date,
+                                   purchased_date, pass_type, employee_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (ticket_id, name, email, quantity, amount, booked_date, purchased_date,
+              pass_type, employee_id))
+    return available - quantity
+
+
+# Prices
+
+# to bound how stale cached prices get after another process changes them
+PRICE_CHECK_SECONDS = 2.0
+
+_prices = {}
+_prices_version = None
+_prices_checked = 0.0
+_prices_lock = threading.Lock()
+
+
+def prices():
+    """Return {pass type: price} from a process-wide cache.
+
+    The cache reloads only when the pricing version moved, and the version
+    is read at most once every PRICE_CHECK_SECONDS, so a lookup is normally
+    a dict read.
+    """
+    global _prices, _prices_version, _prices_checked
+    with _prices_lock:
+        now = time.monotonic()
+        if _prices_version is None or now - _prices_checked >= PRICE_CHECK_SECONDS:
+            version = query_value("SELECT version FROM versions WHERE name = 'pricing'", default=0)
+            if version != _prices_version:
+                _prices = {pass_type: float(price) for pass_type, price in
+                           query('SELECT pass_type, price FROM pricing ORDER BY rowid')}
+                _prices_version = version
+            _prices_checked = now
+        return _prices
+
+
+def price_for(pass_type):
+    return prices().get(pass_type, 0.0)
+
+
+def expire_prices():
+    """Make the next prices() call check the pricing version again."""
+    global _prices_version
+    with _prices_lock:
+        _prices_version = None
+
+
+def bump_price_version(cursor):
+    """Mark prices changed; call in the transaction that writes pricing."""
+    cursor.execute("UPDATE versions SET version = version + 1 WHERE name = 'pricing'")
+    expire_prices()
+
+
+# Availability
+
+Availability = namedtuple('Availability', 'allocation sold remaining')
+
+# what one employee may still sell of one pass type: their allocation left;
+# sold is kept up to date by the customers triggers
+REMAINING_SQL = '''
+    SELECT IFNULL((SELECT allocation - sold FROM employee_allocations
+                   WHERE employee_id = ? AND pass_type = ?), 0)
+'''
+
+AVAILABILITY_SQL = f'''
+    SELECT p.pass_type, IFNULL(a.allocation, 0), IFNULL(a.sold, 0)
+    FROM ({PASS_TYPE_ORDER_SQL}) p
+    LEFT JOIN employee_allocations a ON a.pass_type = p.pass_type AND a.employee_id = ?
+    ORDER BY p.source, p.position
+'''
+
+
+def availability(employee_id):
+    """Return {pass type: Availability(allocation, sold, remaining)} for one employee.
+
+    One query over the maintained employee_allocations counters covers every
+    pass type, so remaining matches what commit_sale allows.
+    """
+    snapshot = {}
+    for pass_type, allocation, sold in query(AVAILABILITY_SQL, (employee_id,)):
+        remaining = max(allocation - sold, 0)
+        snapshot[pass_type] = Availability(allocation, sold, remaining)
+    return snapshot
+
+
+# Sales Rollup
+
+# sales_daily.day range of the current month, a range scan on the day index
+THIS_MONTH = ("day BETWEEN date('now', 'start of month') "
+              "AND date('now', 'start of month', '+1 month', '-1 day')")
+
+
+def top_employees(limit=5):
+    """Return (name, tickets sold, total sales) for the best selling employees."""
+    return query('''
+        SELECT e.name, s.tickets, s.sales
+        FROM employees e
+        LEFT JOIN (
+            SELECT employee_id, SUM(tickets) AS tickets, SUM(sales) AS sales
+            FROM sales_daily
+            GROUP BY employee_id
+        ) s ON s.employee_id = e.employee_id
+        ORDER BY s.sales DESC
+        LIMIT ?
+    ''', (limit,))
+
+
+def recent_sales(employee_id, limit=5):
+    """Return (ticket_id, name, pass_type, quantity, amount, purchased_date) for
+    one employee's latest sales, newest first."""
+    return query('SELECT ticket_id, name, pass_type, quantity, amount, purchased_date FROM customers '
+                 'WHERE employee_id=? ORDER BY purchased_date DESC, ticket_id DESC LIMIT ?',
+                 (employee_id, limit))
+
+
+def employee_pass_sales(employee_id):
+    """Return (pass type, tickets, sales, this month's sales) for one employee,
+    most sold pass first."""
+    return query(f'''
+        SELECT pass_type, SUM(tickets) AS tickets, SUM(sales),
+               SUM(CASE WHEN {THIS_MONTH} THEN sales ELSE 0 END)
+        FROM sales_daily
+        WHERE employee_id = ?
+        GROUP BY pass_type
+        ORDER BY tickets DESC
+    ''', (employee_id,))
+
+
+# Admin Overview
+
+# to bound how old the admin overview may be before it is recomputed
+OVERVIEW_TTL_SECONDS = 5.0
+
+Overview = namedtuple('Overview', 'total_sales total_tickets active_employees pending_refunds '
+                                  'top_employees recent_sales')
+
+OVERVIEW_SQL = '''
+    SELECT (SELECT SUM(sales) FROM sales_daily),
+           (SELECT SUM(tickets) FROM sales_daily),
+           (SELECT COUNT(*) FROM employees),
+           (SELECT COUNT(*) FROM cancellations WHERE status = 'Pending')
+'''
+
+RECENT_SALES_SQL = f'''
+    SELECT c.ticket_id, c.name, c.email, c.pass_type, c.quantity, c.amount,
+           {display_date('c.booked_date')}, {display_date('c.purchased_date')},
+           COALESCE(e.name, 'N/A')
+    FROM customers c
+    LEFT JOIN employees e ON c.employee_id = e.employee_id
+    ORDER BY c.purchased_date DESC, c.ticket_id DESC
+    LIMIT ?
+'''
+
+_overview = None
+_overview_at = 0.0
+_overview_lock = threading.Lock()
+
+
+def overview(limit=5):
+    """Return the admin dashboard's Overview, at most OVERVIEW_TTL_SECONDS old.
+
+    The cards, top employees and recent sales are read in one read
+    transaction, so they describe the same moment. Safe to call from a
+    worker thread.
+    """
+    global _overview, _overview_at
+    with _overview_lock:
+        if _overview is not None and time.monotonic() - _overview_at < OVERVIEW_TTL_SECONDS:
+            return _overview
+        with transaction() as cursor:
+            cursor.execute(OVERVIEW_SQL)
+            total_sales, total_tickets, active_employees, pending_refunds = cursor.fetchone()
+            top = top_employees(limit)
+            recent = query(RECENT_SALES_SQL, (limit,))
+        _overview = Overview(total_sales or 0, total_tickets or 0, active_employees, pending_refunds,
+                             top, recent)
+        _overview_at = time.monotonic()
+        return _overview
+
+
+def expire_overview():
+    """Make the next overview() call read the database again."""
+    global _overview
+    with _overview_lock:
+        _overview = None
+
+
+# Employee Management
+
+def employee_allocations(employee_id):
+    """Return {pass type: allocation} for one employee."""
+    return dict(query('SELECT pass_type, allocation FROM employee_allocations WHERE employee_id = ?',
+                      (employee_id,)))
+
+
+def all_allocations():
+    """Return {employee id: {pass type: allocation}} for every employee."""
+    allocations = {}
+    for employee_id, pass_type, allocation in query(
+            'SELECT employee_id, pass_type, allocation FROM employee_allocations'):
+        allocations.setdefault(employee_id, {})[pass_type] = allocation
+    return allocations
+
+
+def save_allocations(cursor, employee_id, allocations):
+    """Set an employee's allocation per pass type, keeping the sold counters."""
+    cursor.executemany('''
+        INSERT INTO employee_allocations (employee_id, pass_type, allocation)
+        VALUES (?, ?, ?)
+        ON CONFLICT (employee_id, pass_type) DO UPDATE SET allocation = excluded.allocation
+    ''', [(employee_id, pass_type, allocation) for pass_type, allocation in allocations.items()])
+
+
+EMPLOYEES_WITH_MONTHLY_SALES_SQL = f'''
+    SELECT e.*, COALESCE(s.net_sales, 0) AS net_monthly_sales
+    FROM employees e
+    LEFT JOIN (
+        SELECT employee_id, SUM(sales) - SUM(refunds) AS net_sales
+        FROM sales_daily
+        WHERE {THIS_MONTH}
+        GROUP BY employee_id
+    ) s ON s.employee_id = e.employee_id
+'''
+
+
+def employees_with_monthly_sales(order_by='e.name COLLATE NOCASE, e.employee_id'):
+    """Return every employee row with this month's net sales appended.
+
+    Sales and approved refunds come from the sales_daily rollup, one grouped
+    query for all employees. order_by is pasted into the SQL, so it must come
+    from a fixed sort map, never from user input.
+    """
+    return query(f'{EMPLOYEES_WITH_MONTHLY_SALES_SQL} ORDER BY {order_by}')
@@ -1,122 +1,67 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 import sqlite3
+import database as db
+from formatting import display_date, peso
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkcalendar import DateEntry
-import pandas as pd
-from shared import create_database, BaseWindow
-
-# database setup
-def create_database():
-    conn = sqlite3.connect('funpass.db')
-    cursor = conn.cursor()
-
-    # to create admin table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS admin (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL
-        )
-    ''')
-
-    # to insert default admin if not exists
-    cursor.execute('INSERT OR IGNORE INTO admin (username, password) VALUES (?, ?)',
-                  ('admin', 'admin123'))
-
-    # to create employees table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            employee_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            express_pass INTEGER DEFAULT 0,
-            junior_pass INTEGER DEFAULT 0,
-            regular_pass INTEGER DEFAULT 0,
-            student_pass INTEGER DEFAULT 0,
-            pwd_pass INTEGER DEFAULT 0,
-            senior_citizen_pass INTEGER DEFAULT 0
-        )
-    ''')
-
-    # to create customers table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            ticket_id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            booked_date TEXT NOT NULL,
-            purchased_date TEXT NOT NULL,
-            pass_type TEXT NOT NULL,
-            employee_id INTEGER,
-            FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
-        )
-    ''')
-
-    # to create cancellations table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cancellations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_id TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            reasons TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            booked_date TEXT NOT NULL,
-            purchased_date TEXT NOT NULL,
-            status TEXT DEFAULT 'Pending',
-            FOREIGN KEY (ticket_id) REFERENCES customers (ticket_id)
-        )
-    ''')
-
-    # to create pricing table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pricing (
-            pass_type TEXT PRIMARY KEY,
-            price REAL NOT NULL
-        )
-    ''')
-
-    # to insert or update default prices
-    default_prices = [
-        ('Express Pass', 2300.00),
-        ('Junior Pass', 900.00),
-        ('Regular Pass', 1300.00),
-        ('Student Pass', 1300.00),
-        ('Senior Citizen Pass', 900.00),
-        ('PWD Pass', 900.00)
-    ]
-    
-    cursor.executemany('''
-        INSERT OR REPLACE INTO pricing (pass_type, price)
-        VALUES (?, ?)
-    ''', default_prices)
-
-    conn.commit()
-    conn.close()
+from funpass.core import (SalesService, InventoryService, PricingService, CancellationService,
+                           ValidationError)
+from shared import create_database, BaseWindow, DebouncedSearch, PagedTreeview, ChangeBus, ViewModel, ScreenManager
 
 class EmployeeDashboard:
+    # Sort options mapped to whitelisted (sort key, direction) pairs, each backed by an index
+    CUSTOMER_SORTS = {
+        "Name (A-Z)": (("c.name COLLATE NOCASE", "c.ticket_id"), "ASC"),
+        "Name (Z-A)": (("c.name COLLATE NOCASE", "c.ticket_id"), "DESC"),
+        "Date (Newest)": (("c.purchased_date", "c.ticket_id"), "DESC"),
+        "Date (Oldest)": (("c.purchased_date", "c.ticket_id"), "ASC")
+    }
+    CANCELLATION_SORTS = {
+        "Name (A-Z)": (("x.name COLLATE NOCASE", "x.id"), "ASC"),
+        "Name (Z-A)": (("x.name COLLATE NOCASE", "x.id"), "DESC"),
+        "Date (Newest)": (("x.purchased_date", "x.id"), "DESC"),
+        "Date (Oldest)": (("x.purchased_date", "x.id"), "ASC")
+    }
+    # Table columns in display order, dates formatted by SQLite
+    CUSTOMER_COLUMNS = f'''c.ticket_id, c.name, c.email, c.quantity, c.amount,
+        {display_date('c.booked_date')} as booked_date,
+        {display_date('c.purchased_date')} as purchased_date,
+        c.pass_type'''
+    CANCELLATION_COLUMNS = f'''x.ticket_id, x.name, x.email, x.reasons, x.quantity,
+        x.amount, x.pass_type,
+        {display_date('x.booked_date')} as booked_date,
+        {display_date('x.purchased_date')} as purchased_date,
+        x.status'''
+    # Rebuild the dashboard on a visit once it is this many seconds old
+    DASHBOARD_MAX_AGE = 30
+
     def __init__(self, root, employee_id=1):
         self.root = root
         self.employee_id = employee_id
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.search_customers)
+        self.customer_sort = "Name (A-Z)"
+        self.cancellation_sort = "Name (A-Z)"
         self.current_price_frame = None
 
-        # Initialize price cache
-        self._price_cache = {}
-        # Bind to price update event at root level
-        print("Binding to price update event")  # Debug print
-        self.root.bind('<<PriceUpdate>>', self.refresh_prices, add="+")
-        
+        # Business rules live in the core services; this class only shows them
+        self.sales = SalesService(employee_id)
+        self.inventory = InventoryService()
+        self.pricing = PricingService()
+        self.cancellation_requests = CancellationService()
+
+        # Values shown on screen, keyed by ('price' or 'available', pass type)
+        self.view = ViewModel()
+        self.publish_prices()
+
         self.setup_ui()
 
+        # Listen for changes made by this and every other terminal
+        self.changes = ChangeBus(self.root)
+        self.changes.subscribe('pricing', self.refresh_prices)
+        self.changes.subscribe('allocations', self.refresh_sales)
+        self.changes.subscribe('customers', self.refresh_sales)
+        self.changes.subscribe('cancellations', self.refresh_cancellations)
+
     def setup_ui(self):
         self.root.title("FunPass - Employee Dashboard")
         self.root.state('zoomed')
@@ -125,13 +70,18 @@ class EmployeeDashboard:
         self.create_sidebar()
         self.content_frame = tk.Frame(self.root, bg='white')
         self.content_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
+        # Build every page once and raise it on later visits
+        self.screens = ScreenManager(self.content_frame, 'employee.')
         self.show_dashboard()
+        self.update_time()
 
     def create_sidebar(self):
         sidebar = tk.Frame(self.root, bg='#ECCD93', width=350)
         sidebar.grid(row=0, column=0, sticky="ns")
         sidebar.grid_propagate(False)
         try:
+            # Load PIL only when a logo is drawn, not at startup
+            from PIL import Image, ImageTk
             logo_path = "FunPass__1_-removebg-preview.png"
             logo_img = Image.open(logo_path)
             logo_width = 220
@@ -159,19 +109,18 @@ class EmployeeDashboard:
             btn.bind('<Enter>', lambda e, btn=btn: btn.configure(bg='#ECCD93'))
             btn.bind('<Leave>', lambda e, btn=btn: btn.configure(bg='#ECCD93'))
 
-    def clear_content(self):
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-
     def show_dashboard(self):
-        self.clear_content()
-        dashboard_title = tk.Label(self.content_frame, text="Dashboard", font=('Arial', 18, 'bold'), bg='white', anchor='w')
+        # Rebuild the overview when it is older than DASHBOARD_MAX_AGE
+        self.screens.show('dashboard', self.build_dashboard, max_age=self.DASHBOARD_MAX_AGE)
+
+    def build_dashboard(self, frame):
+        dashboard_title = tk.Label(frame, text="Dashboard", font=('Arial', 18, 'bold'), bg='white', anchor='w')
         dashboard_title.pack(pady=(10, 0), padx=20, anchor='w')
-        dashboard_subtitle = tk.Label(self.content_frame, text="Your Sales and Ticket Overview", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        dashboard_subtitle = tk.Label(frame, text="Your Sales and Ticket Overview", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         dashboard_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
         # Top bar with date and time
-        top_bar = tk.Frame(self.content_frame, bg='white')
+        top_bar = tk.Frame(frame, bg='white')
         top_bar.pack(fill=tk.X, pady=10)
         time_frame = tk.Frame(top_bar, bg='white', relief='solid', bd=1)
         time_frame.pack(side=tk.RIGHT, padx=20, pady=5)
@@ -179,46 +128,22 @@ class EmployeeDashboard:
         self.date_label.pack(side=tk.LEFT, padx=10)
         self.time_label = tk.Label(time_frame, font=('Arial', 12), bg='white')
         self.time_label.pack(side=tk.LEFT, padx=10)
-        self.update_time()
 
         # Stats
-        stats_frame = tk.LabelFrame(self.content_frame, text="Overview", bg='white', font=('Arial', 12, 'bold'))
+        stats_frame = tk.LabelFrame(frame, text="Overview", bg='white', font=('Arial', 12, 'bold'))
         stats_frame.pack(fill=tk.X, pady=10, padx=5)
         for i in range(2):
             stats_frame.grid_columnconfigure(i, weight=1)
 
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        
-        # Total all-time sales for this employee
-        cursor.execute('SELECT SUM(amount) FROM customers WHERE employee_id=?', (self.employee_id,))
-        total_sales = cursor.fetchone()[0] or 0
-        
-        # Total this month's sales for this employee
-        cursor.execute('''
-            SELECT SUM(amount) 
-            FROM customers 
-            WHERE employee_id=? 
-            AND strftime('%Y-%m', purchased_date) = strftime('%Y-%m', 'now')
-        ''', (self.employee_id,))
-        monthly_sales = cursor.fetchone()[0] or 0
-        
-        # Total tickets sold for this employee
-        cursor.execute('SELECT SUM(quantity) FROM customers WHERE employee_id=?', (self.employee_id,))
-        total_tickets = cursor.fetchone()[0] or 0
-        
+        # to read all four figures from the sales rollup, one row per pass type
+        pass_sales = db.employee_pass_sales(self.employee_id)
+        total_sales = sum(row[2] for row in pass_sales)
+        monthly_sales = sum(row[3] for row in pass_sales)
+        total_tickets = sum(row[1] for row in pass_sales)
+
         # Get most popular passes (all-time)
-        cursor.execute('''
-            SELECT 
-                pass_type, 
-                SUM(quantity) as total_qty
-            FROM customers 
-            WHERE employee_id=? 
-            GROUP BY pass_type
-            ORDER BY total_qty DESC
-        ''', (self.employee_id,))
-        popular_passes = cursor.fetchall()
-        
+        popular_passes = [row[:2] for row in pass_sales if row[1] > 0]
+
         if popular_passes and len(popular_passes) > 0:
             # Get the top pass
             top_pass = popular_passes[0]
@@ -226,11 +151,10 @@ class EmployeeDashboard:
         else:
             popular_ticket_text = "No passes\nsold yet"
         
-        conn.close()
 
         stats_data = [
-            ("Total Sales", f"₱{total_sales:,.2f}", "#2196F3"),
-            ("This Month's Sales", f"₱{monthly_sales:,.2f}", "#009688"),
+            ("Total Sales", peso(total_sales), "#2196F3"),
+            ("This Month's Sales", peso(monthly_sales), "#009688"),
             ("Total Tickets Sold", f"{int(total_tickets) if total_tickets else 0}", "#FF9800"),
             ("Most Popular Pass", popular_ticket_text, "#673AB7")
         ]
@@ -252,99 +176,18 @@ class EmployeeDashboard:
                         fg=color, bg='white').pack(pady=2)
 
         # Styled Total Availability
-        availability_frame = tk.LabelFrame(self.content_frame, text="Total Availability", bg='white', font=('Arial', 12, 'bold'))
+        availability_frame = tk.LabelFrame(frame, text="Total Availability", bg='white', font=('Arial', 12, 'bold'))
         availability_frame.pack(fill=tk.X, pady=10, padx=5)
 
         # Create frame for availability list
-        avail_frame = tk.Frame(availability_frame, bg='white', relief='solid', bd=1)
-        avail_frame.pack(fill=tk.X, padx=10, pady=5)
-
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-
-        # Initialize total availability for all pass types to 0
-        total_availability = {
-            'Express Pass': 0,
-            'Junior Pass': 0,
-            'Regular Pass': 0,
-            'Student Pass': 0,
-            'Senior Citizen Pass': 0,
-            'PWD Pass': 0
-        }
-
-        # Get total allocated tickets for all employees
-        cursor.execute('''
-            SELECT 
-                SUM(express_pass) as express_total,
-                SUM(junior_pass) as junior_total,
-                SUM(regular_pass) as regular_total,
-                SUM(student_pass) as student_total,
-                SUM(senior_citizen_pass) as senior_total,
-                SUM(pwd_pass) as pwd_total
-            FROM employees
-        ''')
-        allocated = cursor.fetchone()
-
-        # Get employee's allocation and sold tickets
-        cursor.execute('''
-            SELECT 
-                express_pass, junior_pass, regular_pass, 
-                student_pass, senior_citizen_pass, pwd_pass
-            FROM employees 
-            WHERE employee_id = ?
-        ''', (self.employee_id,))
-        allocated = cursor.fetchone()
-
-        # Define pass types
-        pass_types = ['Express Pass', 'Junior Pass', 'Regular Pass', 'Student Pass', 'Senior Citizen Pass', 'PWD Pass']
-        
-        # Get sold tickets for this employee
-        sold_tickets = {}
-        for pass_type in pass_types:
-            cursor.execute('SELECT SUM(quantity) FROM customers WHERE pass_type=? AND employee_id=?', 
-                         (pass_type, self.employee_id))
-            sold = cursor.fetchone()[0] or 0
-            sold_tickets[pass_type] = int(sold)
-
-        # Map pass types to their allocations
-        pass_data = [
-            ('A', 'Express Pass', int(allocated[0] or 0), sold_tickets['Express Pass']),
-            ('B', 'Junior Pass', int(allocated[1] or 0), sold_tickets['Junior Pass']),
-            ('C', 'Regular Pass', int(allocated[2] or 0), sold_tickets['Regular Pass']),
-            ('D', 'Student Pass', int(allocated[3] or 0), sold_tickets['Student Pass']),
-            ('E', 'Senior Citizen Pass', int(allocated[4] or 0), sold_tickets['Senior Citizen Pass']),
-            ('F', 'PWD Pass', int(allocated[5] or 0), sold_tickets['PWD Pass'])
-        ]
-        
-        for letter, pass_type, total_allocated, sold in pass_data:
-            # Calculate available tickets (allocated minus sold)
-            available = total_allocated - sold
-
-            # Create row for this pass type
-            row_frame = tk.Frame(avail_frame, bg='white')
-            row_frame.pack(fill=tk.X, pady=2)
-            
-            # Display in simple format: A. Express Pass: [available]
-            label_text = f"{letter}. {pass_type}: {available}"
-            tk.Label(
-                row_frame, 
-                text=label_text, 
-                font=('Arial', 11), 
-                bg='white', 
-                anchor='w',
-                fg='#2196F3'
-            ).pack(side=tk.LEFT, padx=15, pady=2)
-
-        conn.close()
+        self.avail_frame = tk.Frame(availability_frame, bg='white', relief='solid', bd=1)
+        self.avail_frame.pack(fill=tk.X, padx=10, pady=5)
+        self.fill_availability()
 
         # Recent Sales Table section
-        recent_frame = tk.LabelFrame(self.content_frame, text="Recent Sales", bg='white', font=('Arial', 12, 'bold'))
+        recent_frame = tk.LabelFrame(frame, text="Recent Sales", bg='white', font=('Arial', 12, 'bold'))
         recent_frame.pack(fill=tk.X, pady=10, padx=5)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''SELECT ticket_id, name, pass_type, quantity, amount, purchased_date FROM customers WHERE employee_id=? ORDER BY purchased_date DESC, rowid DESC LIMIT 5''', (self.employee_id,))
-        recents = cursor.fetchall()
-        conn.close()
+        recents = db.recent_sales(self.employee_id)
         # Table headers
         header_row = tk.Frame(recent_frame, bg='white')
         header_row.pack(fill=tk.X, pady=(0, 2))
@@ -360,11 +203,63 @@ class EmployeeDashboard:
                 tk.Label(row, text=name, font=('Arial', 11), bg='white', width=18, anchor='w').pack(side=tk.LEFT, padx=5)
                 tk.Label(row, text=pass_type, font=('Arial', 11), bg='white', width=12, anchor='w').pack(side=tk.LEFT, padx=5)
                 tk.Label(row, text=quantity, font=('Arial', 11), bg='white', width=5, anchor='w').pack(side=tk.LEFT, padx=5)
-                tk.Label(row, text=f"₱{amount:,.2f}", font=('Arial', 11), bg='white', width=10, anchor='w').pack(side=tk.LEFT, padx=5)
+                tk.Label(row, text=peso(amount), font=('Arial', 11), bg='white', width=10, anchor='w').pack(side=tk.LEFT, padx=5)
                 tk.Label(row, text=purchased_date, font=('Arial', 11), bg='white', width=12, anchor='w').pack(side=tk.LEFT, padx=5)
         else:
             tk.Label(recent_frame, text="No sales yet.", font=('Arial', 11, 'italic'), fg='#6b7280', bg='white', anchor='w').pack(anchor='w', padx=10, pady=2)
 
+    def fill_availability(self):
+        # Clear the previous availability rows
+        for widget in self.avail_frame.winfo_children():
+            widget.destroy()
+
+        # Get allocation, sold and remaining tickets for every pass type at once
+        self.publish_availability()
+
+        for index, pass_type in enumerate(self.inventory.pass_types()):
+            letter = chr(ord('A') + index)
+            available = self.view.get(('available', pass_type), 0)
+
+            # Create row for this pass type
+            row_frame = tk.Frame(self.avail_frame, bg='white')
+            row_frame.pack(fill=tk.X, pady=2)
+            
+            # Display in simple format: A. Express Pass: [available]
+            label_text = f"{letter}. {pass_type}: {available}"
+            label = tk.Label(
+                row_frame, 
+                text=label_text, 
+                font=('Arial', 11), 
+                bg='white', 
+                anchor='w',
+                fg='#2196F3'
+            )
+            label.pack(side=tk.LEFT, padx=15, pady=2)
+
+            # Update just this label when its pass type's availability changes
+            def show_available(available, label=label, prefix=f"{letter}. {pass_type}"):
+                label.config(text=f"{prefix}: {available}")
+            self.view.subscribe([('available', pass_type)], show_available, label)
+
+    def publish_availability(self):
+        for pass_type, pass_availability in self.inventory.availability(self.employee_id).items():
+            self.view.set(('available', pass_type), pass_availability.remaining)
+
+    def publish_prices(self):
+        for pass_type, price in self.pricing.prices().items():
+            self.view.set(('price', pass_type), price)
+
+    def refresh_sales(self, keys=None, own=False):
+        # Only this employee's sales and allocation change what is shown
+        if keys is not None and self.employee_id not in keys:
+            return
+        self.publish_availability()
+        # A sale made here has already redrawn the customers table
+        self.screens.invalidate('customers', keep_shown=own)
+
+    def refresh_cancellations(self, keys=None, own=False):
+        self.screens.invalidate('cancellations', keep_shown=own)
+
     def update_time(self):
         try:
             current = datetime.now()
@@ -378,9 +273,12 @@ class EmployeeDashboard:
             print(f"Error updating time: {e}")
 
     def show_rides(self):
-        self.clear_content()
+        # Static pass descriptions, built once
+        self.screens.show('rides', self.build_rides)
+
+    def build_rides(self, frame):
         # to create main frame for rides
-        rides_frame = tk.Frame(self.content_frame, bg='white')
+        rides_frame = tk.Frame(frame, bg='white')
         rides_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
         # to create title frame
@@ -440,13 +338,16 @@ class EmployeeDashboard:
         scrollbar.pack(side="right", fill="y")
 
     def show_customers(self):
-        self.clear_content()
-        customer_title = tk.Label(self.content_frame, text="Customers", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        # Raise the cached page and reload its rows when they went stale
+        self.screens.show('customers', self.build_customers, refresh=lambda: self.customers_table.reload())
+
+    def build_customers(self, frame):
+        customer_title = tk.Label(frame, text="Customers", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         customer_title.pack(pady=(10, 0), padx=20, anchor='w')
-        customer_subtitle = tk.Label(self.content_frame, text="View, Add, Edit, and Delete Customers", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        customer_subtitle = tk.Label(frame, text="View, Add, Edit, and Delete Customers", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         customer_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
-        controls_frame = tk.Frame(self.content_frame, bg='white')
+        controls_frame = tk.Frame(frame, bg='white')
         controls_frame.pack(fill=tk.X, pady=10)
 
         search_frame = tk.Frame(controls_frame, bg='white')
@@ -461,7 +362,7 @@ class EmployeeDashboard:
         tk.Label(sort_frame, text="Sort by:", bg='white').pack(side=tk.LEFT, padx=5)
         sort_options = ttk.Combobox(sort_frame, values=["Name (A-Z)", "Name (Z-A)", "Date (Newest)", "Date (Oldest)"], width=15)
         sort_options.pack(side=tk.LEFT, padx=5)
-        sort_options.set("Name (A-Z)")
+        sort_options.set(self.customer_sort)
         sort_options.bind('<<ComboboxSelected>>', lambda e: self.sort_customers(sort_options.get()))
 
         # Buttons for add, edit, delete
@@ -473,16 +374,18 @@ class EmployeeDashboard:
         tk.Button(btn_frame, text="View Receipt", command=self.view_receipt, bg="#D0A011", fg='white').pack(side=tk.LEFT, padx=5)
 
         columns = ('Ticket ID', 'Name', 'Email', 'Quantity', 'Amount', 'Booked Date', 'Purchased Date', 'Pass Type')
-        self.customers_tree = ttk.Treeview(self.content_frame, columns=columns, show='headings')
+        self.customers_tree = ttk.Treeview(frame, columns=columns, show='headings')
         for col in columns:
             self.customers_tree.heading(col, text=col)
             self.customers_tree.column(col, width=120)
         self.customers_tree.pack(fill=tk.BOTH, expand=True, pady=10)
 
-        scrollbar = ttk.Scrollbar(self.content_frame, orient=tk.VERTICAL, command=self.customers_tree.yview)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.customers_tree.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.customers_tree.configure(yscrollcommand=scrollbar.set)
-        sort_options.bind('<<ComboboxSelected>>', lambda e: self.sort_customers(sort_options.get()))
+        # Fetch customers a page at a time as the table scrolls
+        self.customers_table = PagedTreeview(self.customers_tree, scrollbar)
+        # Search in the background as the user types
+        DebouncedSearch(self.customers_tree, self.search_var, self.search_customers, self.show_customer_matches)
         self.load_customers_data()
 
         def clear_customers_selection(event):
@@ -497,137 +400,28 @@ class EmployeeDashboard:
 
         self.customers_tree.bind("<Button-1>", clear_selection_on_click, add="+")
 
-    def search_customers(self, *args):
-        search_text = self.search_var.get().lower()
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT ticket_id, name, email, quantity, amount, 
-                   strftime('%Y-%m-%d', booked_date) as booked_date,
-                   strftime('%Y-%m-%d', purchased_date) as purchased_date,
-                   pass_type 
-            FROM customers 
-            WHERE employee_id=?
-        ''', (self.employee_id,))
-        customers = cursor.fetchall()
-        conn.close()
-
-        for customer in customers:
-            # Convert tuple to list for modification
-            data = list(customer)
-            
-            # Format dates
-            try:
-                if data[5]:  # booked_date
-                    date_obj = datetime.strptime(data[5], '%Y-%m-%d')
-                    data[5] = date_obj.strftime('%m-%d-%Y')
-                if data[6]:  # purchased_date
-                    date_obj = datetime.strptime(data[6], '%Y-%m-%d')
-                    data[6] = date_obj.strftime('%m-%d-%Y')
-            except ValueError:
-                pass
+    def customer_pages(self, search_text):
+        """Return a fetch_page for this employee's customers matching search_text."""
+        sort = self.CUSTOMER_SORTS.get(self.customer_sort, self.CUSTOMER_SORTS["Name (A-Z)"])
+        # Dates come back formatted, so rows go to the table as they are
+        return db.customer_pages(self.CUSTOMER_COLUMNS, sort, search_text, self.employee_id)
+
+    def search_customers(self, search_text):
+        # Runs on the search worker, which also fetches the first page
+        fetch_page = self.customer_pages(search_text)
+        return fetch_page, fetch_page()
 
-            if any(search_text in str(value).lower() for value in data):
-                self.customers_tree.insert('', tk.END, values=data)
+    def show_customer_matches(self, result):
+        self.customers_table.show(*result)
 
     def sort_customers(self, sort_option):
-        items = []
-        for item in self.customers_tree.get_children():
-            values = self.customers_tree.item(item)['values']
-            items.append(values)
-        if sort_option == "Name (A-Z)":
-            items.sort(key=lambda x: x[1])
-        elif sort_option == "Name (Z-A)":
-            items.sort(key=lambda x: x[1], reverse=True)
-        elif sort_option == "Date (Newest)":
-            items.sort(key=lambda x: x[6], reverse=True)
-        elif sort_option == "Date (Oldest)":
-            items.sort(key=lambda x: x[6])
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        for item in items:
-            self.customers_tree.insert('', tk.END, values=item)
+        # Let the database sort, then reload the table from the top
+        self.customer_sort = sort_option
+        self.load_customers_data()
 
     def load_customers_data(self):
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT ticket_id, name, email, quantity, amount, 
-                   strftime('%Y-%m-%d', booked_date) as booked_date,
-                   strftime('%Y-%m-%d', purchased_date) as purchased_date,
-                   pass_type 
-            FROM customers 
-            WHERE employee_id=?
-        ''', (self.employee_id,))
-        customers = cursor.fetchall()
-        conn.close()
-
-        for customer in customers:
-            # Convert tuple to list for modification
-            data = list(customer)
-            
-            # Format booked_date (index 5)
-            try:
-                if data[5]:
-                    date_obj = datetime.strptime(data[5], '%Y-%m-%d')
-                    data[5] = date_obj.strftime('%m-%d-%Y')
-            except ValueError:
-                pass
-
-            # Format purchased_date (index 6)
-            try:
-                if data[6]:
-                    date_obj = datetime.strptime(data[6], '%Y-%m-%d')
-                    data[6] = date_obj.strftime('%m-%d-%Y')
-            except ValueError:
-                pass
-
-            self.customers_tree.insert('', tk.END, values=data)
-
-    def get_availability_for_pass(self, pass_type):
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        
-        # Get total tickets sold
-        cursor.execute('SELECT SUM(quantity) FROM customers WHERE pass_type=?', (pass_type,))
-        sold = cursor.fetchone()[0] or 0
-        total_available = 1000 - sold
-        
-        # Get employee's allocation
-        cursor.execute('''
-            SELECT 
-                CASE 
-                    WHEN pass_type = 'Express Pass' THEN express_pass
-                    WHEN pass_type = 'Junior Pass' THEN junior_pass
-                    WHEN pass_type = 'Regular Pass' THEN regular_pass
-                    WHEN pass_type = 'Student Pass' THEN student_pass
-                    WHEN pass_type = 'PWD Pass' THEN pwd_pass
-                    WHEN pass_type = 'Senior Citizen Pass' THEN senior_citizen_pass
-                END
-            FROM employees 
-            WHERE employee_id = ?
-        ''', (self.employee_id,))
-        allocation = cursor.fetchone()[0] or 0
-        
-        # Get tickets already sold by this employee for this pass type
-        cursor.execute('''
-            SELECT SUM(quantity) 
-            FROM customers 
-            WHERE pass_type = ? AND employee_id = ?
-        ''', (pass_type, self.employee_id))
-        employee_sold = cursor.fetchone()[0] or 0
-        
-        # Employee's remaining allocation
-        employee_available = allocation - employee_sold
-        
-        conn.close()
-        
-        # Return the lower of total availability and employee's remaining allocation
-        return min(total_available, employee_available)
+        # Show the first page of customers matching the search box
+        self.customers_table.show(self.customer_pages(self.search_var.get()))
 
     def compute_amount(self, pass_type_combo, quantity_entry, amount_var):
         try:
@@ -671,6 +465,18 @@ class EmployeeDashboard:
         if pass_types:
             pass_type_combo.set(pass_types[0])  # Set default to "Express Pass"
 
+        # Tickets this employee can still sell, kept current while the dialog is open
+        self.publish_availability()
+        available_label = tk.Label(main_frame, font=('Arial', 10), fg='#6b7280', bg='white')
+        available_label.pack(anchor='w', pady=(0, 10))
+
+        def update_available(*args):
+            remaining = self.view.get(('available', pass_type_combo.get()), 0)
+            available_label.config(text=f"Available: {remaining}")
+
+        update_available()
+        self.view.subscribe([('available', pass_type) for pass_type in pass_types], update_available, available_label)
+
         # Quantity
         tk.Label(main_frame, text="Quantity:", font=('Arial', 11), bg='white').pack(anchor='w')
         quantity_entry = tk.Entry(main_frame, font=('Arial', 11))
@@ -696,10 +502,14 @@ class EmployeeDashboard:
                 amount_var.set("₱0.00")
 
         # Bind the update function to both pass type and quantity changes
-        pass_type_combo.bind('<<ComboboxSelected>>', update_amount)
+        pass_type_combo.bind('<<ComboboxSelected>>', lambda e: (update_amount(), update_available()))
         quantity_entry.bind('<KeyRelease>', update_amount)
+        # Recompute the amount when a price changes while the dialog is open
+        self.view.subscribe([('price', pass_type) for pass_type in pass_types], update_amount, dialog)
         
         tk.Label(main_frame, text="Booked Date:", font=('Arial', 11), bg='white').pack(anchor='w')
+        # Import the calendar widget only when a dialog needs it
+        from tkcalendar import DateEntry
         booked_date_entry = DateEntry(main_frame, font=('Arial', 11), width=18, date_pattern='yyyy-MM-dd')
         booked_date_entry.pack(fill=tk.X, pady=(0, 10))
         purchased_date = datetime.now().strftime('%Y-%m-%d')
@@ -709,78 +519,27 @@ class EmployeeDashboard:
         purchased_date_label.pack(fill=tk.X, pady=(0, 10))
 
         def save_customer():
-            name = name_entry.get().strip()
-            email = email_entry.get().strip()
-            quantity = quantity_entry.get().strip()
-            pass_type = pass_type_combo.get().strip()
-            amount = amount_var.get().replace('₱', '').replace(',', '')
-            booked_date = booked_date_entry.get()
-
-            if not (name and quantity and pass_type and amount and booked_date):
-                messagebox.showerror("Error", "Name, Quantity, Pass Type, Amount, and Booked Date are required!")
-                return
-
             try:
-                quantity = int(quantity)
-                if quantity <= 0:
-                    messagebox.showerror("Error", "Quantity must be greater than 0!")
-                    return
-
-                # Check ticket availability
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                
-                # Get employee's allocation
-                cursor.execute('''
-
-                    SELECT 
-                        CASE 
-                            WHEN ? = 'Express Pass' THEN express_pass
-                            WHEN ? = 'Junior Pass' THEN junior_pass
-                            WHEN ? = 'Regular Pass' THEN regular_pass
-                            WHEN ? = 'Student Pass' THEN student_pass
-                            WHEN ? = 'PWD Pass' THEN pwd_pass
-                            WHEN ? = 'Senior Citizen Pass' THEN senior_citizen_pass
-                        END
-                    FROM employees 
-                    WHERE employee_id = ?
-                ''', (pass_type, pass_type, pass_type, pass_type, pass_type, pass_type, self.employee_id))
-                
-                allocation = cursor.fetchone()[0] or 0
-
-                # Get tickets already sold by this employee
-                cursor.execute('''
-
-                    SELECT SUM(quantity) 
-                    FROM customers 
-                    WHERE pass_type = ? AND employee_id = ?
-                ''', (pass_type, self.employee_id))
-                
-                sold = cursor.fetchone()[0] or 0
-                available = allocation - sold
-
-                if quantity > available:
-                    messagebox.showerror("Error", 
-                        f"Not enough tickets available!\nYou can only sell {available} more {pass_type} tickets.")
-                    conn.close()
-                    return
-
-                # If validation passes, proceed with saving
-                cursor.execute('''INSERT INTO customers 
-                                (ticket_id, name, email, quantity, amount, booked_date, purchased_date, pass_type, employee_id) 
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                             (ticket_id, name, email, quantity, float(amount), booked_date, purchased_date, 
-                              pass_type, self.employee_id))
-                conn.commit()
-                conn.close()
-                dialog.destroy()
-                self.load_customers_data()
-                self.print_ticket(ticket_id, name, email, quantity, amount, booked_date, purchased_date, pass_type)
-                messagebox.showinfo("Success", "Customer added and ticket printed!")
-            except ValueError:
-                messagebox.showerror("Error", "Invalid quantity or amount!")
+                # Check the allocation and save in one locked transaction
+                sale = self.sales.sell(name_entry.get(), email_entry.get(), pass_type_combo.get(),
+                                       quantity_entry.get().strip(),
+                                       booked_date_entry.get_date().strftime('%Y-%m-%d'),
+                                       purchased_date, ticket_id)
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            except db.NotEnoughTickets as e:
+                messagebox.showerror("Error", 
+                    f"Not enough tickets available!\nYou can only sell {e.available} more {e.pass_type} tickets.")
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
+                return
+
+            dialog.destroy()
+            self.load_customers_data()
+            self.print_ticket(*sale[:8])
+            messagebox.showinfo("Success", "Customer added and ticket printed!")
 
         tk.Button(main_frame, text="Save", command=save_customer, bg='#4CAF50', fg='white').pack(pady=10)
         tk.Button(main_frame, text="Cancel", command=dialog.destroy, bg='#f44336', fg='white').pack()
@@ -838,6 +597,7 @@ class EmployeeDashboard:
 
         # Booked Date
         tk.Label(main_frame, text="Booked Date:", font=('Arial', 11), bg='white').pack(anchor='w')
+        from tkcalendar import DateEntry
         booked_date_entry = DateEntry(main_frame, font=('Arial', 11), width=18, date_pattern='MM/dd/yyyy')
         try:
             date_obj = datetime.strptime(values[5], '%m/%d/%Y')
@@ -870,15 +630,10 @@ class EmployeeDashboard:
         # Bind the update function to both pass type and quantity changes
         pass_type_combo.bind('<<ComboboxSelected>>', update_amount)
         quantity_entry.bind('<KeyRelease>', update_amount)
+        # Recompute the amount when a price changes while the dialog is open
+        self.view.subscribe([('price', pass_type) for pass_type in self.get_pass_types()], update_amount, dialog)
 
         def save_edit():
-            # Get values from the entries
-            name = name_var.get().strip()
-            email = email_var.get().strip()
-            quantity = quantity_var.get().strip()
-            amount = amount_var.get().strip()
-            pass_type = pass_type_var.get().strip()
-            
             try:
                 booked_date = booked_date_entry.get_date().strftime('%Y-%m-%d')
                 purchased_date = purchased_date_entry.get_date().strftime('%Y-%m-%d')
@@ -886,28 +641,23 @@ class EmployeeDashboard:
                 messagebox.showerror("Error", "Invalid date format!")
                 return
 
-            # Validate fields
-            if not all([name, quantity, amount, pass_type, booked_date, purchased_date]):
-                messagebox.showerror("Error", "Name, Quantity, Amount, Pass Type, Booked Date, and Purchased Date are required!")
-                return
-
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE customers 
-                    SET name=?, email=?, quantity=?, amount=?, 
-                        booked_date=?, purchased_date=?, pass_type=?
-                    WHERE ticket_id=?
-                ''', (name, email, int(quantity), float(amount), 
-                     booked_date, purchased_date, pass_type, ticket_id_var.get()))
-                conn.commit()
-                conn.close()
-                dialog.destroy()
-                self.load_customers_data()
-                messagebox.showinfo("Success", "Customer updated successfully!")
+                self.sales.update(ticket_id_var.get(), name_var.get(), email_var.get(),
+                                  quantity_var.get().strip(), amount_var.get().strip(),
+                                  booked_date, purchased_date, pass_type_var.get())
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
+                return
+            except db.NotEnoughTickets as e:
+                messagebox.showerror("Error", 
+                    f"Not enough tickets available!\nYou can only sell {e.available} more {e.pass_type} tickets.")
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
+                return
+            dialog.destroy()
+            self.load_customers_data()
+            messagebox.showinfo("Success", "Customer updated successfully!")
 
         # Button frame for Save and Cancel
         button_frame = tk.Frame(main_frame, bg='white')
@@ -931,11 +681,7 @@ class EmployeeDashboard:
         values = self.customers_tree.item(selected[0])['values']
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this customer?"):
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM customers WHERE ticket_id=? AND employee_id=?', (values[0], self.employee_id))
-                conn.commit()
-                conn.close()
+                self.sales.delete(values[0])
                 self.load_customers_data()
                 messagebox.showinfo("Success", "Customer deleted!")
             except Exception as e:
@@ -952,24 +698,14 @@ class EmployeeDashboard:
             self.print_ticket(ticket_id, name, email, quantity, amount, booked_date, purchased_date, pass_type)
 
     def generate_ticket_id(self):
-        import random, string
-        return 'F' + ''.join(random.choices(string.ascii_uppercase + string.digits, k=5))
+        return self.sales.new_ticket_id()
 
     def get_pass_types(self):
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT pass_type FROM pricing')
-        pass_types = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return pass_types
+        # Only priced pass types can be sold
+        return list(self.pricing.prices())
 
     def get_price_for_pass(self, pass_type):
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT price FROM pricing WHERE pass_type=?', (pass_type,))
-        row = cursor.fetchone()
-        conn.close()
-        return float(row[0]) if row else 0.0
+        return self.pricing.price_for(pass_type)
 
     def print_ticket(self, ticket_id, name, email, quantity, amount, booked_date, purchased_date, pass_type):
         print_win = tk.Toplevel(self.root)
@@ -993,6 +729,8 @@ class EmployeeDashboard:
 
         # Logo
         try:
+            # Load PIL only when a logo is drawn, not at startup
+            from PIL import Image, ImageTk
             logo_path = "FunPass__1_-removebg-preview.png"
             logo_img = Image.open(logo_path)
             logo_width = 90
@@ -1052,14 +790,17 @@ class EmployeeDashboard:
 
         tk.Button(main_frame, text="Close", command=print_win.destroy, bg='white', font=('Arial', 10), relief='groove').pack(pady=8)
     def show_cancellations(self):
-        self.clear_content()
-        cancel_title = tk.Label(self.content_frame, text="Cancellations & Refunds", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        # Raise the cached page and reload its rows when they went stale
+        self.screens.show('cancellations', self.build_cancellations, refresh=lambda: self.cancellations_table.reload())
+
+    def build_cancellations(self, frame):
+        cancel_title = tk.Label(frame, text="Cancellations & Refunds", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         cancel_title.pack(pady=(10, 0), padx=20, anchor='w')
-        cancel_subtitle = tk.Label(self.content_frame, text="Add, Edit, and Delete Cancellation Requests (Status is always Pending)", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        cancel_subtitle = tk.Label(frame, text="Add, Edit, and Delete Cancellation Requests (Status is always Pending)", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         cancel_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
         # Controls frame
-        controls_frame = tk.Frame(self.content_frame, bg='white')
+        controls_frame = tk.Frame(frame, bg='white')
         controls_frame.pack(fill=tk.X, pady=10, padx=20)
 
         # Search and Sort
@@ -1071,7 +812,6 @@ class EmployeeDashboard:
         search_frame.pack(side=tk.LEFT, fill=tk.X)
         tk.Label(search_frame, text="Search:", bg='white').pack(side=tk.LEFT, padx=5)
         self.cancel_search_var = tk.StringVar()
-        self.cancel_search_var.trace('w', self.search_cancellations)
         search_entry = tk.Entry(search_frame, textvariable=self.cancel_search_var, font=('Arial', 11), width=30)
         search_entry.pack(side=tk.LEFT, padx=5)
 
@@ -1082,7 +822,7 @@ class EmployeeDashboard:
         sort_options = ttk.Combobox(sort_frame, values=["Name (A-Z)", "Name (Z-A)", "Date (Newest)", "Date (Oldest)"], 
                                   font=('Arial', 11), width=15)
         sort_options.pack(side=tk.LEFT, padx=5)
-        sort_options.set("Name (A-Z)")
+        sort_options.set(self.cancellation_sort)
         sort_options.bind('<<ComboboxSelected>>', lambda e: self.sort_cancellations(sort_options.get()))
 
         # Buttons
@@ -1093,7 +833,7 @@ class EmployeeDashboard:
         tk.Button(btn_frame, text="Delete Request", command=self.delete_cancellation, bg='#f44336', fg='white').pack(side=tk.LEFT, padx=5)
 
         # Tree view frame
-        tree_frame = tk.Frame(self.content_frame, bg='white')
+        tree_frame = tk.Frame(frame, bg='white')
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
 
         # Scrollbars
@@ -1103,8 +843,9 @@ class EmployeeDashboard:
         # Treeview
         columns = ('Ticket ID', 'Name', 'Email', 'Reasons', 'Quantity', 'Amount', 'Pass Type', 'Booked Date', 'Purchased Date', 'Status')
         self.cancellations_tree = ttk.Treeview(tree_frame, columns=columns, show='headings',
-                                              yscrollcommand=y_scrollbar.set,
                                               xscrollcommand=x_scrollbar.set)
+        # Fetch cancellations a page at a time as the table scrolls
+        self.cancellations_table = PagedTreeview(self.cancellations_tree, y_scrollbar)
 
         # Configure scrollbars
         y_scrollbar.config(command=self.cancellations_tree.yview)
@@ -1132,102 +873,38 @@ class EmployeeDashboard:
 
         self.cancellations_tree.bind("<Button-1>", clear_selection_on_click, add="+")
  
+        # Search in the background as the user types
+        DebouncedSearch(self.cancellations_tree, self.cancel_search_var, self.search_cancellations,
+                        self.show_cancellation_matches)
+
         # Load the data
         self.load_cancellations_data()
 
+    def cancellation_pages(self, search_text):
+        """Return a fetch_page for the cancellations matching search_text."""
+        sort = self.CANCELLATION_SORTS.get(self.cancellation_sort, self.CANCELLATION_SORTS["Name (A-Z)"])
+        return db.cancellation_pages(self.CANCELLATION_COLUMNS, sort, search_text)
+
     def load_cancellations_data(self):
-        # Clear existing items
-        for item in self.cancellations_tree.get_children():
-            self.cancellations_tree.delete(item)
-            
+        # Show the first page of cancellations matching the search box
         try:
-            conn = sqlite3.connect('funpass.db')
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT ticket_id, name, email, reasons, quantity, 
-                       amount, pass_type,
-                       strftime('%Y-%m-%d', booked_date) as booked_date,
-                       strftime('%Y-%m-%d', purchased_date) as purchased_date,
-                       status
-                FROM cancellations
-            ''')
-            cancellations = cursor.fetchall()
-            conn.close()
-
-            # Insert data into treeview
-            for cancellation in cancellations:
-                # Convert tuple to list for modification
-                data_list = list(cancellation)
-                
-                # Format dates if they exist (positions 7 and 8 in the list)
-                if data_list[7]:  # booked_date
-                    try:
-                        date_obj = datetime.strptime(data_list[7], '%Y-%m-%d')
-                        data_list[7] = date_obj.strftime('%m/%d/%Y')
-                    except ValueError:
-                        pass
-                        
-                if data_list[8]:  # purchased_date
-                    try:
-                        date_obj = datetime.strptime(data_list[8], '%Y-%m-%d')
-                        data_list[8] = date_obj.strftime('%m/%d/%Y')
-                    except ValueError:
-                        pass
-
-                # Insert the formatted data into treeview
-                self.cancellations_tree.insert('', tk.END, values=data_list)
-
+            self.cancellations_table.show(self.cancellation_pages(self.cancel_search_var.get()))
         except Exception as e:
             messagebox.showerror("Database Error", f"Error loading cancellation data: {str(e)}")
 
-    def search_cancellations(self, *args):
-        search_text = self.cancel_search_var.get().lower()
-        
-        # Clear existing items
-        for item in self.cancellations_tree.get_children():
-            self.cancellations_tree.delete(item)
-            
-        try:
-            conn = sqlite3.connect('funpass.db')
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT ticket_id, name, email, reasons, quantity, 
-                       amount, pass_type, booked_date, purchased_date, status
-                FROM cancellations
-            ''')
-            cancellations = cursor.fetchall()
-            conn.close()
-
-            # Filter and insert matching data
-            for cancellation in cancellations:
-                if any(search_text in str(value).lower() for value in cancellation):
-                    self.cancellations_tree.insert('', tk.END, values=cancellation)
+    def search_cancellations(self, search_text):
+        # Runs on the search worker, which also fetches the first page
+        fetch_page = self.cancellation_pages(search_text)
+        return fetch_page, fetch_page()
 
-        except Exception as e:
-            messagebox.showerror("Search Error", f"Error searching cancellations: {str(e)}")
+    def show_cancellation_matches(self, result):
+        self.cancellations_table.show(*result)
 
     def sort_cancellations(self, sort_option):
         """Sort the cancellations based on the selected option."""
-        items = []
-        for item in self.cancellations_tree.get_children():
-            values = self.cancellations_tree.item(item)['values']
-            items.append(values)
-            
-        # Sort based on selected option
-        if sort_option == "Name (A-Z)":
-            items.sort(key=lambda x: x[1].lower() if x[1] else '')  # Sort by name
-        elif sort_option == "Name (Z-A)":
-            items.sort(key=lambda x: x[1].lower() if x[1] else '', reverse=True)
-        elif sort_option == "Date (Newest)":
-            items.sort(key=lambda x: x[8] if x[8] else '', reverse=True)  # Sort by booked date
-        elif sort_option == "Date (Oldest)":
-            items.sort(key=lambda x: x[8] if x[8] else '')
-            
-        # Clear and repopulate the tree
-        for item in self.cancellations_tree.get_children():
-            self.cancellations_tree.delete(item)
-        for item in items:
-            self.cancellations_tree.insert('', tk.END, values=item)
+        # Let the database sort, then reload the table from the top
+        self.cancellation_sort = sort_option
+        self.load_cancellations_data()
 
     def add_cancellation_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -1268,6 +945,7 @@ class EmployeeDashboard:
         
         # Booked Date
         tk.Label(main_frame, text="Booked Date:", font=('Arial', 11), bg='white').pack(anchor='w')
+        from tkcalendar import DateEntry
         booked_date_entry = DateEntry(main_frame, font=('Arial', 11), width=18, date_pattern='MM/dd/yyyy')
         booked_date_entry.pack(fill=tk.X, pady=(0, 10))
        
@@ -1285,13 +963,6 @@ class EmployeeDashboard:
             pass_type_combo.set(pass_types[0])  # Set default to "Express Pass"
             
         def save_cancellation():
-            ticket_id = ticket_id_entry.get().strip()
-            name = name_entry.get().strip()
-            email = email_entry.get().strip()
-            reasons = reasons_entry.get().strip()
-            quantity = quantity_entry.get().strip()
-            amount = amount_entry.get().strip()
-            
             # Format dates correctly
             try:
                 booked_date = booked_date_entry.get_date().strftime('%Y-%m-%d')
@@ -1300,32 +971,20 @@ class EmployeeDashboard:
                 messagebox.showerror("Error", "Invalid date format!")
                 return
 
-            pass_type = pass_type_combo.get().strip()
-
-            if not (ticket_id and name and email and reasons and quantity and amount and booked_date and purchased_date and pass_type):
-                messagebox.showerror("Error", "All fields are required!")
-                return
-
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO cancellations 
-                    (ticket_id, name, email, reasons, quantity, amount, booked_date, purchased_date, pass_type, status) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    ticket_id, name, email, reasons, 
-                    int(quantity), float(amount), 
-                    booked_date, purchased_date,
-                    pass_type, 'Pending'
-                ))
-                conn.commit()
-                conn.close()
-                dialog.destroy()
-                self.load_cancellations_data()
-                messagebox.showinfo("Success", "Cancellation request added!")
+                self.cancellation_requests.request(
+                    ticket_id_entry.get(), name_entry.get(), email_entry.get(), reasons_entry.get(),
+                    quantity_entry.get().strip(), amount_entry.get().strip(),
+                    booked_date, purchased_date, pass_type_combo.get())
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
+                return
+            dialog.destroy()
+            self.load_cancellations_data()
+            messagebox.showinfo("Success", "Cancellation request added!")
 
         tk.Button(main_frame, text="Save", command=save_cancellation, bg='#4CAF50', fg='white').pack(pady=10)
         tk.Button(main_frame, text="Cancel", command=dialog.destroy, bg='#f44336', fg='white').pack()
@@ -1391,6 +1050,7 @@ class EmployeeDashboard:
 
         # Booked Date (now editable)
         tk.Label(main_frame, text="Booked Date:", font=('Arial', 11), bg='white').pack(anchor='w')
+        from tkcalendar import DateEntry
         booked_date_entry = DateEntry(main_frame, font=('Arial', 11), width=18, date_pattern='MM/dd/yyyy')
         try:
             date_obj = datetime.strptime(values[7], '%m/%d/%Y')
@@ -1423,15 +1083,10 @@ class EmployeeDashboard:
         # Bind the update function to both pass type and quantity changes
         pass_type_combo.bind('<<ComboboxSelected>>', update_amount)
         quantity_entry.bind('<KeyRelease>', update_amount)
+        # Recompute the amount when a price changes while the dialog is open
+        self.view.subscribe([('price', pass_type) for pass_type in self.get_pass_types()], update_amount, dialog)
 
         def save_edit():
-            name = name_var.get().strip()
-            email = email_var.get().strip()
-            reasons = reasons_text.get('1.0', 'end-1c').strip()
-            quantity = quantity_var.get().strip()
-            amount = amount_var.get().strip()
-            pass_type = pass_type_var.get().strip()
-            
             try:
                 booked_date = booked_date_entry.get_date().strftime('%Y-%m-%d')
                 purchased_date = purchased_date_entry.get_date().strftime('%Y-%m-%d')
@@ -1439,27 +1094,20 @@ class EmployeeDashboard:
                 messagebox.showerror("Error", "Invalid date format!")
                 return
 
-            if not all([name, email, reasons, quantity, amount, pass_type, booked_date, purchased_date]):
-                messagebox.showerror("Error", "All fields are required!")
-                return
-
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE cancellations 
-                    SET name=?, email=?, reasons=?, quantity=?, amount=?, 
-                        pass_type=?, booked_date=?, purchased_date=?, status=?
-                    WHERE ticket_id=?
-                ''', (name, email, reasons, quantity, amount, pass_type, 
-                     booked_date, purchased_date, 'Pending', ticket_id_var.get()))
-                conn.commit()
-                conn.close()
-                dialog.destroy()
-                self.load_cancellations_data()
-                messagebox.showinfo("Success", "Cancellation request updated successfully!")
+                self.cancellation_requests.update(
+                    ticket_id_var.get(), name_var.get(), email_var.get(), reasons_text.get('1.0', 'end-1c'),
+                    quantity_var.get().strip(), amount_var.get().strip(),
+                    booked_date, purchased_date, pass_type_var.get())
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
+                return
+            dialog.destroy()
+            self.load_cancellations_data()
+            messagebox.showinfo("Success", "Cancellation request updated successfully!")
 
         # Button frame for Save and Cancel
         button_frame = tk.Frame(main_frame, bg='white')
@@ -1485,26 +1133,24 @@ class EmployeeDashboard:
         
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this request?"):
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                # Fix: Use values[0] which is the ticket_id (first column) instead of values[1]
-                cursor.execute('DELETE FROM cancellations WHERE ticket_id=?', (values[0],))
-                conn.commit()
-                conn.close()
+                self.cancellation_requests.delete(values[0])
                 self.load_cancellations_data()
                 messagebox.showinfo("Success", "Request deleted successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
     def show_pricing(self):
-        self.clear_content()
-        pricing_title = tk.Label(self.content_frame, text="Pass Type Pricing", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        # Prices on this page follow the view model, so it is built once
+        self.screens.show('pricing', self.build_pricing)
+
+    def build_pricing(self, frame):
+        pricing_title = tk.Label(frame, text="Pass Type Pricing", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         pricing_title.pack(pady=(10, 0), padx=20, anchor='w')
-        pricing_subtitle = tk.Label(self.content_frame, text="View Only - Pricing is managed by Admin", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        pricing_subtitle = tk.Label(frame, text="View Only - Pricing is managed by Admin", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         pricing_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
         # Create and store reference to price frame
-        self.current_price_frame = tk.Frame(self.content_frame, bg='white')
+        self.current_price_frame = tk.Frame(frame, bg='white')
         self.current_price_frame.pack(fill=tk.BOTH, expand=True, padx=50, pady=20)
 
         # Get fresh prices from database
@@ -1522,85 +1168,17 @@ class EmployeeDashboard:
             price_var = tk.StringVar(value=f"{current_price:,.2f}")
             price_entry = tk.Entry(price_frame, textvariable=price_var, font=('Arial', 12, 'bold'), bg='white', width=10, justify='right', state='readonly', relief='flat')
             price_entry.pack(side=tk.LEFT)
+            # Update just this price when the admin changes it
+            self.view.subscribe([('price', pass_type)],
+                                lambda price, var=price_var: var.set(f"{price:,.2f}"), price_entry)
 
     def get_all_prices(self):
-        # Get all prices from database
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT pass_type, price FROM pricing')
-        prices = cursor.fetchall()
-        conn.close()
-        return prices
-
-    def refresh_prices(self, event=None):
-        print("Price update event received")  # Debug print
-        
-        # Clear price cache to force fresh data
-        self._price_cache.clear()
-
-        # Refresh pricing display if it's currently shown
-        if hasattr(self, 'current_price_frame') and self.current_price_frame and self.current_price_frame.winfo_exists():
-            self.show_pricing()
-
-        # Update any open dialogs that show prices
-        for widget in self.root.winfo_children():
-            if isinstance(widget, tk.Toplevel):
-                try:
-                    self.update_dialog_prices(widget)
-                except Exception as e:
-                    print(f"Error updating dialog prices: {e}")  # Debug print
-                    continue
-
-        # Update main displays
-        self.update_displayed_prices()
-        print("Price refresh completed")  # Debug print
-
-    def update_dialog_prices(self, dialog):
-        """Update prices in an open dialog"""
-        quantity_entry = None
-        pass_type_combo = None
-        amount_var = None
-
-        # Find the relevant widgets in the dialog
-        for child in dialog.winfo_children():
-            if isinstance(child, tk.Frame):
-                for subchild in child.winfo_children():
-                    if isinstance(subchild, tk.Entry) and subchild.winfo_name() == 'quantity_entry':
-                        quantity_entry = subchild
-                    elif isinstance(subchild, ttk.Combobox) and subchild.winfo_name() == 'pass_type_combo':
-                        pass_type_combo = subchild
-                    elif isinstance(subchild, tk.Entry) and subchild.winfo_name() == 'amount_entry':
-                        amount_var = subchild.cget('textvariable')
-
-        # Update amount if we have all necessary widgets
-        if quantity_entry and pass_type_combo and amount_var:
-            try:
-                quantity = int(quantity_entry.get())
-                pass_type = pass_type_combo.get()
-                price = self.get_price_for_pass(pass_type)
-                amount = price * quantity
-                self.root.globalgetvar(amount_var).set(f"{amount:.2f}")
-                print(f"Updated price in dialog for {pass_type}: {amount:.2f}")  # Debug print
-            except (ValueError, AttributeError) as e:
-                print(f"Error updating dialog amount: {e}")  # Debug print
-                pass
-
-    def update_displayed_prices(self):
-        """Update all price displays in the interface"""
-        # Update dashboard if it exists
-        if hasattr(self, 'content_frame'):
-            self.show_dashboard()
-            print("Dashboard prices updated")  # Debug print
-
-        # Update customer view if it exists
-        if hasattr(self, 'customers_tree'):
-            self.load_customers_data()
-            print("Customer view prices updated")  # Debug print
+        return list(self.pricing.prices().items())
 
-        # Update pricing view if it exists
-        if hasattr(self, 'current_price_frame') and self.current_price_frame and self.current_price_frame.winfo_exists():
-            self.show_pricing()
-            print("Pricing view updated")  # Debug print
+    def refresh_prices(self, keys=None, own=False):
+        # Make the price cache check for fresh data, then push only changed prices
+        db.expire_prices()
+        self.publish_prices()
 
     def logout(self):
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
@@ -0,0 +1,26 @@
+"""
+Display formatting for amounts and dates.
+
+Table dates are formatted by SQLite in the query itself (DISPLAY_DATE_SQL),
+so no row is re-parsed in Python. Every query that shows a date builds its
+column with display_date(), so the display format is set here alone.
+
+Peso amounts need thousands separators, which SQLite's printf only gives
+integers, so peso() formats in Python and caches by value: sale amounts
+repeat heavily (quantity times a few prices).
+"""
+from functools import lru_cache
+
+# to format an ISO date column as MM/DD/YYYY inside a query
+DISPLAY_DATE_SQL = "strftime('%m/%d/%Y', {})"
+
+
+def display_date(column):
+    """Return the SQL expression showing an ISO date column as MM/DD/YYYY."""
+    return DISPLAY_DATE_SQL.format(column)
+
+
+@lru_cache(maxsize=4096)
+def peso(amount):
+    """Return amount as '₱1,234.50'; None or 0 give '₱0.00'."""
+    return f"₱{float(amount or 0):,.2f}"
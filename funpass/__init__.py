@@ -0,0 +1,3 @@
+"""
+FunPass application code that runs without a display.
+"""
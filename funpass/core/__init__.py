@@ -0,0 +1,17 @@
+"""
+Business rules of FunPass as plain services over the data layer.
+
+The dashboards collect input and show results; selling, allocations,
+pricing and cancellations are decided here, so they can be profiled and
+load-tested without Tk. Services raise ValidationError with a message ready
+to show the user, and let database.NotEnoughTickets and sqlite3 errors
+through.
+"""
+from funpass.core.validation import ValidationError
+from funpass.core.pricing import PricingService
+from funpass.core.sales import Sale, SalesService
+from funpass.core.inventory import InventoryService
+from funpass.core.cancellations import CancellationService
+
+__all__ = ['ValidationError', 'PricingService', 'Sale', 'SalesService', 'InventoryService',
+           'CancellationService']
@@ -0,0 +1,50 @@
+"""
+Cancellation requests and their review. Approved requests are netted out of
+sales by the rollup queries in database.py.
+"""
+import database as db
+import ids
+from funpass.core.validation import ValidationError, require, to_amount, to_quantity
+
+STATUSES = ('Pending', 'Approved', 'Rejected')
+
+
+class CancellationService:
+    def request(self, ticket_id, name, email, reasons, quantity, amount, booked_date,
+                purchased_date, pass_type):
+        """File a Pending cancellation request for a ticket."""
+        ticket_id = ids.normalize_ticket_id(ticket_id)
+        name, email, reasons, pass_type = (value.strip() for value in (name, email, reasons, pass_type))
+        require("All fields are required!", ticket_id, name, email, reasons, quantity, amount,
+                booked_date, purchased_date, pass_type)
+        if not ids.is_valid_ticket_id(ticket_id):
+            raise ValidationError("Invalid Ticket ID! Please check it and try again.")
+        db.execute('''
+            INSERT INTO cancellations
+            (ticket_id, name, email, reasons, quantity, amount, booked_date, purchased_date, pass_type, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'Pending')
+        ''', (ticket_id, name, email, reasons, to_quantity(quantity), to_amount(amount),
+              booked_date, purchased_date, pass_type))
+
+    def update(self, ticket_id, name, email, reasons, quantity, amount, booked_date,
+               purchased_date, pass_type):
+        """Save an edited request; editing sends it back to Pending."""
+        ticket_id = ids.normalize_ticket_id(ticket_id)
+        name, email, reasons, pass_type = (value.strip() for value in (name, email, reasons, pass_type))
+        require("All fields are required!", name, email, reasons, quantity, amount, pass_type,
+                booked_date, purchased_date)
+        db.execute('''
+            UPDATE cancellations
+            SET name=?, email=?, reasons=?, quantity=?, amount=?,
+                pass_type=?, booked_date=?, purchased_date=?, status='Pending'
+            WHERE ticket_id=?
+        ''', (name, email, reasons, to_quantity(quantity), to_amount(amount), pass_type,
+              booked_date, purchased_date, ticket_id))
+
+    def set_status(self, ticket_id, status):
+        if status not in STATUSES:
+            raise ValidationError(f"Status must be one of {', '.join(STATUSES)}")
+        db.execute('UPDATE cancellations SET status = ? WHERE ticket_id = ?', (status, ticket_id))
+
+    def delete(self, ticket_id):
+        db.execute('DELETE FROM cancellations WHERE ticket_id = ?', (ticket_id,))
@@ -0,0 +1,97 @@
+"""
+What there is to sell: pass types and rides, and the tickets of each pass
+type allocated to every employee.
+"""
+import database as db
+import ids
+from formatting import peso
+from funpass.core.validation import ValidationError, require, to_price
+
+
+class InventoryService:
+    def pass_types(self):
+        return db.pass_types()
+
+    def availability(self, employee_id):
+        """Return {pass_type: Availability} for one employee, in display order."""
+        return db.availability(employee_id)
+
+    def allocations(self, employee_id):
+        return db.employee_allocations(employee_id)
+
+    def employee_rows(self, order_by, pass_types, search_text=''):
+        """Return the Employee Management table rows as shown.
+
+        Each row is the employee's columns, their allocation of each of
+        pass_types and their net sales this month. search_text keeps only rows
+        with a value containing it, ignoring case. order_by comes from a fixed
+        sort map and is pasted into the SQL.
+        """
+        allocations = db.all_allocations()
+        rows = []
+        for emp in db.employees_with_monthly_sales(order_by):
+            employee_allocations = allocations.get(emp[0], {})
+            rows.append(list(emp[:-1])
+                        + [employee_allocations.get(pass_type, 0) for pass_type in pass_types]
+                        + [peso(emp[-1])])
+        search_text = search_text.lower()
+        if search_text:
+            rows = [row for row in rows if any(search_text in str(value).lower() for value in row)]
+        return rows
+
+    def save_employee(self, employee_id, name, username, password, allocations):
+        """Add (employee_id None) or update an employee with {pass_type: allocation}.
+
+        Allocations may be typed text. Returns the employee ID; a taken
+        username raises sqlite3.IntegrityError.
+        """
+        name, username, password = name.strip(), username.strip(), password.strip()
+        require("Name, username and password are required!", name, username, password)
+        counts = {}
+        for pass_type, allocation in allocations.items():
+            allocation = str(allocation).strip()
+            if not allocation.isdigit():
+                raise ValidationError(f"Invalid ticket quantity for {pass_type}!")
+            counts[pass_type] = int(allocation)
+        # immediate, so reserving the employee ID cannot hit a read lock held here
+        with db.transaction(immediate=True) as cursor:
+            if employee_id is None:
+                employee_id = ids.next_employee_id()
+                cursor.execute('INSERT INTO employees (employee_id, name, username, password) '
+                               'VALUES (?, ?, ?, ?)', (employee_id, name, username, password))
+            else:
+                cursor.execute('UPDATE employees SET name=?, username=?, password=? '
+                               'WHERE employee_id=?', (name, username, password, employee_id))
+            db.save_allocations(cursor, employee_id, counts)
+        return employee_id
+
+    def delete_employee(self, employee_id):
+        db.execute('DELETE FROM employees WHERE employee_id = ?', (employee_id,))
+
+    def add_pass_type(self, pass_type, description, price):
+        """Add a ride with a new pass type and give every employee an allocation row for it.
+
+        The price may be typed text; it is saved with the pass type, so the
+        new type can be sold as soon as it exists.
+        """
+        pass_type, description = pass_type.strip(), description.strip()
+        require("Please fill in pass type, description and price.", pass_type, description, price)
+        price = to_price(price, pass_type)
+        if pass_type in db.pass_types():
+            raise ValidationError("This pass type already exists!")
+        with db.transaction(immediate=True) as cursor:
+            cursor.execute('INSERT INTO rides (name, pass_type, description) VALUES (?, ?, ?)',
+                           (pass_type, pass_type, description))
+            # priced in the same transaction, so no terminal sees it without a price
+            cursor.execute('INSERT INTO pricing (pass_type, price) VALUES (?, ?)', (pass_type, price))
+            db.bump_price_version(cursor)
+            cursor.execute('INSERT OR IGNORE INTO employee_allocations (employee_id, pass_type) '
+                           'SELECT employee_id, ? FROM employees', (pass_type,))
+
+    def describe_pass_type(self, pass_type, description):
+        description = description.strip()
+        require("Description cannot be empty.", description)
+        db.execute('UPDATE rides SET description = ? WHERE pass_type = ?', (description, pass_type))
+
+    def delete_pass_type(self, pass_type):
+        db.execute('DELETE FROM rides WHERE pass_type = ?', (pass_type,))
@@ -0,0 +1,36 @@
+"""
+Pass prices: reads through the shared price cache, writes bump the pricing
+version so every terminal's cache notices.
+"""
+import database as db
+import migrations
+from funpass.core.validation import to_price
+
+# the prices a fresh database is seeded with
+DEFAULT_PRICES = dict(migrations.DEFAULT_PRICES)
+
+
+class PricingService:
+    def prices(self):
+        """Return {pass_type: price} in display order."""
+        return db.prices()
+
+    def price_for(self, pass_type):
+        return db.price_for(pass_type)
+
+    def quote(self, pass_type, quantity):
+        """Return what quantity tickets of pass_type cost at the current price."""
+        return self.price_for(pass_type) * quantity
+
+    def update(self, new_prices):
+        """Save {pass_type: price or typed text} in one transaction and return the floats."""
+        parsed = {pass_type: to_price(price, pass_type) for pass_type, price in new_prices.items()}
+        with db.transaction() as cursor:
+            cursor.executemany('UPDATE pricing SET price = ? WHERE pass_type = ?',
+                               [(price, pass_type) for pass_type, price in parsed.items()])
+            db.bump_price_version(cursor)
+        return parsed
+
+    def reset(self):
+        """Put every pass type back to its default price and return those prices."""
+        return self.update(DEFAULT_PRICES)
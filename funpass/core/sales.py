@@ -0,0 +1,81 @@
+"""
+Ticket sales: issuing ticket IDs, pricing a sale, and recording it against
+the seller's allocation.
+"""
+from collections import namedtuple
+from datetime import date
+
+import database as db
+import ids
+from funpass.core.pricing import PricingService
+from funpass.core.validation import require, to_amount, to_quantity
+
+Sale = namedtuple('Sale', 'ticket_id name email quantity amount booked_date purchased_date '
+                          'pass_type remaining')
+
+
+class SalesService:
+    """Sales made by one employee, or by anyone when employee_id is None (admin)."""
+
+    def __init__(self, employee_id=None, pricing=None):
+        self.employee_id = employee_id
+        self.pricing = pricing or PricingService()
+
+    def new_ticket_id(self):
+        # Unique across terminals without a database round trip per ticket
+        return ids.next_ticket_id()
+
+    def sell(self, name, email, pass_type, quantity, booked_date, purchased_date=None,
+             ticket_id=None):
+        """Record a sale priced at the current price and return it as a Sale.
+
+        Dates are ISO YYYY-MM-DD; purchased_date defaults to today. Raises
+        database.NotEnoughTickets when the allocation does not cover it.
+        """
+        name, email, pass_type = name.strip(), email.strip(), pass_type.strip()
+        require("Name, Quantity, Pass Type, Amount, and Booked Date are required!",
+                name, quantity, pass_type, booked_date)
+        quantity = to_quantity(quantity)
+        amount = self.pricing.quote(pass_type, quantity)
+        ticket_id = ticket_id or self.new_ticket_id()
+        purchased_date = purchased_date or date.today().isoformat()
+        remaining = db.commit_sale(ticket_id, name, email, quantity, amount, booked_date,
+                                   purchased_date, pass_type, self.employee_id)
+        return Sale(ticket_id, name, email, quantity, amount, booked_date, purchased_date,
+                    pass_type, remaining)
+
+    def update(self, ticket_id, name, email, quantity, amount, booked_date, purchased_date,
+               pass_type):
+        """Save an edited sale; more tickets must still fit the seller's allocation."""
+        name, email, pass_type = name.strip(), email.strip(), pass_type.strip()
+        require("Name, Quantity, Amount, Pass Type, Booked Date, and Purchased Date are required!",
+                name, quantity, amount, pass_type, booked_date, purchased_date)
+        quantity = to_quantity(quantity)
+        amount = to_amount(amount)
+        with db.transaction(immediate=True) as cursor:
+            cursor.execute('SELECT employee_id, pass_type, quantity FROM customers WHERE ticket_id = ?',
+                           (ticket_id,))
+            old = cursor.fetchone()
+            if old is not None:
+                employee_id, old_pass_type, old_quantity = old
+                extra = quantity - (old_quantity if old_pass_type == pass_type else 0)
+                if extra > 0:
+                    cursor.execute(db.REMAINING_SQL, (employee_id, pass_type))
+                    available = cursor.fetchone()[0]
+                    if extra > available:
+                        raise db.NotEnoughTickets(pass_type, max(available, 0))
+            cursor.execute('''
+                UPDATE customers
+                SET name=?, email=?, quantity=?, amount=?,
+                    booked_date=?, purchased_date=?, pass_type=?
+                WHERE ticket_id=?
+            ''', (name, email, quantity, amount, booked_date, purchased_date, pass_type,
+                  ticket_id))
+
+    def delete(self, ticket_id):
+        """Delete a sale; an employee can only delete their own."""
+        if self.employee_id is None:
+            db.execute('DELETE FROM customers WHERE ticket_id = ?', (ticket_id,))
+        else:
+            db.execute('DELETE FROM customers WHERE ticket_id = ? AND employee_id = ?',
+                       (ticket_id, self.employee_id))
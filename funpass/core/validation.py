@@ -0,0 +1,43 @@
+"""
+Input checks shared by the services.
+"""
+
+
+class ValidationError(ValueError):
+    """Raised when input breaks a business rule; str() is the message to show."""
+
+
+def require(message, *values):
+    """Raise ValidationError(message) unless every value is non-empty."""
+    if any(value is None or not str(value).strip() for value in values):
+        raise ValidationError(message)
+
+
+def to_quantity(value, message="Quantity must be greater than 0!"):
+    """Return value as a positive int."""
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        raise ValidationError("Invalid quantity or amount!") from None
+    if quantity <= 0:
+        raise ValidationError(message)
+    return quantity
+
+
+def to_price(value, pass_type):
+    """Return a typed price for pass_type as a non-negative float."""
+    try:
+        price = float(str(value).replace(',', '').replace(' ', ''))
+    except ValueError:
+        raise ValidationError(f"Invalid price for {pass_type}") from None
+    if price < 0:
+        raise ValidationError(f"Price for {pass_type} cannot be negative")
+    return price
+
+
+def to_amount(value):
+    """Return value as a float, accepting '₱1,234.50' style text."""
+    try:
+        return float(str(value).replace('₱', '').replace(',', '').strip())
+    except ValueError:
+        raise ValidationError("Invalid quantity or amount!") from None
@@ -0,0 +1,95 @@
+"""
+Collision-free ticket and employee IDs, issued from the sequences table.
+
+A terminal reserves ticket numbers a block at a time in one short write
+transaction and hands them out from memory, so issuing a ticket ID
+never queries or retries against the database, and terminals sharing
+funpass.db never hand out the same number. Ticket IDs end in a check
+character so a mistyped ID is caught before it is looked up.
+"""
+import threading
+
+import database as db
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+TICKET_PREFIX = 'F'
+# to keep ticket IDs fixed width: 36**6 numbers before they grow a character
+TICKET_DIGITS = 6
+TICKET_LENGTH = len(TICKET_PREFIX) + TICKET_DIGITS + 1
+# IDs issued before check characters existed: 'F' plus five characters
+LEGACY_TICKET_LENGTH = len(TICKET_PREFIX) + 5
+# to size the block of ticket numbers one terminal reserves at a time
+TICKET_BLOCK_SIZE = 100
+
+_ticket_lock = threading.Lock()
+_next_ticket = 0
+_ticket_block_end = 0
+
+
+def reserve(name, count=1):
+    """Take `count` consecutive values from a sequence and return the first."""
+    # UPDATE then SELECT rather than UPDATE ... RETURNING, which needs SQLite
+    # 3.35; the UPDATE holds the write lock, so the SELECT sees only this bump
+    with db.transaction(immediate=True) as cursor:
+        cursor.execute('UPDATE sequences SET next_value = next_value + ? WHERE name = ?', (count, name))
+        cursor.execute('SELECT next_value - ? FROM sequences WHERE name = ?', (count, name))
+        return cursor.fetchone()[0]
+
+
+def _base36(number):
+    digits = ''
+    while number:
+        number, remainder = divmod(number, len(ALPHABET))
+        digits = ALPHABET[remainder] + digits
+    return digits or ALPHABET[0]
+
+
+def check_character(body):
+    """Return the Luhn mod 36 check character for body."""
+    base = len(ALPHABET)
+    total = 0
+    factor = 2
+    for char in reversed(body):
+        addend = factor * ALPHABET.index(char)
+        total += addend // base + addend % base
+        factor = 1 if factor == 2 else 2
+    return ALPHABET[-total % base]
+
+
+def next_ticket_id():
+    global _next_ticket, _ticket_block_end
+    with _ticket_lock:
+        if _next_ticket >= _ticket_block_end:
+            _next_ticket = reserve('ticket', TICKET_BLOCK_SIZE)
+            _ticket_block_end = _next_ticket + TICKET_BLOCK_SIZE
+        number = _next_ticket
+        _next_ticket += 1
+    body = _base36(number).rjust(TICKET_DIGITS, ALPHABET[0])
+    return f'{TICKET_PREFIX}{body}{check_character(body)}'
+
+
+def next_employee_id():
+    """Return a new 'E12345' style employee ID from one atomic reservation."""
+    return f"E{reserve('employee'):05d}"
+
+
+def is_valid_ticket_id(ticket_id):
+    """Return True for a normalized ticket ID (see normalize_ticket_id) of the right shape.
+
+    Current IDs are TICKET_LENGTH characters and must have a matching check
+    character. IDs issued before check characters existed ('F' plus five
+    characters) are accepted on shape alone.
+    """
+    if not ticket_id.startswith(TICKET_PREFIX) or any(char not in ALPHABET for char in ticket_id[1:]):
+        return False
+    if len(ticket_id) == LEGACY_TICKET_LENGTH:
+        return True
+    if len(ticket_id) != TICKET_LENGTH:
+        return False
+    body, check = ticket_id[len(TICKET_PREFIX):-1], ticket_id[-1]
+    return check_character(body) == check
+
+
+def normalize_ticket_id(ticket_id):
+    """Return a typed ticket ID the way it is stored: trimmed and upper case."""
+    return ticket_id.strip().upper()
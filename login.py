@@ -1,9 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
-import sqlite3
-from main import AdminDashboard
-from for_employees import EmployeeDashboard
+import database as db
+from shared import create_database
 
 def center_window(root, width=800, height=600):
     screen_width = root.winfo_screenwidth()
@@ -23,6 +21,7 @@ def show_login():
 
     # Load and display logo
     try:
+        from PIL import Image, ImageTk
         logo_path = "C:/Users/MicaellaEliab/Downloads/FunPassProjectA/FunPass__1_-removebg-preview.png"
         logo_img = Image.open(logo_path)
         logo_width = 300
@@ -62,32 +61,30 @@ def show_login():
         if not username or not password:
             messagebox.showwarning("Invalid Input", "Please enter both username and password")
             return
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
         # Check admin first
-        cursor.execute('SELECT * FROM admin WHERE username = ? AND password = ?', (username, password))
-        admin = cursor.fetchone()
+        admin = db.query_one('SELECT * FROM admin WHERE username = ? AND password = ?', (username, password))
         if admin:
+            # Load the dashboards only after a login picks one
+            from main import AdminDashboard
             root.destroy()
             admin_root = tk.Tk()
             AdminDashboard(admin_root)
             admin_root.mainloop()
-            conn.close()
             return
         # Check employee
-        cursor.execute('SELECT employee_id FROM employees WHERE username = ? AND password = ?', (username, password))
-        emp = cursor.fetchone()
+        emp = db.query_one('SELECT employee_id FROM employees WHERE username = ? AND password = ?', (username, password))
         if emp:
+            from for_employees import EmployeeDashboard
             root.destroy()
             emp_root = tk.Tk()
             EmployeeDashboard(emp_root, employee_id=emp[0])
             emp_root.mainloop()
         else:
             messagebox.showerror("Login Failed", "Invalid credentials")
-        conn.close()
 
     tk.Button(form_frame, text="Login", font=('Arial', 12, 'bold'), bg='#4CAF50', fg='white', width=20, command=login).pack(pady=20)
     root.mainloop()
 
 if __name__ == "__main__":
+    create_database()
     show_login() 
\ No newline at end of file
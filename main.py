@@ -1,109 +1,52 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 import sqlite3
+import database as db
+import query_stats
+from formatting import display_date, peso
 from datetime import datetime, timedelta
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from tkcalendar import DateEntry
-import pandas as pd
-from shared import create_database, BaseWindow
+from funpass.core import (SalesService, InventoryService, PricingService, CancellationService,
+                          ValidationError)
+from shared import (create_database, BaseWindow, DebouncedSearch, PagedTreeview, ChangeBus, ScreenManager,
+                    run_in_background)
 import time  # Add missing import
-import random
-
-# database setup
-def create_database():
-    conn = sqlite3.connect('funpass.db')
-    cursor = conn.cursor()
-
-    # to create admin table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS admin (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL
-        )
-    ''')
-
-    # to insert default admin if not exists
-    cursor.execute('INSERT OR IGNORE INTO admin (username, password) VALUES (?, ?)',
-                  ('admin', 'admin123'))
-
-    # to create employees table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            employee_id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            express_pass INTEGER DEFAULT 0,
-            junior_pass INTEGER DEFAULT 0,
-            regular_pass INTEGER DEFAULT 0,
-            student_pass INTEGER DEFAULT 0,
-            pwd_pass INTEGER DEFAULT 0,
-            senior_citizen_pass INTEGER DEFAULT 0
-        )
-    ''')
-
-    # to create customers table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            ticket_id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            booked_date TEXT NOT NULL,
-            purchased_date TEXT NOT NULL,
-            pass_type TEXT NOT NULL,
-            employee_id TEXT, 
-            FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
-        )
-    ''')
-
-    # to create cancellations table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cancellations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_id TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            pass_type TEXT NOT NULL,
-            reasons TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            booked_date TEXT NOT NULL,
-            purchased_date TEXT NOT NULL,
-            status TEXT DEFAULT 'Pending',
-            FOREIGN KEY (ticket_id) REFERENCES customers (ticket_id)
-        )
-    ''')
-
-    # to create pricing table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pricing (
-            pass_type TEXT PRIMARY KEY,
-            price REAL NOT NULL
-        )
-    ''')
-
-    # to insert or update default prices
-    default_prices = [
-        ('Express Pass', 2300.00),
-        ('Junior Pass', 900.00),
-        ('Regular Pass', 1300.00),
-        ('Student Pass', 1300.00),
-        ('Senior Citizen Pass', 900.00),
-        ('PWD Pass', 900.00)
-    ]
-    
-    cursor.executemany('''
-        INSERT OR REPLACE INTO pricing (pass_type, price)
-        VALUES (?, ?)
-    ''', default_prices)
-
-    conn.commit()
-    conn.close()
 
 class AdminDashboard:
+    # to map sort options to whitelisted (sort key, direction) pairs, each backed by an index
+    CUSTOMER_SORTS = {
+        "Name (A-Z)": (("c.name COLLATE NOCASE", "c.ticket_id"), "ASC"),
+        "Name (Z-A)": (("c.name COLLATE NOCASE", "c.ticket_id"), "DESC"),
+        "Date (Newest)": (("c.purchased_date", "c.ticket_id"), "DESC"),
+        "Date (Oldest)": (("c.purchased_date", "c.ticket_id"), "ASC")
+    }
+    CANCELLATION_SORTS = {
+        "Name (A-Z)": (("x.name COLLATE NOCASE", "x.id"), "ASC"),
+        "Name (Z-A)": (("x.name COLLATE NOCASE", "x.id"), "DESC"),
+        "Date (Newest)": (("x.purchased_date", "x.id"), "DESC"),
+        "Date (Oldest)": (("x.purchased_date", "x.id"), "ASC"),
+        "Status (A-Z)": (("x.status", "x.id"), "ASC"),
+        "Status (Z-A)": (("x.status", "x.id"), "DESC")
+    }
+    # to list each table's columns in display order, dates formatted by SQLite
+    CUSTOMER_COLUMNS = f'''c.ticket_id, c.name, c.email, c.pass_type, c.quantity, c.amount,
+        {display_date('c.booked_date')} as booked_date,
+        {display_date('c.purchased_date')} as purchased_date,
+        IFNULL(e.name, '') as employee_name'''
+    CUSTOMER_TABLES = 'customers c LEFT JOIN employees e ON c.employee_id = e.employee_id'
+    CANCELLATION_COLUMNS = f'''x.ticket_id, x.name, x.email, x.pass_type, x.reasons, x.quantity, x.amount,
+        {display_date('x.booked_date')} as booked_date,
+        {display_date('x.purchased_date')} as purchased_date,
+        x.status'''
+    # to rebuild the dashboard on a visit once it is this many seconds old
+    DASHBOARD_MAX_AGE = 30
+    # to map sort options to whitelisted ORDER BY clauses
+    EMPLOYEE_SORTS = {
+        "Name (A-Z)": "e.name COLLATE NOCASE ASC, e.employee_id ASC",
+        "Name (Z-A)": "e.name COLLATE NOCASE DESC, e.employee_id DESC",
+        "Username (A-Z)": "e.username ASC",
+        "Username (Z-A)": "e.username DESC"
+    }
+
     def __init__(self, root):
         self.root = root
         self.root.title("FunPass - Admin Dashboard")
@@ -111,20 +54,28 @@ class AdminDashboard:
         self.root.grid_rowconfigure(0, weight=1)
         self.root.grid_columnconfigure(1, weight=1)
         self.price_entries = {}  # Initialize price entries dictionary
+        self.employee_sort = "Name (A-Z)"
+        self.customer_sort = "Name (A-Z)"
+        self.cancellation_sort = "Name (A-Z)"
+        # to leave every business rule to the core services
+        self.sales = SalesService()
+        self.inventory = InventoryService()
+        self.pricing = PricingService()
+        self.cancellation_requests = CancellationService()
         self.create_sidebar()
         self.content_frame = tk.Frame(self.root, bg='white')
         self.content_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
+        # to build every page once and raise it on later visits
+        self.screens = ScreenManager(self.content_frame, 'admin.')
         self.show_dashboard()
+        self.update_time()
 
-    def generate_unique_employee_id(self):
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        while True:
-            new_id = f"E{random.randint(10000, 99999)}"
-            cursor.execute("SELECT 1 FROM employees WHERE employee_id = ?", (new_id,))
-            if not cursor.fetchone():
-                conn.close()
-                return new_id
+        # to hear about sales and cancellations made at the employee terminals
+        self.changes = ChangeBus(self.root)
+        self.changes.subscribe('customers', self.refresh_sales)
+        self.changes.subscribe('allocations', self.refresh_sales)
+        self.changes.subscribe('cancellations', self.refresh_cancellations)
+        self.changes.subscribe('pricing', self.refresh_pricing)
 
     def create_sidebar(self):
         sidebar = tk.Frame(self.root, bg='#ECCD93', width=350)
@@ -133,6 +84,8 @@ class AdminDashboard:
 
             # to add logo at the top of sidebar
         try:
+            # to load PIL only when the logo is drawn, not at startup
+            from PIL import Image, ImageTk
             logo_path = "FunPass__1_-removebg-preview.png"
             logo_img = Image.open(logo_path)
             # to resize logo to fit sidebar width while maintaining aspect ratio
@@ -155,6 +108,7 @@ class AdminDashboard:
             ("Customers", self.show_customers),
             ("Cancellations & Refunds", self.show_cancellations),
             ("Pricing", self.show_pricing),
+            ("Query Stats", self.show_query_stats),
             ("Logout", self.logout)
         ]
 
@@ -166,26 +120,36 @@ class AdminDashboard:
             btn.bind('<Enter>', lambda e, btn=btn: btn.configure(bg='#ECCD93'))
             btn.bind('<Leave>', lambda e, btn=btn: btn.configure(bg='#ECCD93'))
 
-    def clear_content(self):
-        # to properly destroy all widgets in the content frame
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-        # to ensure the content frame itself exists
-        if not hasattr(self, 'content_frame'):
-            self.content_frame = tk.Frame(self.root, bg='white')
-            self.content_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
+    def refresh_sales(self, keys=None, own=False):
+        # to reload the tables that show sales or allocations, now or on their next visit;
+        # the shown one keeps its scroll position and selection, and is left alone
+        # when this dashboard made the change and already redrew it
+        self.screens.invalidate('customers', 'employees', keep_shown=own)
+        # the overview's cards and recent sales read them too
+        db.expire_overview()
+
+    def refresh_cancellations(self, keys=None, own=False):
+        # an approved request takes back the tickets its seller sold
+        self.screens.invalidate('cancellations', 'employees', keep_shown=own)
+        # the overview counts the pending requests
+        db.expire_overview()
+
+    def refresh_pricing(self, keys=None, own=False):
+        self.screens.invalidate('pricing', keep_shown=own)
 
     def show_dashboard(self):
-        self.clear_content()
-        
+        # to rebuild the overview when it is older than DASHBOARD_MAX_AGE
+        self.screens.show('dashboard', self.build_dashboard, max_age=self.DASHBOARD_MAX_AGE)
+
+    def build_dashboard(self, frame):
         # to add dashboard title
-        dashboard_title = tk.Label(self.content_frame, text="Dashboard", font=('Arial', 18, 'bold'), bg='white', anchor='w')
+        dashboard_title = tk.Label(frame, text="Dashboard", font=('Arial', 18, 'bold'), bg='white', anchor='w')
         dashboard_title.pack(pady=(10, 0), padx=20, anchor='w')
-        dashboard_subtitle = tk.Label(self.content_frame, text="View and Manage FunPass: Amusement Park Ticketing System", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        dashboard_subtitle = tk.Label(frame, text="View and Manage FunPass: Amusement Park Ticketing System", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         dashboard_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
         
         # to create top bar with date and time
-        top_bar = tk.Frame(self.content_frame, bg='white')
+        top_bar = tk.Frame(frame, bg='white')
         top_bar.pack(fill=tk.X, pady=10)
 
         # to create date and time display with better formatting
@@ -197,11 +161,9 @@ class AdminDashboard:
         
         self.time_label = tk.Label(time_frame, font=('Arial', 12), bg='white')
         self.time_label.pack(side=tk.LEFT, padx=10)
-        
-        self.update_time()
 
         # to create statistics overview section
-        stats_frame = tk.LabelFrame(self.content_frame, text="Overview", 
+        stats_frame = tk.LabelFrame(frame, text="Overview", 
                                   bg='white', font=('Arial', 12, 'bold'))
         stats_frame.pack(fill=tk.X, pady=10, padx=5)
 
@@ -209,47 +171,27 @@ class AdminDashboard:
         for i in range(2):
             stats_frame.grid_columnconfigure(i, weight=1)
 
-        # to get statistics from database
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        
-        # to get total sales
-        cursor.execute('SELECT SUM(amount) FROM customers')
-        total_sales = cursor.fetchone()[0] or 0
-        
-        # to get active employees
-        cursor.execute('SELECT COUNT(*) FROM employees')
-        active_employees = cursor.fetchone()[0] or 0
-        
-        # to get total tickets sold
-        cursor.execute('SELECT SUM(quantity) FROM customers')
-        total_tickets = cursor.fetchone()[0] or 0
-        
-        # to get total pending refunds
-        cursor.execute('SELECT COUNT(*) FROM cancellations WHERE status="Pending"')
-        pending_refunds = cursor.fetchone()[0] or 0
-        
-        conn.close()
-
-        # to create statistic cards
+        # to create statistic cards, filled in once the overview has loaded
         stats_data = [
-            ("Total Sales", f"₱{total_sales:,.2f}", "#2196F3"),
-            ("Active Employees", str(active_employees), "#4CAF50"),
-            ("Total Tickets Sold", str(total_tickets), "#FF9800"),
-            ("Pending Refunds", str(pending_refunds), "#f44336")
+            ("Total Sales", "#2196F3"),
+            ("Active Employees", "#4CAF50"),
+            ("Total Tickets Sold", "#FF9800"),
+            ("Pending Refunds", "#f44336")
         ]
 
-        for idx, (label, value, color) in enumerate(stats_data):
+        stat_labels = {}
+        for idx, (label, color) in enumerate(stats_data):
             stat_card = tk.Frame(stats_frame, bg='white', relief='solid', bd=1)
             stat_card.grid(row=idx//2, column=idx%2, padx=10, pady=5, sticky='ew')
             
             tk.Label(stat_card, text=label, font=('Arial', 10), 
                     bg='white').pack(pady=2)
-            tk.Label(stat_card, text=value, font=('Arial', 16, 'bold'), 
-                    fg=color, bg='white').pack(pady=2)
+            stat_labels[label] = tk.Label(stat_card, text="…", font=('Arial', 16, 'bold'),
+                                          fg=color, bg='white')
+            stat_labels[label].pack(pady=2)
 
   
-        top_emp_frame = tk.LabelFrame(self.content_frame, text="Top Performing Employees", 
+        top_emp_frame = tk.LabelFrame(frame, text="Top Performing Employees", 
                                      bg='white', font=('Arial', 12, 'bold'))
         top_emp_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
 
@@ -278,32 +220,9 @@ class AdminDashboard:
         emp_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # Get top performing employees data
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                e.name,
-                SUM(c.quantity) as tickets_sold,
-                SUM(c.amount) as total_sales
-            FROM employees e
-            LEFT JOIN customers c ON e.employee_id = c.employee_id
-            GROUP BY e.employee_id, e.name
-            ORDER BY total_sales DESC
-            LIMIT 5
-        ''')
-        top_employees = cursor.fetchall()
-        conn.close()
-
-        # Insert data into table
-        for emp in top_employees:
-            name, tickets, sales = emp
-            formatted_sales = f"₱{sales:,.2f}" if sales else "₱0.00"
-            tickets = str(tickets) if tickets else "0"
-            emp_tree.insert('', tk.END, values=(name, tickets, formatted_sales))
 
         # Create Recent Sales section with controls
-        recent_sales_frame = tk.LabelFrame(self.content_frame, text="Recent Sales", 
+        recent_sales_frame = tk.LabelFrame(frame, text="Recent Sales", 
                                      bg='white', font=('Arial', 12, 'bold'))
         recent_sales_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=10)
 
@@ -349,48 +268,25 @@ class AdminDashboard:
         sales_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         sales_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)        
         
-        def load_recent_sales(sort_option):
-            sales_tree.delete(*sales_tree.get_children())
-            
-            sort_mapping = {
-                "Purchase Date (Latest)": "datetime(c.purchased_date) DESC",
-                "Purchase Date (Oldest)": "datetime(c.purchased_date) ASC",
-                "Amount (Highest)": "CAST(c.amount AS DECIMAL) DESC",
-                "Amount (Lowest)": "CAST(c.amount AS DECIMAL) ASC",
-                "Customer Name (A-Z)": "LOWER(c.name) ASC",
-                "Customer Name (Z-A)": "LOWER(c.name) DESC"
-            }
-            
-            sort_clause = sort_mapping.get(sort_option, "datetime(c.purchased_date) DESC")
-            
-            conn = sqlite3.connect('funpass.db')
-            cursor = conn.cursor()
-            cursor.execute(f'''
-                SELECT 
-                    c.ticket_id,
-                    c.name,
-                    c.email,
-                    c.pass_type,
-                    c.quantity,
-                    c.amount,
-                    strftime('%m/%d/%Y', c.booked_date) as booked_date,
-                    strftime('%m/%d/%Y', c.purchased_date) as purchased_date,
-                    COALESCE(e.name, 'N/A') as employee_name
-                FROM customers c
-                LEFT JOIN employees e ON c.employee_id = e.employee_id
-                ORDER BY {sort_clause}
-                LIMIT 5
-            ''')
-            recent_sales = cursor.fetchall()
-            conn.close()
-
-            for sale in recent_sales:
+        def show_overview(overview):
+            # to fill the cards and tables from one overview snapshot
+            stat_labels["Total Sales"].config(text=peso(overview.total_sales))
+            stat_labels["Active Employees"].config(text=str(overview.active_employees))
+            stat_labels["Total Tickets Sold"].config(text=str(overview.total_tickets))
+            stat_labels["Pending Refunds"].config(text=str(overview.pending_refunds))
+
+            for name, tickets, sales in overview.top_employees:
+                formatted_sales = peso(sales)
+                tickets = str(tickets) if tickets else "0"
+                emp_tree.insert('', tk.END, values=(name, tickets, formatted_sales))
+
+            for sale in overview.recent_sales:
                 formatted_values = list(sale)
-                formatted_values[5] = f"₱{float(sale[5]):,.2f}"  # Format amount
+                formatted_values[5] = peso(sale[5])  # Format amount
                 sales_tree.insert('', tk.END, values=formatted_values)
 
-        # Initial load of data
-        load_recent_sales("Purchase Date (Latest)")
+        # to paint the frame now and load the numbers on the worker thread
+        run_in_background(frame, db.overview, show_overview)
 
         # Continue with the rest of the dashboard...
 
@@ -407,10 +303,12 @@ class AdminDashboard:
             print(f"Error updating time: {e}")
 
     def show_rides(self):
-        self.clear_content()
-        
+        # to show the static pass descriptions, rebuilt only after an edit
+        self.screens.show('rides', self.build_rides)
+
+    def build_rides(self, frame):
         # to create main frame for rides
-        rides_frame = tk.Frame(self.content_frame, bg='white')
+        rides_frame = tk.Frame(frame, bg='white')
         rides_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
         # to create title frame
@@ -530,35 +428,36 @@ class AdminDashboard:
         pass_type_entry = tk.Entry(main_frame, font=('Arial', 11), width=40)
         pass_type_entry.pack(fill=tk.X, pady=(0, 15))
 
+        # to create price
+        tk.Label(main_frame, text="Price (₱):", font=('Arial', 11, 'bold'),
+                bg='white').pack(anchor='w', pady=(0, 5))
+        price_entry = tk.Entry(main_frame, font=('Arial', 11), width=40)
+        price_entry.pack(fill=tk.X, pady=(0, 15))
+
         # to create description
         tk.Label(main_frame, text="Description:", font=('Arial', 11, 'bold'), 
                 bg='white').pack(anchor='w', pady=(0, 5))
-        description_text = tk.Text(main_frame, font=('Arial', 11), height=15)
+        description_text = tk.Text(main_frame, font=('Arial', 11), height=12)
         description_text.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
 
         def save_new_ride():
-            pass_type = pass_type_entry.get().strip()
-            description = description_text.get("1.0", tk.END).strip()
-
-            if not pass_type or not description:
-                messagebox.showwarning("Invalid Input", 
-                                     "Please fill in both pass type and description.")
-                return
-
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('INSERT INTO rides (pass_type, description) VALUES (?, ?)',
-                             (pass_type, description))
-                conn.commit()
-                conn.close()
-                dialog.destroy()
-                self.show_rides()  # Refresh the rides page
-                messagebox.showinfo("Success", "New pass type added successfully!")
+                self.inventory.add_pass_type(pass_type_entry.get(), description_text.get("1.0", tk.END),
+                                             price_entry.get())
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
+                return
             except sqlite3.IntegrityError:
                 messagebox.showerror("Error", "This pass type already exists!")
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
+                return
+            dialog.destroy()
+            self.screens.invalidate('rides')  # Refresh the rides page
+            # to rebuild the employee table with a column for the new pass type
+            self.screens.discard('employees')
+            messagebox.showinfo("Success", "New pass type added successfully!")
 
         # to create buttons frame
         btn_frame = tk.Frame(main_frame, bg='white')
@@ -590,24 +489,17 @@ class AdminDashboard:
         description_text.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
 
         def save_changes():
-            new_description = description_text.get("1.0", tk.END).strip()
-
-            if not new_description:
-                messagebox.showwarning("Invalid Input", "Description cannot be empty.")
-                return
-
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('UPDATE rides SET description = ? WHERE pass_type = ?',
-                             (new_description, pass_type))
-                conn.commit()
-                conn.close()
-                dialog.destroy()
-                self.show_rides()  # Refresh the rides page
-                messagebox.showinfo("Success", "Description updated successfully!")
+                self.inventory.describe_pass_type(pass_type, description_text.get("1.0", tk.END))
+            except ValidationError as e:
+                messagebox.showwarning("Invalid Input", str(e))
+                return
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
+                return
+            dialog.destroy()
+            self.screens.invalidate('rides')  # Refresh the rides page
+            messagebox.showinfo("Success", "Description updated successfully!")
 
         # for buttons frame
         btn_frame = tk.Frame(main_frame, bg='white')
@@ -625,26 +517,24 @@ class AdminDashboard:
         if messagebox.askyesno("Confirm Delete", 
                               f"Are you sure you want to delete {pass_type}?"):
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM rides WHERE pass_type = ?', (pass_type,))
-                conn.commit()
-                conn.close()
-                self.show_rides()  
+                self.inventory.delete_pass_type(pass_type)
+                self.screens.invalidate('rides')
                 messagebox.showinfo("Success", "Pass type deleted successfully!")
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
     def show_employee_management(self):
-        self.clear_content()
-        
-        emp_title = tk.Label(self.content_frame, text="Employee Management", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        # to raise the cached page and reload its rows when they went stale
+        self.screens.show('employees', self.build_employee_management, refresh=self.reload_employees)
+
+    def build_employee_management(self, frame):
+        emp_title = tk.Label(frame, text="Employee Management", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         emp_title.pack(pady=(10, 0), padx=20, anchor='w')
-        emp_subtitle = tk.Label(self.content_frame, text="View, Add, Edit, and Delete Employees", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        emp_subtitle = tk.Label(frame, text="View, Add, Edit, and Delete Employees", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         emp_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
         # Controls frame
-        controls_frame = tk.Frame(self.content_frame, bg='white')
+        controls_frame = tk.Frame(frame, bg='white')
         controls_frame.pack(fill=tk.X, pady=10)
 
         # Search and sort beside each other
@@ -652,13 +542,12 @@ class AdminDashboard:
         search_sort_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
         tk.Label(search_sort_frame, text="Search:", bg='white').pack(side=tk.LEFT, padx=5)
         self.emp_search_var = tk.StringVar()
-        self.emp_search_var.trace('w', self.search_employees)
         search_entry = tk.Entry(search_sort_frame, textvariable=self.emp_search_var, font=('Arial', 11), width=40)
         search_entry.pack(side=tk.LEFT, padx=5)
         tk.Label(search_sort_frame, text="Sort by:", bg='white').pack(side=tk.LEFT, padx=5)
         sort_options = ttk.Combobox(search_sort_frame, values=["Name (A-Z)", "Name (Z-A)", "Username (A-Z)", "Username (Z-A)"])
         sort_options.pack(side=tk.LEFT, padx=5)
-        sort_options.set("Name (A-Z)")
+        sort_options.set(self.employee_sort)
         sort_options.bind('<<ComboboxSelected>>', lambda e: self.sort_employees(sort_options.get()))
 
         # Buttons frame
@@ -683,12 +572,11 @@ class AdminDashboard:
                              bg='#f44336', fg='white')
         delete_btn.pack(side=tk.LEFT, padx=5)
 
-        tree_frame = tk.Frame(self.content_frame)
+        tree_frame = tk.Frame(frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-        # Create employee table        
-        columns = ('ID', 'Name', 'Username', 'Password', 
-                  'Express Alloc', 'Junior Alloc', 'Regular Alloc', 
-                  'Student Alloc', 'PWD Alloc', 'Senior Alloc', 'Month Sales')
+        # Create employee table with an allocation column per pass type
+        self.emp_pass_types = db.pass_types()
+        columns = ('ID', 'Name', 'Username', 'Password', *self.emp_pass_types, 'Month Sales')
 
         self.emp_tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
         
@@ -705,15 +593,10 @@ class AdminDashboard:
         self.emp_tree.column('Password', width=100, anchor='w')
         
         # Configure allocation columns with centered text
-        alloc_columns = [
-            ('Express Alloc', 'Express'), ('Junior Alloc', 'Junior'),
-            ('Regular Alloc', 'Regular'), ('Student Alloc', 'Student'),
-            ('PWD Alloc', 'PWD'), ('Senior Alloc', 'Senior')
-        ]
-        
-        for col, header in alloc_columns:
-            self.emp_tree.heading(col, text=f'{header}\nAllocation')
-            self.emp_tree.column(col, width=80, anchor='center')
+        for pass_type in self.emp_pass_types:
+            header = pass_type.replace(' Pass', '')
+            self.emp_tree.heading(pass_type, text=f'{header}\nAllocation')
+            self.emp_tree.column(pass_type, width=80, anchor='center')
 
         self.emp_tree.pack(fill=tk.BOTH, expand=True, pady=10)
 
@@ -725,6 +608,9 @@ class AdminDashboard:
         self.emp_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+        # to search employees in the background as the user types
+        DebouncedSearch(self.emp_tree, self.emp_search_var, self.search_employees, self.show_employee_matches)
+
         # Load employee data
         self.load_employees()
 
@@ -770,21 +656,12 @@ class AdminDashboard:
         alloc_frame = tk.LabelFrame(main_frame, text="Ticket Allocation", bg='white', pady=10, padx=10)
         alloc_frame.pack(fill=tk.X)
 
-        # Ticket allocation fields
-        alloc_fields = [
-            ('Express Pass:', 'express'),
-            ('Junior Pass:', 'junior'),
-            ('Regular Pass:', 'regular'),
-            ('Student Pass:', 'student'),
-            ('PWD Pass:', 'pwd'),
-            ('Senior Pass:', 'senior')
-        ]
-
+        # Ticket allocation fields, one per pass type
         alloc_entries = {}
-        for label_text, field_name in alloc_fields:
+        for pass_type in db.pass_types():
             field_frame = tk.Frame(alloc_frame, bg='white')
             field_frame.pack(fill=tk.X, pady=5)
-            label = tk.Label(field_frame, text=label_text, bg='white', font=('Arial', 11), width=12, anchor='e')
+            label = tk.Label(field_frame, text=f"{pass_type}:", bg='white', font=('Arial', 11), width=18, anchor='e')
             label.pack(side=tk.LEFT, padx=(0, 10))
 
             # Create spinbox for ticket quantity with default value 0 and hint behavior
@@ -804,7 +681,7 @@ class AdminDashboard:
             spinbox.bind("<FocusIn>", on_focus_in)
             spinbox.bind("<FocusOut>", on_focus_out)
 
-            alloc_entries[field_name] = spinbox
+            alloc_entries[pass_type] = spinbox
 
         # Set values if editing
         if mode == "edit":
@@ -813,89 +690,32 @@ class AdminDashboard:
             basic_entries['password'].insert(0, values[3])
             
             # Set allocation values
-            alloc_entries['express'].delete(0, tk.END)
-            alloc_entries['express'].insert(0, values[4])
-            alloc_entries['junior'].delete(0, tk.END)
-            alloc_entries['junior'].insert(0, values[5])
-            alloc_entries['regular'].delete(0, tk.END)
-            alloc_entries['regular'].insert(0, values[6])
-            alloc_entries['student'].delete(0, tk.END)
-            alloc_entries['student'].insert(0, values[7])
-            alloc_entries['pwd'].delete(0, tk.END)
-            alloc_entries['pwd'].insert(0, values[8])
-            alloc_entries['senior'].delete(0, tk.END)
-            alloc_entries['senior'].insert(0, values[9])
+            allocations = db.employee_allocations(values[0])
+            for pass_type, spinbox in alloc_entries.items():
+                spinbox.delete(0, tk.END)
+                spinbox.insert(0, allocations.get(pass_type, 0))
 
         def save_employee():
-            # Get values from entries
-            employee_data = {
-                'name': basic_entries['name'].get().strip(),
-                'username': basic_entries['username'].get().strip(),
-                'password': basic_entries['password'].get().strip(),
-                'express': int(alloc_entries['express'].get()),
-                'junior': int(alloc_entries['junior'].get()),
-                'regular': int(alloc_entries['regular'].get()),
-                'student': int(alloc_entries['student'].get()),
-                'pwd': int(alloc_entries['pwd'].get()),
-                'senior': int(alloc_entries['senior'].get())
-            }
-
-            # Validate inputs
-            if not all([employee_data['name'], employee_data['username'], employee_data['password']]):
-                messagebox.showerror("Error", "Name, username and password are required!")
-                return
-                
-            # Validate ticket allocations
-            for field in ['express', 'junior', 'regular', 'student', 'pwd', 'senior']:
-                if not str(employee_data[field]).isdigit() or int(employee_data[field]) < 0:
-                    messagebox.showerror("Error", f"Invalid ticket quantity for {field} pass!")
-                    return
-
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                
-                if mode == "add":
-                    employee_id = self.generate_unique_employee_id()
-                    cursor.execute('''
-                        INSERT INTO employees (
-                            employee_id, name, username, password, express_pass, junior_pass,
-                            regular_pass, student_pass, pwd_pass, senior_citizen_pass
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        employee_id,
-                        employee_data['name'], employee_data['username'],
-                        employee_data['password'], employee_data['express'],
-                        employee_data['junior'], employee_data['regular'],
-                        employee_data['student'], employee_data['pwd'],
-                        employee_data['senior']
-                    ))
-                else:  # edit mode
-                    cursor.execute('''
-                        UPDATE employees SET
-                            name=?, username=?, password=?, express_pass=?,
-                            junior_pass=?, regular_pass=?, student_pass=?,
-                            pwd_pass=?, senior_citizen_pass=?
-                        WHERE employee_id=?
-                    ''', (
-                        employee_data['name'], employee_data['username'],
-                        employee_data['password'], employee_data['express'],
-                        employee_data['junior'], employee_data['regular'],
-                        employee_data['student'], employee_data['pwd'],
-                        employee_data['senior'], values[0]
-                    ))
-
-                conn.commit()
-                messagebox.showinfo("Success", 
-                                  "Employee saved successfully!")
-                dialog.destroy()
-                self.load_employees()  
+                self.inventory.save_employee(
+                    None if mode == "add" else values[0],
+                    basic_entries['name'].get(), basic_entries['username'].get(),
+                    basic_entries['password'].get(),
+                    {pass_type: spinbox.get() for pass_type, spinbox in alloc_entries.items()})
+            except ValidationError as e:
+                messagebox.showerror("Error", str(e))
+                return
             except sqlite3.IntegrityError:
                 messagebox.showerror("Error", "Username already exists!")
+                return
             except sqlite3.Error as e:
                 messagebox.showerror("Error", f"Database error: {str(e)}")
-            finally:
-                conn.close()
+                return
+
+            messagebox.showinfo("Success",
+                              "Employee saved successfully!")
+            dialog.destroy()
+            self.load_employees()
 
         # Create buttons frame
         btn_frame = tk.Frame(main_frame, bg='white')
@@ -916,75 +736,37 @@ class AdminDashboard:
                              "Are you sure you want to delete this employee?"):
             employee_id = self.emp_tree.item(selected_items[0])['values'][0]
 
-            conn = sqlite3.connect('funpass.db')
-            cursor = conn.cursor()
             try:
-                cursor.execute('DELETE FROM employees WHERE employee_id = ?', 
-                             (employee_id,))
-                conn.commit()
+                self.inventory.delete_employee(employee_id)
                 self.emp_tree.delete(selected_items[0])
                 messagebox.showinfo("Success", "Employee deleted successfully!")
             except sqlite3.Error as e:
                 messagebox.showerror("Error", f"Database error: {str(e)}")
-            finally:
-                conn.close()    
     
+    def employee_rows(self, search_text=''):
+        # to build the table rows from one employees query and one allocations query
+        order_by = self.EMPLOYEE_SORTS.get(self.employee_sort, self.EMPLOYEE_SORTS["Name (A-Z)"])
+        return self.inventory.employee_rows(order_by, self.emp_pass_types, search_text)
+
     def load_employees(self):
         # to clear existing items
-        for item in self.emp_tree.get_children():
-            self.emp_tree.delete(item)
-            
-        # to load from database
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()        # First get all employees and their basic info
-        cursor.execute('SELECT * FROM employees')
-        employees = cursor.fetchall()
-        
-        # Then get the monthly sales for each employee
-        for emp in employees:
-            employee_id = emp[0]
-            # Get monthly sales
-            cursor.execute('''
-                SELECT COALESCE(SUM(amount), 0) 
-                FROM customers 
-                WHERE employee_id = ? 
-                AND strftime('%Y-%m', purchased_date) = strftime('%Y-%m', 'now')
-            ''', (employee_id,))
-            monthly_sales = cursor.fetchone()[0] or 0
-            
-            # Get approved refunds for this month
-            cursor.execute('''
-                SELECT COALESCE(SUM(amount), 0)
-                FROM cancellations
-                WHERE ticket_id IN (
-                    SELECT ticket_id 
-                    FROM customers 
-                    WHERE employee_id = ?
-                )
-                AND status = 'Approved'
-                AND strftime('%Y-%m', purchased_date) = strftime('%Y-%m', 'now')
-            ''', (employee_id,))
-            refunds = cursor.fetchone()[0] or 0
-            
-            # Calculate net monthly sales
-            net_monthly_sales = monthly_sales - refunds
-              # Create list of values for treeview
-            emp_list = list(emp)
-            emp_list.append(f"₱{net_monthly_sales:,.2f}")  # Add monthly sales at the end
-            
-            # Insert into treeview
+        self.emp_tree.delete(*self.emp_tree.get_children())
+
+        # to load employees with their allocations and net monthly sales
+        for emp_list in self.employee_rows():
             self.emp_tree.insert('', tk.END, values=emp_list)
-            
-        conn.close()
 
     def show_customers(self):
-        self.clear_content()
-        customer_title = tk.Label(self.content_frame, text="Customers", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        # to raise the cached page and reload its rows when they went stale
+        self.screens.show('customers', self.build_customers, refresh=lambda: self.customers_table.reload())
+
+    def build_customers(self, frame):
+        customer_title = tk.Label(frame, text="Customers", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         customer_title.pack(pady=(10, 0), padx=20, anchor='w')
-        customer_subtitle = tk.Label(self.content_frame, text="View All Customers and Ticket Sales", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        customer_subtitle = tk.Label(frame, text="View All Customers and Ticket Sales", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         customer_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
-        controls_frame = tk.Frame(self.content_frame, bg='white')
+        controls_frame = tk.Frame(frame, bg='white')
         controls_frame.pack(fill=tk.X, pady=10)
 
         # Search and sort beside each other
@@ -992,13 +774,12 @@ class AdminDashboard:
         search_sort_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
         tk.Label(search_sort_frame, text="Search:", bg='white').pack(side=tk.LEFT, padx=5)
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.search_customers)
         search_entry = tk.Entry(search_sort_frame, textvariable=self.search_var, font=('Arial', 11), width=40)
         search_entry.pack(side=tk.LEFT, padx=5)
         tk.Label(search_sort_frame, text="Sort by:", bg='white').pack(side=tk.LEFT, padx=5)
         sort_options = ttk.Combobox(search_sort_frame, values=["Name (A-Z)", "Name (Z-A)", "Date (Newest)", "Date (Oldest)"])
         sort_options.pack(side=tk.LEFT, padx=5)
-        sort_options.set("Name (A-Z)")
+        sort_options.set(self.customer_sort)
         sort_options.bind('<<ComboboxSelected>>', lambda e: self.sort_customers(sort_options.get()))
 
         # Add buttons frame
@@ -1011,7 +792,7 @@ class AdminDashboard:
                              bg='#f44336', fg='white')
         delete_btn.pack(side=tk.LEFT, padx=5)
 
-        tree_frame = tk.Frame(self.content_frame)
+        tree_frame = tk.Frame(frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
         columns = ('Ticket ID', 'Name', 'Email', 'Pass Type', 'Quantity', 'Amount', 'Booked Date', 'Purchased Date', 'Employee')
@@ -1022,76 +803,52 @@ class AdminDashboard:
             self.customers_tree.column(col, width=120)
 
         scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.customers_tree.yview)
-        self.customers_tree.configure(yscrollcommand=scrollbar.set)
+        # to fetch customers a page at a time as the table scrolls
+        self.customers_table = PagedTreeview(self.customers_tree, scrollbar)
 
         self.customers_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+        # to search customers in the background as the user types
+        DebouncedSearch(self.customers_tree, self.search_var, self.search_customers, self.show_customer_matches)
+
         self.load_customers_data()
 
-    def search_customers(self, *args):
-        search_text = self.search_var.get().lower()
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''SELECT c.ticket_id, c.name, c.email, c.pass_type, c.quantity, c.amount, \
-                    strftime('%m/%d/%Y', c.booked_date) as booked_date, \
-                    strftime('%m/%d/%Y', c.purchased_date) as purchased_date, \
-                    IFNULL(e.name, '') as employee_name \
-                    FROM customers c \
-                    LEFT JOIN employees e ON c.employee_id = e.employee_id''')
-        customers = cursor.fetchall()
-        conn.close()
-        for customer in customers:
-            if any(search_text in str(value).lower() for value in customer):
-                self.customers_tree.insert('', tk.END, values=customer)
+    def customer_pages(self, search_text):
+        """Return a fetch_page for the customers matching search_text, in the chosen order."""
+        sort = self.CUSTOMER_SORTS.get(self.customer_sort, self.CUSTOMER_SORTS["Name (A-Z)"])
+        return db.customer_pages(self.CUSTOMER_COLUMNS, sort, search_text, tables=self.CUSTOMER_TABLES)
+
+    def search_customers(self, search_text):
+        # runs on the search worker, which also fetches the first page
+        fetch_page = self.customer_pages(search_text)
+        return fetch_page, fetch_page()
+
+    def show_customer_matches(self, result):
+        self.customers_table.show(*result)
 
     def sort_customers(self, sort_option):
-        items = []
-        for item in self.customers_tree.get_children():
-            values = self.customers_tree.item(item)['values']
-            items.append(values)
-        if sort_option == "Name (A-Z)":
-            items.sort(key=lambda x: x[1])
-        elif sort_option == "Name (Z-A)":
-            items.sort(key=lambda x: x[1], reverse=True)
-        elif sort_option == "Date (Newest)":
-            items.sort(key=lambda x: x[7], reverse=True)
-        elif sort_option == "Date (Oldest)":
-            items.sort(key=lambda x: x[7])
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        for item in items:
-            self.customers_tree.insert('', tk.END, values=item)
+        # to let the database sort, then reload the table from the top
+        self.customer_sort = sort_option
+        self.load_customers_data()
 
     def load_customers_data(self):
-        for item in self.customers_tree.get_children():
-            self.customers_tree.delete(item)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''SELECT c.ticket_id, c.name, c.email, c.pass_type, c.quantity, c.amount, \
-                    strftime('%m/%d/%Y', c.booked_date) as booked_date, \
-                    strftime('%m/%d/%Y', c.purchased_date) as purchased_date, \
-                    IFNULL(e.name, '') as employee_name \
-                    FROM customers c \
-                    LEFT JOIN employees e ON c.employee_id = e.employee_id''')
-        customers = cursor.fetchall()
-        conn.close()
-        for customer in customers:
-            self.customers_tree.insert('', tk.END, values=customer)
+        # to show the first page of customers matching the search box
+        self.customers_table.show(self.customer_pages(self.search_var.get()))
 
     def show_cancellations(self):
-        self.clear_content()
-        
+        # to raise the cached page and reload its rows when they went stale
+        self.screens.show('cancellations', self.build_cancellations, refresh=lambda: self.cancellations_table.reload())
+
+    def build_cancellations(self, frame):
         # to add cancellations and refunds title and subtitle
-        cancel_title = tk.Label(self.content_frame, text="Cancellations and Refunds", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        cancel_title = tk.Label(frame, text="Cancellations and Refunds", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         cancel_title.pack(pady=(10, 0), padx=20, anchor='w')
-        cancel_subtitle = tk.Label(self.content_frame, text="View and Manage Customers Submitted Refund Requests", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        cancel_subtitle = tk.Label(frame, text="View and Manage Customers Submitted Refund Requests", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         cancel_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
         # to create top controls frame
-        controls_frame = tk.Frame(self.content_frame, bg='white')
+        controls_frame = tk.Frame(frame, bg='white')
         controls_frame.pack(fill=tk.X, pady=10)
 
         # to add search functionality
@@ -1100,14 +857,13 @@ class AdminDashboard:
 
         tk.Label(search_frame, text="Search:", bg='white').pack(side=tk.LEFT, padx=5)
         self.cancel_search_var = tk.StringVar()
-        self.cancel_search_var.trace('w', self.search_cancellations)
         search_entry = tk.Entry(search_frame, textvariable=self.cancel_search_var, 
                               font=('Arial', 11), width=30)
         search_entry.pack(side=tk.LEFT, padx=5)
         tk.Label(search_frame, text="Sort by:", bg='white').pack(side=tk.LEFT, padx=5)
         sort_options = ttk.Combobox(search_frame, values=["Name (A-Z)", "Name (Z-A)", "Date (Newest)", "Date (Oldest)", "Status (A-Z)", "Status (Z-A)"])
         sort_options.pack(side=tk.LEFT, padx=5)
-        sort_options.set("Name (A-Z)")
+        sort_options.set(self.cancellation_sort)
         sort_options.bind('<<ComboboxSelected>>', lambda e: self.sort_cancellations(sort_options.get()))
 
         # to create buttons frame
@@ -1126,7 +882,7 @@ class AdminDashboard:
                              bg='#f44336', fg='white')
         delete_btn.pack(side=tk.LEFT, padx=5)
 
-        tree_frame = tk.Frame(self.content_frame)
+        tree_frame = tk.Frame(frame)
         tree_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
         # Define columns
@@ -1155,11 +911,16 @@ class AdminDashboard:
 
 
         scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.cancellations_tree.yview)
-        self.cancellations_tree.configure(yscrollcommand=scrollbar.set)
+        # to fetch cancellations a page at a time as the table scrolls
+        self.cancellations_table = PagedTreeview(self.cancellations_tree, scrollbar)
 
         self.cancellations_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+        # to search cancellations in the background as the user types
+        DebouncedSearch(self.cancellations_tree, self.cancel_search_var, self.search_cancellations,
+                        self.show_cancellation_matches)
+
         # to load initial data
         self.load_cancellations_data()
 
@@ -1200,12 +961,11 @@ class AdminDashboard:
             new_status = status_var.get()
             if new_status != current_values[8]:
                 # to update database
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                cursor.execute('UPDATE cancellations SET status = ? WHERE ticket_id = ?',
-                             (new_status, current_values[0]))
-                conn.commit()
-                conn.close()
+                try:
+                    self.cancellation_requests.set_status(current_values[0], new_status)
+                except ValidationError as e:
+                    messagebox.showerror("Error", str(e))
+                    return
 
                 # to update treeview
                 new_values = list(current_values)
@@ -1236,102 +996,55 @@ class AdminDashboard:
             ticket_id = self.cancellations_tree.item(selected_item[0])['values'][0]
 
             # to delete from database
-            conn = sqlite3.connect('funpass.db')
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM cancellations WHERE ticket_id = ?', (ticket_id,))
-            conn.commit()
-            conn.close()
+            self.cancellation_requests.delete(ticket_id)
 
             # to remove from treeview
             self.cancellations_tree.delete(selected_item[0])
             messagebox.showinfo("Success", "Cancellation record deleted successfully!")
 
-    def search_cancellations(self, *args):
-        search_text = self.cancel_search_var.get().lower()
-        for item in self.cancellations_tree.get_children():
-            self.cancellations_tree.delete(item)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''        SELECT ticket_id, name, email, pass_type, reasons, quantity, amount,
-            strftime('%m/%d/%Y', booked_date) as booked_date, 
-            strftime('%m/%d/%Y', purchased_date) as purchased_date,
-            status
-        FROM cancellations
-        ''')
-        cancellations = cursor.fetchall()
-        conn.close()
-        for cancellation in cancellations:
-            searchable_fields = [
-                str(cancellation[0]),  # ticket_id
-                str(cancellation[1]),  # name
-                str(cancellation[2]),  # email
-                str(cancellation[9])   # status
-            ]
-            if any(search_text in field.lower() for field in searchable_fields):
-                self.cancellations_tree.insert('', tk.END, values=cancellation)
+    def cancellation_pages(self, search_text):
+        """Return a fetch_page for the cancellations matching search_text, in the chosen order."""
+        sort = self.CANCELLATION_SORTS.get(self.cancellation_sort, self.CANCELLATION_SORTS["Name (A-Z)"])
+        return db.cancellation_pages(self.CANCELLATION_COLUMNS, sort, search_text)
+
+    def search_cancellations(self, search_text):
+        # runs on the search worker, which also fetches the first page
+        fetch_page = self.cancellation_pages(search_text)
+        return fetch_page, fetch_page()
+
+    def show_cancellation_matches(self, result):
+        self.cancellations_table.show(*result)
 
     def sort_cancellations(self, sort_option):
-        items = []
-        for item in self.cancellations_tree.get_children():
-            values = self.cancellations_tree.item(item)['values']
-            items.append(values)
-        if sort_option == "Name (A-Z)":
-            items.sort(key=lambda x: x[1])
-        elif sort_option == "Name (Z-A)":
-            items.sort(key=lambda x: x[1], reverse=True)
-        elif sort_option == "Date (Newest)":
-            items.sort(key=lambda x: x[8], reverse=True)
-        elif sort_option == "Date (Oldest)":
-            items.sort(key=lambda x: x[8])
-        elif sort_option == "Status (A-Z)":
-            items.sort(key=lambda x: x[9])
-        elif sort_option == "Status (Z-A)":
-            items.sort(key=lambda x: x[9], reverse=True)
-        for item in self.cancellations_tree.get_children():
-            self.cancellations_tree.delete(item)
-        for item in items:
-            self.cancellations_tree.insert('', tk.END, values=item)
+        # to let the database sort, then reload the table from the top
+        self.cancellation_sort = sort_option
+        self.load_cancellations_data()
 
     def load_cancellations_data(self):
-        for item in self.cancellations_tree.get_children():
-            self.cancellations_tree.delete(item)
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('''            SELECT ticket_id, name, email, pass_type, reasons, quantity, amount,
-                strftime('%m/%d/%Y', booked_date) as booked_date, 
-                strftime('%m/%d/%Y', purchased_date) as purchased_date,
-                status
-            FROM cancellations
-            ORDER BY id DESC
-        ''')
-        cancellations = cursor.fetchall()
-        conn.close()
-        for cancellation in cancellations:
-            self.cancellations_tree.insert('', tk.END, values=cancellation)
+        # to show the first page of cancellations matching the search box
+        self.cancellations_table.show(self.cancellation_pages(self.cancel_search_var.get()))
 
     def show_pricing(self):
-        self.clear_content()
-        
+        # to rebuild the price form only after prices changed
+        self.screens.show('pricing', self.build_pricing)
+
+    def build_pricing(self, frame):
         # Add pass type pricing title and subtitle
-        pricing_title = tk.Label(self.content_frame, text="Pass Type Pricing", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        pricing_title = tk.Label(frame, text="Pass Type Pricing", font=('Arial', 16, 'bold'), bg='white', anchor='w')
         pricing_title.pack(pady=(10, 0), padx=20, anchor='w')
         
-        self.price_update_label = tk.Label(self.content_frame, text="", font=('Arial', 10), fg='#4CAF50', bg='white', anchor='w')
+        self.price_update_label = tk.Label(frame, text="", font=('Arial', 10), fg='#4CAF50', bg='white', anchor='w')
         self.price_update_label.pack(pady=(5, 0), padx=20, anchor='w')
         
-        pricing_subtitle = tk.Label(self.content_frame, text="View and Manage Ticketing Pricing", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        pricing_subtitle = tk.Label(frame, text="View and Manage Ticketing Pricing", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
         pricing_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
 
         # Create main frame for pricing
-        main_frame = tk.Frame(self.content_frame, bg='white')
+        main_frame = tk.Frame(frame, bg='white')
         main_frame.pack(fill=tk.BOTH, expand=True, padx=50, pady=20)
 
         # Get current prices from database
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM pricing')
-        prices = cursor.fetchall()
-        conn.close()
+        prices = db.query('SELECT * FROM pricing')
 
         # Store entry widgets
         self.price_entries = {}
@@ -1399,7 +1112,7 @@ class AdminDashboard:
             entry.bind('<KeyRelease>', on_invalid_input)
 
         # Create buttons frame
-        btn_frame = tk.Frame(self.content_frame, bg='white')
+        btn_frame = tk.Frame(frame, bg='white')
         btn_frame.pack(pady=20)
 
         # Create save button
@@ -1423,98 +1136,103 @@ class AdminDashboard:
 
     def save_prices(self):
         try:
-            # Validate that all prices are valid numbers and store them
-            new_prices = {}
-            for pass_type, price_var in self.price_entries.items():
-                try:
-                    # Remove any commas and spaces from the price string
-                    price_str = price_var.get().replace(',', '').replace(' ', '')
-                    price = float(price_str)
-                    if price < 0:
-                        raise ValueError(f"Price for {pass_type} cannot be negative")
-                    new_prices[pass_type] = price
-                except ValueError as e:
-                    messagebox.showerror("Invalid Input", str(e))
-                    return False
-
-            # Start database transaction
-            conn = sqlite3.connect('funpass.db')
-            try:
-                cursor = conn.cursor()
-                # Begin transaction
-                cursor.execute('BEGIN')
-
-                for pass_type, price in new_prices.items():
-                    # Update price in database
-                    cursor.execute('UPDATE pricing SET price = ? WHERE pass_type = ?',
-                                 (price, pass_type))
-                    # Update the entry display with the formatted price
-                    self.price_entries[pass_type].set(f"{price:.2f}")
-                
-                # Commit transaction
-                conn.commit()
-
-                # Generate price update event
-                if hasattr(self, 'root') and self.root:
-                    print("Generating price update event")  # Debug print
-                    self.root.event_generate('<<PriceUpdate>>')
-                    print("Price update event generated successfully")  # Debug print
-                
-                messagebox.showinfo("Success", "Prices updated successfully!")
-                return True
-
-            except sqlite3.Error as e:
-                # Rollback on error
-                conn.rollback()
-                messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
-                return False
-            finally:
-                conn.close()
-
+            # to validate and save every price in one transaction
+            new_prices = self.pricing.update({pass_type: price_var.get()
+                                              for pass_type, price_var in self.price_entries.items()})
+        except ValidationError as e:
+            messagebox.showerror("Invalid Input", str(e))
+            return False
+        except sqlite3.Error as e:
+            messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+            return False
         except Exception as e:
             messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
             return False
 
+        # Update the entry display with the formatted price
+        for pass_type, price in new_prices.items():
+            self.price_entries[pass_type].set(f"{price:.2f}")
+
+        # Employee dashboards hear about the change through the change log
+        messagebox.showinfo("Success", "Prices updated successfully!")
+        return True
+
     def reset_prices(self):
         if messagebox.askyesno("Confirm Reset", 
                              "Are you sure you want to reset to default prices?"):
-            default_prices = {
-                'Express Pass': 2300.00,
-                'Junior Pass': 900.00,
-                'Regular Pass': 1300.00,
-                'Student Pass': 1300.00,
-                'Senior Citizen Pass': 900.00,
-                'PWD Pass': 900.00
-            }
+            # Save to database
+            try:
+                default_prices = self.pricing.reset()
+            except sqlite3.Error as e:
+                messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+                return
 
             # Update entry fields
             for pass_type, price in default_prices.items():
                 if pass_type in self.price_entries:
                     self.price_entries[pass_type].set(f"{price:.2f}")
 
-            # Save to database
-            try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                
-                for pass_type, price in default_prices.items():
-                    cursor.execute('UPDATE pricing SET price = ? WHERE pass_type = ?',
-                                 (price, pass_type))
-                
-                conn.commit()
-                conn.close()
-                
-                # Notify employee dashboard to refresh prices
-                self.notify_price_update()
-                
-                messagebox.showinfo("Success", "Prices reset to default values!")
-            except sqlite3.Error as e:
-                messagebox.showerror("Database Error", f"An error occurred: {str(e)}")
+            messagebox.showinfo("Success", "Prices reset to default values!")
+
+    def show_query_stats(self):
+        # to reread the counters on every visit
+        self.screens.show('query_stats', self.build_query_stats, refresh=self.load_query_stats, max_age=0)
+
+    def build_query_stats(self, frame):
+        stats_title = tk.Label(frame, text="Query Stats", font=('Arial', 16, 'bold'), bg='white', anchor='w')
+        stats_title.pack(pady=(10, 0), padx=20, anchor='w')
+        stats_subtitle = tk.Label(frame, text="Time Spent per Database Statement in This Session", font=('Arial', 12), fg='#6b7280', bg='white', anchor='w')
+        stats_subtitle.pack(pady=(0, 10), padx=20, anchor='w')
+
+        # to create buttons
+        buttons_frame = tk.Frame(frame, bg='white')
+        buttons_frame.pack(fill=tk.X, pady=10)
+        tk.Button(buttons_frame, text="Refresh", command=self.load_query_stats,
+                 bg='#2196F3', fg='white', font=('Arial', 11)).pack(side=tk.LEFT, padx=5)
+        tk.Button(buttons_frame, text="Reset", command=lambda: (query_stats.reset(), self.load_query_stats()),
+                 bg='#f44336', fg='white', font=('Arial', 11)).pack(side=tk.LEFT, padx=5)
+        slow_text = (f"Slow query log: {query_stats.slow_ms:g} ms and over" if query_stats.slow_ms
+                     else "Slow query log is off (set FUNPASS_SLOW_QUERY_MS)")
+        tk.Label(buttons_frame, text=slow_text, font=('Arial', 10), fg='#6b7280', bg='white').pack(side=tk.LEFT, padx=15)
 
-    def notify_price_update(self):
-        # Call refresh prices on all employee dashboards
-        if hasattr(self, 'root') and self.root:
-            self.root.event_generate('<<PriceUpdate>>')
+        # to list statements by total time, largest first
+        tree_frame = tk.Frame(frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        columns = ('Screen', 'Calls', 'Total ms', 'p50 ms', 'p99 ms', 'Max ms', 'Rows', 'Statement')
+        self.query_stats_tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        for col in columns:
+            self.query_stats_tree.heading(col, text=col)
+            self.query_stats_tree.column(col, width=600 if col == 'Statement' else 90,
+                                         anchor='w' if col in ('Screen', 'Statement') else 'e')
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.query_stats_tree.yview)
+        self.query_stats_tree.configure(yscrollcommand=scrollbar.set)
+        self.query_stats_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # to show slow statements with their query plans
+        slow_frame = tk.LabelFrame(frame, text="Slow Queries", bg='white', font=('Arial', 12, 'bold'))
+        slow_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        self.slow_queries_text = tk.Text(slow_frame, font=('Courier', 10), height=12, wrap='none')
+        self.slow_queries_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.load_query_stats()
+
+    def load_query_stats(self):
+        self.query_stats_tree.delete(*self.query_stats_tree.get_children())
+        for screen, statement, stats in query_stats.snapshot():
+            self.query_stats_tree.insert('', tk.END, values=(
+                screen or '-', stats.calls, f"{stats.total * 1000:.1f}", stats.percentile(0.5),
+                stats.percentile(0.99), f"{stats.max * 1000:.2f}", stats.rows, statement))
+
+        self.slow_queries_text.config(state='normal')
+        self.slow_queries_text.delete('1.0', tk.END)
+        for entry in reversed(query_stats.slow_queries()):
+            self.slow_queries_text.insert(tk.END, f"{entry['at']}  {entry['screen'] or '-'}  "
+                                                  f"{entry['ms']} ms, {entry['rows']} rows\n{entry['statement']}\n")
+            for detail in entry['plan']:
+                self.slow_queries_text.insert(tk.END, f"    {detail}\n")
+            self.slow_queries_text.insert(tk.END, "\n")
+        self.slow_queries_text.config(state='disabled')
 
     def logout(self):
         if messagebox.askyesno("Logout", "Are you sure you want to logout?"):
@@ -1522,49 +1240,40 @@ class AdminDashboard:
             from login import show_login
             show_login()
 
-    def search_employees(self, *args):
-        search_text = self.emp_search_var.get().lower()
-        
+    def search_employees(self, search_text):
+        # runs on the search worker; None means the box is empty
+        search_text = search_text.lower()
+        if not search_text:
+            return None
+
+        # to search all fields of the employees, in the chosen order
+        return self.employee_rows(search_text)
+
+    def show_employee_matches(self, employees):
+        if employees is None:
+            self.load_employees()
+            return
+
         # to clear current display
-        for item in self.emp_tree.get_children():
-            self.emp_tree.delete(item)
-            
-        # to get all employees from database   
-        conn = sqlite3.connect('funpass.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM employees')
-        employees = cursor.fetchall()
-        conn.close()
-        
-        # to filter and display matching employees
+        self.emp_tree.delete(*self.emp_tree.get_children())
+
+        # to display matching employees
         for employee in employees:
-            # to search in all fields
-            if any(search_text in str(value).lower() for value in employee):
-                self.emp_tree.insert('', tk.END, values=employee)
+            self.emp_tree.insert('', tk.END, values=employee)
+
+    def reload_employees(self):
+        # to reload the table, keeping the current search, scroll position and selection
+        selected = {self.emp_tree.item(item)['values'][0] for item in self.emp_tree.selection()}
+        top = self.emp_tree.yview()[0]
+        self.show_employee_matches(self.search_employees(self.emp_search_var.get()))
+        self.emp_tree.selection_set([item for item in self.emp_tree.get_children()
+                                     if self.emp_tree.item(item)['values'][0] in selected])
+        self.emp_tree.yview_moveto(top)
 
     def sort_employees(self, sort_option):
-        # to get all items
-        items = []
-        for item in self.emp_tree.get_children():
-            values = self.emp_tree.item(item)['values']
-            items.append(values)
-
-        # to sort based on selected option
-        if sort_option == "Name (A-Z)":
-            items.sort(key=lambda x: x[1])  # to sort by name ascending
-        elif sort_option == "Name (Z-A)":
-            items.sort(key=lambda x: x[1], reverse=True)  # to sort by name descending
-        elif sort_option == "Username (A-Z)":
-            items.sort(key=lambda x: x[2])  # to sort by username ascending
-        elif sort_option == "Username (Z-A)":
-            items.sort(key=lambda x: x[2], reverse=True)  # to sort by username descending
-
-        # to clear and reload table
-        for item in self.emp_tree.get_children():
-            self.emp_tree.delete(item)
-        
-        for item in items:
-            self.emp_tree.insert('', tk.END, values=item)
+        # to let the database sort, then reload the table or the current search
+        self.employee_sort = sort_option
+        self.show_employee_matches(self.search_employees(self.emp_search_var.get()))
 
     def delete_customer(self):
         selected_item = self.customers_tree.selection()
@@ -1579,15 +1288,8 @@ class AdminDashboard:
             ticket_id = self.customers_tree.item(selected_item[0])['values'][0]
 
             try:
-                conn = sqlite3.connect('funpass.db')
-                cursor = conn.cursor()
-                
                 # Delete the customer record
-                cursor.execute('DELETE FROM customers WHERE ticket_id = ?', (ticket_id,))
-                
-                # Commit changes and close connection
-                conn.commit()
-                conn.close()
+                self.sales.delete(ticket_id)
 
                 # Remove from treeview
                 self.customers_tree.delete(selected_item[0])
@@ -0,0 +1,679 @@
+"""
+Versioned schema migrations for funpass.db.
+
+The schema version lives in PRAGMA user_version. migrate() applies every
+step newer than that version, each in its own BEGIN IMMEDIATE transaction,
+so a terminal that starts while another one is migrating simply waits and
+then finds nothing left to do.
+"""
+from datetime import datetime
+
+import database as db
+
+DEFAULT_PRICES = [
+    ('Express Pass', 2300.00),
+    ('Junior Pass', 900.00),
+    ('Regular Pass', 1300.00),
+    ('Student Pass', 1300.00),
+    ('Senior Citizen Pass', 900.00),
+    ('PWD Pass', 900.00)
+]
+
+# the pass allocation columns move to employee_allocations in _normalize_allocations
+EMPLOYEES_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        employee_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        express_pass INTEGER DEFAULT 0,
+        junior_pass INTEGER DEFAULT 0,
+        regular_pass INTEGER DEFAULT 0,
+        student_pass INTEGER DEFAULT 0,
+        pwd_pass INTEGER DEFAULT 0,
+        senior_citizen_pass INTEGER DEFAULT 0
+    )
+'''
+
+# employees once _normalize_allocations has copied those columns out
+NORMALIZED_EMPLOYEES_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        employee_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        username TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL
+    )
+'''
+
+CUSTOMERS_SQL = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        ticket_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL DEFAULT '',
+        quantity INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        booked_date TEXT NOT NULL,
+        purchased_date TEXT NOT NULL,
+        pass_type TEXT NOT NULL,
+        employee_id TEXT,
+        FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
+    )
+'''
+
+
+def _columns(cursor, table):
+    """Return {column name: declared type} for a table."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    return {row[1]: row[2].upper() for row in cursor.fetchall()}
+
+
+def _rebuild(cursor, table, create_sql, select_sql):
+    # to change a column type or drop a column SQLite needs the table copied into a new one
+    cursor.execute(create_sql.format(name=f'{table}_new'))
+    cursor.execute(f'INSERT INTO {table}_new {select_sql}')
+    cursor.execute(f'DROP TABLE {table}')
+    cursor.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+
+
+def _create_base_tables(cursor):
+    # to create admin table and default admin
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS admin (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO admin (username, password) VALUES (?, ?)',
+                   ('admin', 'admin123'))
+
+    cursor.execute(EMPLOYEES_SQL.format(name='employees'))
+    cursor.execute(CUSTOMERS_SQL.format(name='customers'))
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cancellations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticket_id TEXT UNIQUE NOT NULL,
+            name TEXT NOT NULL,
+            email TEXT NOT NULL,
+            reasons TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            booked_date TEXT NOT NULL,
+            purchased_date TEXT NOT NULL,
+            status TEXT DEFAULT 'Pending',
+            pass_type TEXT,
+            FOREIGN KEY (ticket_id) REFERENCES customers (ticket_id)
+        )
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pricing (
+            pass_type TEXT PRIMARY KEY,
+            price REAL NOT NULL
+        )
+    ''')
+    # to seed prices only once, so admin changes survive a restart
+    cursor.execute('SELECT COUNT(*) FROM pricing')
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany('INSERT INTO pricing (pass_type, price) VALUES (?, ?)', DEFAULT_PRICES)
+
+
+def _reconcile_schema_drift(cursor):
+    # employee IDs are 'E12345' strings, but older builds declared INTEGER AUTOINCREMENT
+    if _columns(cursor, 'employees')['employee_id'] != 'TEXT':
+        _rebuild(cursor, 'employees', EMPLOYEES_SQL,
+                 'SELECT CAST(employee_id AS TEXT), name, username, password, express_pass, '
+                 'junior_pass, regular_pass, student_pass, pwd_pass, senior_citizen_pass '
+                 'FROM employees')
+
+    if _columns(cursor, 'customers')['employee_id'] != 'TEXT':
+        _rebuild(cursor, 'customers', CUSTOMERS_SQL,
+                 "SELECT ticket_id, name, COALESCE(email, ''), quantity, amount, booked_date, "
+                 'purchased_date, pass_type, CAST(employee_id AS TEXT) FROM customers')
+
+    # cancellations.pass_type was added after the first release
+    if 'pass_type' not in _columns(cursor, 'cancellations'):
+        cursor.execute('ALTER TABLE cancellations ADD COLUMN pass_type TEXT')
+
+
+def _add_hot_path_indexes(cursor):
+    # per-employee totals, availability and most popular pass
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_employee_pass '
+                   'ON customers (employee_id, pass_type, quantity)')
+    # park-wide sold count per pass type
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_customers_pass_type '
+                   'ON customers (pass_type, quantity)')
+    # this month's sales, overall and per employee
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_customers_month "
+                   "ON customers (strftime('%Y-%m', purchased_date))")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_customers_employee_month "
+                   "ON customers (employee_id, strftime('%Y-%m', purchased_date))")
+    # pending refunds count and approved refunds
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_cancellations_status '
+                   "ON cancellations (status, strftime('%Y-%m', purchased_date))")
+
+
+# sales_daily buckets: no employee or unparseable date is stored as '' (a PK cannot hold NULL)
+_EMPLOYEE = "IFNULL({row}.employee_id, '')"
+_DAY = "IFNULL(date({row}.purchased_date), '')"
+_CUSTOMER_EMPLOYEE = ("IFNULL((SELECT employee_id FROM customers WHERE ticket_id = {row}.ticket_id), '')")
+
+_UPSERT = '''
+        INSERT INTO sales_daily (employee_id, pass_type, day, tickets, sales, refunds)
+        {select}
+        ON CONFLICT (employee_id, pass_type, day) DO UPDATE SET
+            tickets = tickets + excluded.tickets,
+            sales = sales + excluded.sales,
+            refunds = refunds + excluded.refunds;
+'''
+
+
+def _sale(row, sign):
+    # to add (sign='+') or take back (sign='-') one customers row
+    return _UPSERT.format(select=(
+        f"SELECT {_EMPLOYEE.format(row=row)}, IFNULL({row}.pass_type, ''), {_DAY.format(row=row)}, "
+        f"{sign}{row}.quantity, {sign}{row}.amount, 0 WHERE 1"))
+
+
+def _refund(row, sign):
+    # to add or take back one approved cancellation, booked to the seller of the ticket
+    return _UPSERT.format(select=(
+        f"SELECT {_CUSTOMER_EMPLOYEE.format(row=row)}, IFNULL({row}.pass_type, ''), "
+        f"{_DAY.format(row=row)}, 0, 0, {sign}{row}.amount WHERE {row}.status = 'Approved'"))
+
+
+def _move_refunds(row, sign):
+    # to move approved refunds of a ticket between the '' bucket and its seller
+    # when the customers row appears (sign='+') or goes away (sign='-')
+    other = '-' if sign == '+' else '+'
+    return ''.join(_UPSERT.format(select=(
+        f"SELECT {employee}, IFNULL(x.pass_type, ''), {_DAY.format(row='x')}, 0, 0, {s}x.amount "
+        f"FROM cancellations x WHERE x.ticket_id = {row}.ticket_id AND x.status = 'Approved'"))
+        for employee, s in ((_EMPLOYEE.format(row=row), sign), ("''", other)))
+
+
+def _add_sales_rollup(cursor):
+    # per employee, pass type and day totals, so dashboards never scan customers
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sales_daily (
+            employee_id TEXT NOT NULL,
+            pass_type TEXT NOT NULL,
+            day TEXT NOT NULL,
+            tickets INTEGER NOT NULL DEFAULT 0,
+            sales REAL NOT NULL DEFAULT 0,
+            refunds REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, pass_type, day)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_daily_day ON sales_daily (day)')
+
+    # to keep the rollup in step with every write, whichever code path makes it
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_rollup_insert
+        AFTER INSERT ON customers BEGIN
+            {_sale('NEW', '+')}
+            {_move_refunds('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_rollup_delete
+        AFTER DELETE ON customers BEGIN
+            {_sale('OLD', '-')}
+            {_move_refunds('OLD', '-')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_rollup_update
+        AFTER UPDATE OF ticket_id, quantity, amount, purchased_date, pass_type, employee_id
+        ON customers BEGIN
+            {_sale('OLD', '-')}
+            {_move_refunds('OLD', '-')}
+            {_sale('NEW', '+')}
+            {_move_refunds('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cancellations_rollup_insert
+        AFTER INSERT ON cancellations BEGIN
+            {_refund('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cancellations_rollup_delete
+        AFTER DELETE ON cancellations BEGIN
+            {_refund('OLD', '-')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cancellations_rollup_update
+        AFTER UPDATE OF ticket_id, amount, purchased_date, pass_type, status
+        ON cancellations BEGIN
+            {_refund('OLD', '-')}
+            {_refund('NEW', '+')}
+        END
+    ''')
+
+    # to backfill from the rows already there
+    cursor.execute('DELETE FROM sales_daily')
+    cursor.execute(_UPSERT.format(select=(
+        f"SELECT {_EMPLOYEE.format(row='c')}, IFNULL(c.pass_type, ''), {_DAY.format(row='c')}, "
+        'SUM(c.quantity), SUM(c.amount), 0 FROM customers c WHERE 1 GROUP BY 1, 2, 3')))
+    cursor.execute(_UPSERT.format(select=(
+        f"SELECT {_CUSTOMER_EMPLOYEE.format(row='x')}, IFNULL(x.pass_type, ''), {_DAY.format(row='x')}, "
+        "0, 0, SUM(x.amount) FROM cancellations x WHERE x.status = 'Approved' GROUP BY 1, 2, 3")))
+
+
+def _add_search_index(cursor):
+    # customers has no INTEGER PRIMARY KEY, so its index keeps its own copy of
+    # the text and rows are found again by ticket_id
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts
+        USING fts5(ticket_id, name, email, pass_type)
+    ''')
+    # cancellations reads its text back from the table through the id column
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS cancellations_fts
+        USING fts5(ticket_id, name, email, pass_type, reasons, status,
+                   content='cancellations', content_rowid='id')
+    ''')
+
+    customer_row = "{row}.ticket_id, {row}.name, {row}.email, IFNULL({row}.pass_type, '')"
+    delete_customer = '''
+        DELETE FROM customers_fts WHERE rowid IN (
+            SELECT rowid FROM customers_fts
+            WHERE customers_fts MATCH 'ticket_id:"' || replace(OLD.ticket_id, '"', '""') || '"'
+            AND ticket_id = OLD.ticket_id
+        );
+    '''
+    cancellation_row = ("{row}.id, {row}.ticket_id, {row}.name, {row}.email, {row}.pass_type, "
+                        "{row}.reasons, {row}.status")
+    delete_cancellation = (
+        'INSERT INTO cancellations_fts (cancellations_fts, rowid, ticket_id, name, email, '
+        f"pass_type, reasons, status) VALUES ('delete', {cancellation_row.format(row='OLD')});")
+    insert_cancellation = (
+        'INSERT INTO cancellations_fts (rowid, ticket_id, name, email, pass_type, reasons, status) '
+        f"VALUES ({cancellation_row.format(row='NEW')});")
+
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_insert
+        AFTER INSERT ON customers BEGIN
+            INSERT INTO customers_fts VALUES ({customer_row.format(row='NEW')});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_delete
+        AFTER DELETE ON customers BEGIN
+            {delete_customer}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_fts_update
+        AFTER UPDATE OF ticket_id, name, email, pass_type ON customers BEGIN
+            {delete_customer}
+            INSERT INTO customers_fts VALUES ({customer_row.format(row='NEW')});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cancellations_fts_insert
+        AFTER INSERT ON cancellations BEGIN
+            {insert_cancellation}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cancellations_fts_delete
+        AFTER DELETE ON cancellations BEGIN
+            {delete_cancellation}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_cancellations_fts_update
+        AFTER UPDATE ON cancellations BEGIN
+            {delete_cancellation}
+            {insert_cancellation}
+        END
+    ''')
+
+    # to index the rows already there
+    cursor.execute('DELETE FROM customers_fts')
+    cursor.execute(f"INSERT INTO customers_fts SELECT {customer_row.format(row='customers')} FROM customers")
+    cursor.execute("INSERT INTO cancellations_fts (cancellations_fts) VALUES ('rebuild')")
+
+
+def _add_sort_indexes(cursor):
+    # one index per sort option, ending in the tie-breaker so ORDER BY needs no sort step
+    for name, table, columns in (
+        ('idx_customers_name', 'customers', 'name COLLATE NOCASE, ticket_id'),
+        ('idx_customers_purchased', 'customers', 'purchased_date, ticket_id'),
+        ('idx_customers_employee_name', 'customers', 'employee_id, name COLLATE NOCASE, ticket_id'),
+        ('idx_customers_employee_purchased', 'customers', 'employee_id, purchased_date, ticket_id'),
+        ('idx_cancellations_name', 'cancellations', 'name COLLATE NOCASE, id'),
+        ('idx_cancellations_purchased', 'cancellations', 'purchased_date, id'),
+        ('idx_cancellations_status_id', 'cancellations', 'status, id'),
+        ('idx_employees_name', 'employees', 'name COLLATE NOCASE, employee_id'),
+    ):
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})')
+
+
+def _add_sequences(cursor):
+    # named counters handed out by ids.reserve() with one atomic UPDATE
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+    ''')
+    # new ticket IDs are longer than the old random ones, so they start at 1
+    cursor.execute("INSERT OR IGNORE INTO sequences (name, next_value) VALUES ('ticket', 1)")
+
+
+def _add_employee_sequence(cursor):
+    # to continue after the highest numeric 'E12345' ID handed out at random before
+    cursor.execute('''
+        INSERT OR IGNORE INTO sequences (name, next_value)
+        SELECT 'employee', MAX(10000, IFNULL(MAX(CAST(substr(employee_id, 2) AS INTEGER)) + 1, 0))
+        FROM employees
+        WHERE employee_id GLOB 'E[0-9]*' AND substr(employee_id, 2) NOT GLOB '*[^0-9]*'
+    ''')
+
+
+def _count_sold(row, sign):
+    # to add or take back one customers row in its seller's sold counter
+    return f'''
+        INSERT INTO sold_counts (employee_id, pass_type, sold)
+        SELECT {_EMPLOYEE.format(row=row)}, IFNULL({row}.pass_type, ''), {sign}{row}.quantity WHERE 1
+        ON CONFLICT (employee_id, pass_type) DO UPDATE SET sold = sold + excluded.sold;
+    '''
+
+
+def _add_sold_counters(cursor):
+    # tickets sold per employee and pass type, so a sale checks its allocation
+    # with a primary key lookup instead of summing customers
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sold_counts (
+            employee_id TEXT NOT NULL,
+            pass_type TEXT NOT NULL,
+            sold INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, pass_type)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_sold_insert
+        AFTER INSERT ON customers BEGIN
+            {_count_sold('NEW', '+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_sold_delete
+        AFTER DELETE ON customers BEGIN
+            {_count_sold('OLD', '-')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_customers_sold_update
+        AFTER UPDATE OF quantity, pass_type, employee_id ON customers BEGIN
+            {_count_sold('OLD', '-')}
+            {_count_sold('NEW', '+')}
+        END
+    ''')
+    cursor.execute('DELETE FROM sold_counts')
+    cursor.execute(f'''
+        INSERT INTO sold_counts (employee_id, pass_type, sold)
+        SELECT {_EMPLOYEE.format(row='c')}, IFNULL(c.pass_type, ''), SUM(c.quantity)
+        FROM customers c GROUP BY 1, 2
+    ''')
+
+
+# the per-pass allocation columns employees had before employee_allocations
+LEGACY_ALLOCATION_COLUMNS = [
+    ('Express Pass', 'express_pass'),
+    ('Junior Pass', 'junior_pass'),
+    ('Regular Pass', 'regular_pass'),
+    ('Student Pass', 'student_pass'),
+    ('PWD Pass', 'pwd_pass'),
+    ('Senior Citizen Pass', 'senior_citizen_pass')
+]
+
+
+def _count_allocation_sold(row, sign):
+    # to add or take back one customers row in its seller's allocation
+    return f'''
+        INSERT INTO employee_allocations (employee_id, pass_type, sold)
+        SELECT {_EMPLOYEE.format(row=row)}, IFNULL({row}.pass_type, ''), {sign}{row}.quantity WHERE 1
+        ON CONFLICT (employee_id, pass_type) DO UPDATE SET sold = sold + excluded.sold;
+    '''
+
+
+def _normalize_allocations(cursor):
+    # one (employee, pass type) row holding both the allocation and the sold
+    # counter, so any pass type can be allocated and a sale reads one row
+    cursor.execute('''
+        CREATE TABLE employee_allocations_new (
+            employee_id TEXT NOT NULL,
+            pass_type TEXT NOT NULL,
+            allocation INTEGER NOT NULL DEFAULT 0,
+            sold INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, pass_type)
+        ) WITHOUT ROWID
+    ''')
+    # an unused employee_allocations table shipped with some databases
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'employee_allocations'")
+    if cursor.fetchone():
+        cursor.execute('INSERT INTO employee_allocations_new (employee_id, pass_type, allocation) '
+                       'SELECT employee_id, pass_type, IFNULL(allocation, 0) FROM employee_allocations '
+                       'WHERE employee_id IS NOT NULL AND pass_type IS NOT NULL')
+        cursor.execute('DROP TABLE employee_allocations')
+
+    employee_columns = _columns(cursor, 'employees')
+    legacy_columns = [(pass_type, column) for pass_type, column in LEGACY_ALLOCATION_COLUMNS
+                      if column in employee_columns]
+    for pass_type, column in legacy_columns:
+        # the employees columns win over any stale row copied above
+        cursor.execute(f'INSERT INTO employee_allocations_new (employee_id, pass_type, allocation) '
+                       f'SELECT employee_id, ?, IFNULL({column}, 0) FROM employees WHERE 1 '
+                       f'ON CONFLICT (employee_id, pass_type) DO UPDATE SET allocation = excluded.allocation',
+                       (pass_type,))
+    if legacy_columns:
+        _rebuild(cursor, 'employees', NORMALIZED_EMPLOYEES_SQL,
+                 'SELECT employee_id, name, username, password FROM employees')
+        # dropped along with the old table
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_employees_name '
+                       'ON employees (name COLLATE NOCASE, employee_id)')
+
+    cursor.execute('INSERT INTO employee_allocations_new (employee_id, pass_type, sold) '
+                   'SELECT employee_id, pass_type, sold FROM sold_counts WHERE 1 '
+                   'ON CONFLICT (employee_id, pass_type) DO UPDATE SET sold = excluded.sold')
+    cursor.execute('ALTER TABLE employee_allocations_new RENAME TO employee_allocations')
+    # park-wide allocation and sold per pass type
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_employee_allocations_pass '
+                   'ON employee_allocations (pass_type, allocation, sold)')
+
+    # to move the sold counter triggers over to employee_allocations
+    for event, body in (
+        ('insert', _count_allocation_sold('NEW', '+')),
+        ('delete', _count_allocation_sold('OLD', '-')),
+        ('update', _count_allocation_sold('OLD', '-') + _count_allocation_sold('NEW', '+')),
+    ):
+        cursor.execute(f'DROP TRIGGER IF EXISTS trg_customers_sold_{event}')
+        columns = ' OF quantity, pass_type, employee_id' if event == 'update' else ''
+        cursor.execute(f'''
+            CREATE TRIGGER trg_customers_sold_{event}
+            AFTER {event.upper()}{columns} ON customers BEGIN
+                {body}
+            END
+        ''')
+    cursor.execute('DROP TABLE sold_counts')
+
+    # pass types added from the admin's Pass Types page are listed here
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rides (
+            ride_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            pass_type TEXT NOT NULL
+        )
+    ''')
+
+
+def _add_versions(cursor):
+    # counters bumped on every change to a cached table, so a cache in any
+    # process can tell it went stale with one primary key read
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO versions (name) VALUES ('pricing')")
+
+
+def _log_change(topic, key):
+    return f"INSERT INTO change_log (topic, key) VALUES ('{topic}', {key});"
+
+
+def _add_change_log(cursor):
+    # one row per committed change, read by every running dashboard so a
+    # terminal hears about writes made by other processes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            topic TEXT NOT NULL,
+            key TEXT
+        )
+    ''')
+    # to keep only the recent changes; every 100th row trims the log
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_trim
+        AFTER INSERT ON change_log WHEN NEW.id % 100 = 0 BEGIN
+            DELETE FROM change_log WHERE id <= NEW.id - 1000;
+        END
+    ''')
+
+    for table, topic, key, update_columns in (
+        ('pricing', 'pricing', 'pass_type', ''),
+        ('employee_allocations', 'allocations', 'employee_id', ' OF allocation'),
+        ('customers', 'customers', 'employee_id', ''),
+        ('cancellations', 'cancellations', 'ticket_id', ''),
+    ):
+        for event, body in (
+            ('insert', _log_change(topic, f'NEW.{key}')),
+            ('delete', _log_change(topic, f'OLD.{key}')),
+            ('update', _log_change(topic, f'NEW.{key}')
+             + f"INSERT INTO change_log (topic, key) SELECT '{topic}', OLD.{key} "
+               f'WHERE OLD.{key} IS NOT NEW.{key};'),
+        ):
+            columns = update_columns if event == 'update' else ''
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_changes_{event}
+                AFTER {event.upper()}{columns} ON {table} BEGIN
+                    {body}
+                END
+            ''')
+
+
+# formats older builds and imports wrote dates in; dates are now stored as ISO YYYY-MM-DD
+LEGACY_DATE_FORMATS = ('%m/%d/%Y', '%Y/%m/%d', '%m-%d-%Y', '%B %d, %Y', '%b %d, %Y', '%d %B %Y')
+
+
+def _iso_date(text):
+    for date_format in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _canonicalize_dates(cursor):
+    # ISO dates sort and compare as text, so month and day windows become
+    # plain range scans on the date indexes
+    for table, key in (('customers', 'ticket_id'), ('cancellations', 'id')):
+        for column in ('booked_date', 'purchased_date'):
+            # date() already reads ISO dates that carry a time
+            cursor.execute(f"UPDATE {table} SET {column} = date({column}) "
+                           f"WHERE typeof({column}) = 'text' AND date({column}) IS NOT NULL "
+                           f"AND {column} IS NOT date({column})")
+            cursor.execute(f'SELECT {key}, {column} FROM {table} '
+                           f'WHERE {column} IS NOT NULL AND date({column}) IS NULL')
+            for row_key, value in cursor.fetchall():
+                iso = _iso_date(str(value))
+                if iso:
+                    cursor.execute(f'UPDATE {table} SET {column} = ? WHERE {key} = ?', (iso, row_key))
+
+        # to keep every later write canonical
+        for event, columns in (('insert', ''), ('update', ' OF booked_date, purchased_date')):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_iso_dates_{event}
+                BEFORE {event.upper()}{columns} ON {table}
+                WHEN NEW.booked_date IS NOT date(NEW.booked_date)
+                  OR NEW.purchased_date IS NOT date(NEW.purchased_date)
+                BEGIN
+                    SELECT RAISE(ABORT, 'dates must be stored as YYYY-MM-DD');
+                END
+            ''')
+
+    # the strftime('%Y-%m', ...) expression indexes lost their last users to
+    # the sales_daily rollup and only slow down writes
+    for index in ('idx_customers_month', 'idx_customers_employee_month', 'idx_cancellations_status'):
+        cursor.execute(f'DROP INDEX IF EXISTS {index}')
+
+
+def _check_changed_dates_only(cursor):
+    # dates _canonicalize_dates could not parse stay as they were, and the
+    # update check made every edit of such a row fail; now an update is only
+    # checked on a date it actually changes
+    for table in ('customers', 'cancellations'):
+        cursor.execute(f'DROP TRIGGER IF EXISTS trg_{table}_iso_dates_update')
+        cursor.execute(f'''
+            CREATE TRIGGER trg_{table}_iso_dates_update
+            BEFORE UPDATE OF booked_date, purchased_date ON {table}
+            WHEN (NEW.booked_date IS NOT OLD.booked_date
+                  AND NEW.booked_date IS NOT date(NEW.booked_date))
+              OR (NEW.purchased_date IS NOT OLD.purchased_date
+                  AND NEW.purchased_date IS NOT date(NEW.purchased_date))
+            BEGIN
+                SELECT RAISE(ABORT, 'dates must be stored as YYYY-MM-DD');
+            END
+        ''')
+
+
+# (version, step) pairs; append new steps, never edit or reorder applied ones
+MIGRATIONS = [
+    (1, _create_base_tables),
+    (2, _reconcile_schema_drift),
+    (3, _add_hot_path_indexes),
+    (4, _add_sales_rollup),
+    (5, _add_search_index),
+    (6, _add_sort_indexes),
+    (7, _add_sequences),
+    (8, _add_employee_sequence),
+    (9, _add_sold_counters),
+    (10, _normalize_allocations),
+    (11, _add_versions),
+    (12, _add_change_log),
+    (13, _canonicalize_dates),
+    (14, _check_changed_dates_only),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version():
+    return db.query_value('PRAGMA user_version', default=0)
+
+
+def migrate():
+    """Bring the database up to SCHEMA_VERSION."""
+    # to start with one read when the schema is already current, as it is on
+    # every launch after the first
+    if current_version() >= SCHEMA_VERSION:
+        return
+    for version, step in MIGRATIONS:
+        if current_version() >= version:
+            continue
+        with db.transaction(immediate=True) as cursor:
+            # to re-check under the write lock in case another terminal got here first
+            cursor.execute('PRAGMA user_version')
+            if cursor.fetchone()[0] >= version:
+                continue
+            step(cursor)
+            cursor.execute(f'PRAGMA user_version = {version}')
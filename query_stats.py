@@ -0,0 +1,173 @@
+"""
+Per-statement timings for every query the data layer runs.
+
+database.py reports each statement here with its latency and row count. They
+are kept per (screen, statement) as a latency histogram, so the admin Query
+Stats page and report() can show where time goes and which screen asked
+for it. The screen is whatever ScreenManager last showed, carried over to the
+worker thread by shared.run_in_background.
+
+Statements slower than slow_ms (FUNPASS_SLOW_QUERY_MS, off by default) also
+go to the slow query log with their EXPLAIN QUERY PLAN. The plan is captured
+once per statement. Set FUNPASS_QUERY_STATS to a file path to have report()
+written there when the process exits.
+"""
+import atexit
+import os
+import re
+import threading
+import time
+from collections import deque
+
+# histogram bucket upper bounds in milliseconds; the last bucket is open ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+# to bound memory: statements are pasted from a fixed set, but search text is not
+MAX_STATEMENTS = 2000
+SLOW_LOG_SIZE = 100
+
+slow_ms = float(os.environ.get('FUNPASS_SLOW_QUERY_MS') or 0) or None
+enabled = True
+
+_stats = {}
+_plans = {}
+_slow = deque(maxlen=SLOW_LOG_SIZE)
+_lock = threading.Lock()
+_local = threading.local()
+_normalized = {}
+
+
+class StatementStats:
+    __slots__ = ('calls', 'total', 'max', 'rows', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def percentile(self, fraction):
+        """Return the upper bound in ms of the bucket holding this fraction of calls."""
+        target = self.calls * fraction
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max * 1000
+
+
+def current_screen():
+    return getattr(_local, 'screen', None)
+
+
+def set_screen(name):
+    """Attribute this thread's statements to the named screen from now on."""
+    _local.screen = name
+
+
+def normalize(sql):
+    """Return sql on one line with runs of whitespace collapsed."""
+    text = _normalized.get(sql)
+    if text is None:
+        text = re.sub(r'\s+', ' ', sql).strip()
+        if len(_normalized) < MAX_STATEMENTS:
+            _normalized[sql] = text
+    return text
+
+
+def record(conn, sql, params, seconds, rows):
+    """Count one run of sql that took `seconds` and returned or changed `rows` rows."""
+    if not enabled:
+        return
+    statement = normalize(sql)
+    key = (current_screen(), statement)
+    milliseconds = seconds * 1000
+    bucket = len(BUCKETS_MS)
+    for index, bound in enumerate(BUCKETS_MS):
+        if milliseconds <= bound:
+            bucket = index
+            break
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            if len(_stats) >= MAX_STATEMENTS:
+                return
+            stats = _stats[key] = StatementStats()
+        stats.calls += 1
+        stats.total += seconds
+        stats.rows += max(rows, 0)
+        stats.buckets[bucket] += 1
+        if seconds > stats.max:
+            stats.max = seconds
+    if slow_ms is not None and milliseconds >= slow_ms:
+        _log_slow(conn, statement, sql, params, milliseconds, rows)
+
+
+def add_rows(sql, rows):
+    """Count rows fetched after the statement itself was recorded."""
+    if not enabled or not rows:
+        return
+    with _lock:
+        stats = _stats.get((current_screen(), normalize(sql)))
+        if stats is not None:
+            stats.rows += rows
+
+
+def _log_slow(conn, statement, sql, params, milliseconds, rows):
+    plan = _plans.get(statement)
+    if plan is None and not statement.upper().startswith(('BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA')):
+        try:
+            plan = [detail for _, _, _, detail in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+        except Exception as e:
+            plan = [f"no plan: {e}"]
+        _plans[statement] = plan
+    _slow.append({'at': time.strftime('%Y-%m-%d %H:%M:%S'), 'screen': current_screen(),
+                  'ms': round(milliseconds, 3), 'rows': rows, 'statement': statement,
+                  'plan': plan or []})
+
+
+def snapshot():
+    """Return [(screen, statement, StatementStats)] by total time, largest first."""
+    with _lock:
+        items = [(screen, statement, stats) for (screen, statement), stats in _stats.items()]
+    return sorted(items, key=lambda item: item[2].total, reverse=True)
+
+
+def slow_queries():
+    """Return the slow query log, oldest first."""
+    return list(_slow)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _slow.clear()
+        _plans.clear()
+
+
+def report(limit=30):
+    """Return the busiest statements and the slow query log as text."""
+    lines = [f"{'screen':<22} {'calls':>7} {'total ms':>10} {'p50 ms':>7} {'p99 ms':>7} "
+             f"{'max ms':>8} {'rows':>8}  statement"]
+    for screen, statement, stats in snapshot()[:limit]:
+        lines.append(f"{screen or '-':<22} {stats.calls:>7} {stats.total * 1000:>10.1f} "
+                     f"{stats.percentile(0.5):>7} {stats.percentile(0.99):>7} "
+                     f"{stats.max * 1000:>8.2f} {stats.rows:>8}  {statement[:120]}")
+    slow = slow_queries()
+    if slow:
+        lines += ['', f"slow queries (>= {slow_ms} ms):"]
+        for entry in slow:
+            lines.append(f"{entry['at']} {entry['screen'] or '-'} {entry['ms']} ms, "
+                         f"{entry['rows']} rows: {entry['statement'][:200]}")
+            lines += [f"    {detail}" for detail in entry['plan']]
+    return '\n'.join(lines)
+
+
+def _dump_at_exit(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(report(limit=len(_stats)) + '\n')
+
+
+if os.environ.get('FUNPASS_QUERY_STATS'):
+    atexit.register(_dump_at_exit, os.environ['FUNPASS_QUERY_STATS'])
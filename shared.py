@@ -3,112 +3,434 @@ This module contains utilities and UI elements shared between modules.
 """
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-from tkcalendar import DateEntry
-from datetime import datetime
 import sqlite3
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import pandas as pd
-import random
-import string
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import database as db
+import migrations
+import query_stats
 
 # Common database functions
 def create_database():
-    conn = sqlite3.connect('funpass.db')
-    cursor = conn.cursor()
-    
-    # Employees table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS employees (
-            employee_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            express_pass INTEGER DEFAULT 0,
-            junior_pass INTEGER DEFAULT 0,
-            regular_pass INTEGER DEFAULT 0,
-            student_pass INTEGER DEFAULT 0,
-            pwd_pass INTEGER DEFAULT 0,
-            senior_citizen_pass INTEGER DEFAULT 0
-        )
-    ''')
-    
-    # Admin table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS admin (
-            admin_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL
-        )
-    ''')
-    
-    # Insert default admin if not exists
-    cursor.execute('SELECT * FROM admin WHERE username = ?', ('admin',))
-    if not cursor.fetchone():
-        cursor.execute('INSERT INTO admin (username, password) VALUES (?, ?)', ('admin', 'admin'))
-
-    # Customers table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS customers (
-            ticket_id TEXT PRIMARY KEY,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            booked_date TEXT NOT NULL,
-            purchased_date TEXT NOT NULL,
-            pass_type TEXT NOT NULL,
-            employee_id INTEGER,
-            FOREIGN KEY (employee_id) REFERENCES employees (employee_id)
-        )
-    ''')
-
-    # Cancellations table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cancellations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_id TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            reasons TEXT NOT NULL,
-            quantity INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            booked_date TEXT NOT NULL,
-            purchased_date TEXT NOT NULL,
-            status TEXT DEFAULT 'Pending',
-            FOREIGN KEY (ticket_id) REFERENCES customers (ticket_id)
-        )
-    ''')
-
-    # Pricing table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS pricing (
-            pass_type TEXT PRIMARY KEY,
-            price REAL NOT NULL
-        )
-    ''')
-
-    # Insert default pricing if table is empty
-    cursor.execute('SELECT COUNT(*) FROM pricing')
-    if cursor.fetchone()[0] == 0:
-        default_prices = [
-            ('Express Pass', 2300.00),
-            ('Junior Pass', 900.00),
-            ('Regular Pass', 1300.00),
-            ('Student Pass', 1300.00),
-            ('Senior Citizen Pass', 900.00),
-            ('PWD Pass', 900.00)
-        ]
-        cursor.executemany('''
-            INSERT OR REPLACE INTO pricing (pass_type, price) 
-            VALUES (?, ?)
-        ''', default_prices)
-
-    conn.commit()
-    conn.close()
+    # to create or upgrade the schema to the latest version
+    migrations.migrate()
 
 # Common UI utilities
+
+# one worker thread runs every search and background load, so it keeps a
+# single database connection
+_search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+
+# to check on background work this often
+POLL_MS = 20
+
+
+def _submit(fetch, *args):
+    # to charge the worker's queries to the screen that asked for them
+    screen = query_stats.current_screen()
+
+    def run():
+        query_stats.set_screen(screen)
+        return fetch(*args)
+    return _search_executor.submit(run)
+
+
+def run_in_background(widget, fetch, show):
+    """Run fetch() on the worker thread and hand its result to show() on the Tk thread.
+
+    Nothing is shown if widget is destroyed first.
+    """
+    future = _submit(fetch)
+
+    def poll():
+        if not widget.winfo_exists():
+            return
+        if not future.done():
+            widget.after(POLL_MS, poll)
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading data: {str(e)}")
+            return
+        show(result)
+
+    poll()
+
+
+class DebouncedSearch:
+    """Search as the user types, without blocking the Tk thread.
+
+    Waits until typing pauses for DELAY_MS, runs fetch(text) on the search
+    worker and hands the rows to show(rows) on the Tk thread. Results of a
+    search that a newer keystroke has replaced are dropped. Detaches itself
+    when widget is destroyed.
+    """
+    DELAY_MS = 250
+
+    def __init__(self, widget, variable, fetch, show):
+        self.widget = widget
+        self.variable = variable
+        self.fetch = fetch
+        self.show = show
+        self._generation = 0
+        self._after_id = None
+        self._trace_id = variable.trace('w', self._schedule)
+        widget.bind('<Destroy>', self._close, add='+')
+
+    def _schedule(self, *args):
+        self._generation += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._after_id = self.widget.after(self.DELAY_MS, self._start)
+
+    def _start(self):
+        self._after_id = None
+        generation = self._generation
+        future = _submit(self._run, generation, self.variable.get())
+        self._poll(generation, future)
+
+    def _run(self, generation, text):
+        # to skip a search that went stale while it waited for the worker
+        if generation != self._generation:
+            return None
+        return self.fetch(text)
+
+    def _poll(self, generation, future):
+        if generation != self._generation or not self.widget.winfo_exists():
+            return
+        if not future.done():
+            self.widget.after(POLL_MS, self._poll, generation, future)
+            return
+        try:
+            rows = future.result()
+        except Exception as e:
+            messagebox.showerror("Search Error", f"Error searching: {str(e)}")
+            return
+        self.show(rows)
+
+    def _close(self, event):
+        if event.widget is not self.widget:
+            return
+        # to stop a pending or running search from touching the destroyed widget
+        self._generation += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        self.variable.trace_vdelete('w', self._trace_id)
+
+class PagedTreeview:
+    """Fill a Treeview a page at a time as the user scrolls.
+
+    fetch_page(after=None, backwards=False) returns (values, key) pairs as
+    database.page does. Pages are fetched when the view nears either edge and
+    at most MAX_PAGES stay in the tree; pages dropped at one end are fetched
+    again by key when the user scrolls back.
+    """
+    MAX_PAGES = 5
+    # to fetch the next page once the view is this close to an edge
+    EDGE = 0.1
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = None
+        self._pages = deque()
+        self._keys = {}
+        self._at_start = self._at_end = True
+        self._check_id = None
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    def show(self, fetch_page, first_page=None):
+        """Replace the rows with the top of fetch_page; first_page may be prefetched."""
+        self.fetch_page = fetch_page
+        self.clear()
+        if first_page is None:
+            first_page = fetch_page()
+        self._at_start = True
+        self._at_end = len(first_page) < db.PAGE_SIZE
+        self._append(first_page)
+
+    def reload(self):
+        """Re-read the rows from the top one in view down, keeping the selection.
+
+        The view stays where the user scrolled it instead of jumping back to
+        the first page; the pages above are fetched again on scrolling up.
+        """
+        if self.fetch_page is None:
+            return
+        children = self.tree.get_children()
+        selected = {self._keys[item] for item in self.tree.selection() if item in self._keys}
+        top = min(int(self.tree.yview()[0] * len(children) + 0.5), max(len(children) - 1, 0))
+        # to start the page at the top row in view, read after the row above it
+        after = self._edge_key(reversed(children[:top]))
+        if after is None and children and not self._at_start and children[top] in self._keys:
+            above = self.fetch_page(self._keys[children[top]], backwards=True)
+            after = above[0][1] if above else None
+        rows = self.fetch_page(after)
+        self.clear()
+        self._at_start = after is None
+        self._at_end = len(rows) < db.PAGE_SIZE
+        self._append(rows)
+        self.tree.selection_set([item for item, key in self._keys.items() if key in selected])
+        self.tree.yview_moveto(0)
+
+    def clear(self):
+        self.tree.delete(*self.tree.get_children())
+        self._pages.clear()
+        self._keys.clear()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._check_id is None:
+            self._check_id = self.tree.after_idle(self._check_edges)
+
+    def _check_edges(self):
+        self._check_id = None
+        if self.fetch_page is None or not self.tree.winfo_exists():
+            return
+        first, last = self.tree.yview()
+        if last >= 1 - self.EDGE and not self._at_end:
+            self._next_page()
+        elif first <= self.EDGE and not self._at_start:
+            self._previous_page()
+
+    def _edge_key(self, items):
+        # to skip rows the dashboard deleted from the tree itself
+        for item in items:
+            if item in self._keys and self.tree.exists(item):
+                return self._keys[item]
+        return None
+
+    def _next_page(self):
+        rows = self.fetch_page(self._edge_key(reversed(self.tree.get_children())))
+        self._at_end = len(rows) < db.PAGE_SIZE
+        self._append(rows)
+        if len(self._pages) > self.MAX_PAGES:
+            # to keep the rows in view where they are after dropping the top page
+            first = self.tree.yview()[0] * len(self.tree.get_children())
+            dropped = self._drop(self._pages.popleft())
+            self._at_start = False
+            self.tree.yview_moveto((first - dropped) / max(len(self.tree.get_children()), 1))
+
+    def _previous_page(self):
+        top = self.tree.get_children()[:1]
+        rows = self.fetch_page(self._edge_key(self.tree.get_children()), backwards=True)
+        self._at_start = len(rows) < db.PAGE_SIZE
+        items = []
+        for values, key in rows:
+            item = self.tree.insert('', 0, values=values)
+            self._keys[item] = key
+            items.append(item)
+        self._pages.appendleft(items[::-1])
+        if len(self._pages) > self.MAX_PAGES:
+            self._drop(self._pages.pop())
+            self._at_end = False
+        if top:
+            self.tree.see(top[0])
+
+    def _append(self, rows):
+        items = []
+        for values, key in rows:
+            item = self.tree.insert('', tk.END, values=values)
+            self._keys[item] = key
+            items.append(item)
+        self._pages.append(items)
+
+    def _drop(self, items):
+        for item in items:
+            self._keys.pop(item, None)
+        items = [item for item in items if self.tree.exists(item)]
+        self.tree.delete(*items)
+        return len(items)
+
+
+class ChangeBus:
+    """Deliver change_log events from every running process on the Tk thread.
+
+    Every POLL_MS it compares db.change_marker() and reads the new change_log
+    rows only when that moved. subscribe(topic, callback) gets
+    callback(keys) with the set of changed keys for that topic, or None when
+    older changes were trimmed before they were read and anything may have
+    changed. It is called with own=True when every one of those changes was
+    committed by this process on the Tk thread, whose save path has already
+    redrawn what is on screen.
+    """
+    POLL_MS = 500
+
+    def __init__(self, root):
+        self.root = root
+        self._subscribers = {}
+        db.track_own_changes()
+        self._marker = db.change_marker()
+        self._last_id = db.last_change_id()
+        self._schedule()
+
+    def subscribe(self, topic, callback):
+        self._subscribers.setdefault(topic, []).append(callback)
+
+    def _schedule(self):
+        try:
+            self.root.after(self.POLL_MS, self._poll)
+        except tk.TclError:
+            # to stop polling once the window is gone
+            pass
+
+    def _poll(self):
+        try:
+            marker = db.change_marker()
+            if marker != self._marker:
+                self._marker = marker
+                self._dispatch(db.changes_since(self._last_id))
+        except sqlite3.Error as e:
+            print(f"Error reading changes: {e}")
+        self._schedule()
+
+    def _dispatch(self, changes):
+        if not changes:
+            return
+        # ids run without gaps, so a gap means trimmed rows this bus never saw
+        missed = changes[0][0] != self._last_id + 1
+        self._last_id = changes[-1][0]
+        keys = {}
+        foreign = set()
+        for change_id, topic, key in changes:
+            keys.setdefault(topic, set()).add(key)
+            if not db.is_own_change(change_id):
+                foreign.add(topic)
+        for topic, callbacks in self._subscribers.items():
+            if not missed and topic not in keys:
+                continue
+            for callback in callbacks:
+                try:
+                    callback(None if missed else keys[topic], own=not missed and topic not in foreign)
+                except Exception as e:
+                    print(f"Error handling {topic} change: {e}")
+
+
+class ViewModel:
+    """Displayed values by key, pushed only to the widgets that show them.
+
+    set(key, value) does nothing when the value is unchanged; otherwise it
+    calls just the callbacks subscribed to that key. Subscriptions end when
+    the widget they were made for is destroyed.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self._subscribers = {}
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        if key in self._values and self._values[key] == value:
+            return
+        self._values[key] = value
+        for callback in list(self._subscribers.get(key, ())):
+            callback(value)
+
+    def subscribe(self, keys, callback, widget):
+        """Call callback(value) whenever one of keys changes, while widget exists."""
+        keys = list(keys)
+        for key in keys:
+            self._subscribers.setdefault(key, []).append(callback)
+
+        def unsubscribe(event):
+            if event.widget is not widget:
+                return
+            for key in keys:
+                callbacks = self._subscribers.get(key, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(key, None)
+
+        widget.bind('<Destroy>', unsubscribe, add='+')
+
+
+class ScreenManager:
+    """Build each screen once and raise it on later visits.
+
+    show(name, build, refresh=None, max_age=None) builds a screen into its own
+    frame the first time and afterwards only raises that frame. A screen is
+    brought up to date before it is raised when invalidate(name) was called
+    while it was hidden, or when it was last refreshed more than max_age
+    seconds ago. refresh() reloads its data in place; a screen without one
+    is rebuilt. Queries run while a screen is shown are charged to
+    prefix + name in query_stats.
+    """
+
+    def __init__(self, container, prefix=''):
+        self.container = container
+        self.prefix = prefix
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+        self.current = None
+        self._screens = {}
+
+    def show(self, name, build, refresh=None, max_age=None):
+        screen = self._screens.get(name)
+        self.current = name
+        query_stats.set_screen(self.prefix + name)
+        if screen is None:
+            frame = tk.Frame(self.container, bg='white')
+            frame.grid(row=0, column=0, sticky='nsew')
+            screen = self._screens[name] = _Screen(frame, build, refresh, max_age)
+            build(frame)
+        elif screen.stale or (screen.max_age is not None
+                              and time.monotonic() - screen.refreshed_at > screen.max_age):
+            self._refresh(screen)
+        screen.frame.tkraise()
+
+    def invalidate(self, *names, keep_shown=False):
+        """Refresh the named screens now if shown, otherwise on their next show.
+
+        A shown screen's refresh() is called in place, so it should keep the
+        user's scroll position and selection (see PagedTreeview.reload).
+        keep_shown=True leaves the shown screen alone, for changes its own
+        save path has already redrawn.
+        """
+        for name in names:
+            screen = self._screens.get(name)
+            if screen is None:
+                continue
+            if name == self.current:
+                if not keep_shown:
+                    self._refresh(screen)
+            else:
+                screen.stale = True
+
+    def discard(self, name):
+        """Drop a screen so its next show builds it from scratch."""
+        screen = self._screens.pop(name, None)
+        if screen is not None:
+            screen.frame.destroy()
+            if name == self.current:
+                self.current = None
+
+    def _refresh(self, screen):
+        screen.stale = False
+        screen.refreshed_at = time.monotonic()
+        if screen.refresh is None:
+            for widget in screen.frame.winfo_children():
+                widget.destroy()
+            screen.build(screen.frame)
+        else:
+            screen.refresh()
+
+
+class _Screen:
+    def __init__(self, frame, build, refresh, max_age):
+        self.frame = frame
+        self.build = build
+        self.refresh = refresh
+        self.max_age = max_age
+        self.stale = False
+        self.refreshed_at = time.monotonic()
+
+
 class BaseWindow:
     def center_window(self):
         screen_width = self.root.winfo_screenwidth()